@@ -0,0 +1,74 @@
+"""
+Benchmark the light transition engine against a fake device.
+
+The fake device takes a configurable time to accept each frame, standing
+in for the round trip to a real device, so the effect of frame rate and
+device latency on the frames sent and dropped can be measured without
+any hardware.
+
+    python -m benchmarks.light_transition --duration 5 --latency 0.15
+"""
+import argparse
+import asyncio
+from time import monotonic
+
+from custom_components.tuya_local.helpers.transition import TransitionEngine
+
+
+class FakeDevice:
+    """Accepts frames after a fixed latency, recording when each arrived."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.frames = []
+
+    async def async_send_properties(self, dps_map):
+        await asyncio.sleep(self.latency)
+        self.frames.append((monotonic(), dps_map))
+
+
+class FakeHass:
+    def async_create_task(self, coro):
+        return asyncio.ensure_future(coro)
+
+
+def render(values):
+    r, g, b, w = values["rgbw_color"]
+    return {"22": values["brightness"], "24": f"{r:02x}{g:02x}{b:02x}{w:02x}"}
+
+
+async def run(duration, latency, frame_rate):
+    device = FakeDevice(latency)
+    engine = TransitionEngine(FakeHass(), device.async_send_properties, frame_rate)
+    start = monotonic()
+    await engine.async_run(
+        {"brightness": 10, "rgbw_color": (255, 0, 0, 255)},
+        {"brightness": 255, "rgbw_color": (0, 0, 255, 128)},
+        duration,
+        render,
+    )
+    elapsed = monotonic() - start
+    gaps = [b[0] - a[0] for a, b in zip(device.frames, device.frames[1:])]
+    return {
+        "elapsed": round(elapsed, 3),
+        "overrun": round(elapsed - duration, 3),
+        "max_gap": round(max(gaps), 3) if gaps else None,
+        **engine.as_dict(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--latency", type=float, nargs="+", default=[0.02, 0.1, 0.3])
+    parser.add_argument("--frame-rate", type=float, nargs="+", default=[2, 5, 10])
+    args = parser.parse_args()
+
+    for frame_rate in args.frame_rate:
+        for latency in args.latency:
+            result = asyncio.run(run(args.duration, latency, frame_rate))
+            print(f"frame rate {frame_rate:>4} latency {latency:>5}: {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark the compiled dp mapping plans against interpreting the yaml.
+
+Every dp of every device config is read from and written to a fake device
+holding a typical value for each dp, first by interpreting the mapping
+config on each call as the original implementation does, then through the
+compiled plans.
+
+    python -m benchmarks.mapping_plan --repeat 20
+"""
+import argparse
+from time import perf_counter
+
+from custom_components.tuya_local.helpers.device_config import (
+    available_configs,
+    get_config,
+)
+from tests.test_mapping import interpret_from_dps, interpret_values_to_set
+
+
+class FakeDevice:
+    """Answers get_property from a dict of dps."""
+
+    name = "Benchmark"
+
+    def __init__(self, dps):
+        self.dps = dps
+
+    def get_property(self, dps_id):
+        return self.dps.get(dps_id)
+
+
+def typical_value(dp):
+    for m in dp._config.get("mapping", []):
+        if "dps_val" in m:
+            return m["dps_val"]
+    r = dp._config.get("range")
+    return r.get("min") if r else None
+
+
+def load_cases():
+    """Return (dp, device, value to set) for every dp of every config."""
+    cases = []
+    for fname in available_configs():
+        cfg = get_config(fname[:-5])
+        for entity in [cfg.primary_entity, *cfg.secondary_entities()]:
+            dps = list(entity.dps())
+            device = FakeDevice({d.id: typical_value(d) for d in dps})
+            for dp in dps:
+                try:
+                    value = dp.get_value(device)
+                    dp.get_values_to_set(device, value)
+                except Exception:
+                    value = None
+                cases.append((dp, device, value))
+    return cases
+
+
+def run(cases, repeat, read, write):
+    start = perf_counter()
+    for _ in range(repeat):
+        for dp, device, value in cases:
+            read(dp, device)
+    reading = perf_counter() - start
+    start = perf_counter()
+    writable = [c for c in cases if c[2] is not None and not c[0].readonly]
+    for _ in range(repeat):
+        for dp, device, value in writable:
+            write(dp, device, value)
+    return reading, perf_counter() - start
+
+
+def interpreted_read(dp, device):
+    return interpret_from_dps(dp, device.get_property(dp.id), device)
+
+
+def interpreted_write(dp, device, value):
+    try:
+        return interpret_values_to_set(dp, device, value)
+    except (AttributeError, ValueError):
+        return None
+
+
+def compiled_read(dp, device):
+    return dp.get_value(device)
+
+
+def compiled_write(dp, device, value):
+    try:
+        return dp.get_values_to_set(device, value)
+    except (AttributeError, ValueError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    cases = load_cases()
+    print(f"{len(cases)} dps, {args.repeat} repeats")
+    before = run(cases, args.repeat, interpreted_read, interpreted_write)
+    after = run(cases, args.repeat, compiled_read, compiled_write)
+    for name, b, a in zip(("read", "write"), before, after):
+        print(f"{name:>5}: interpreted {b:.3f}s compiled {a:.3f}s ({b / a:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Measure the memory used by devices and their entity configs.
+
+A number of devices of one config type are created as the integration
+would create them, each with its own device config and entity configs,
+whose dps have all been read once so that their mappings are compiled, and
+a refreshed state.  The memory allocated is reported per device and per
+entity.
+
+    python -m benchmarks.memory --type smartplugv2 --devices 60
+"""
+import argparse
+import gc
+import tracemalloc
+
+from custom_components.tuya_local.device import TuyaLocalDevice
+from custom_components.tuya_local.helpers.device_config import get_config
+
+
+class FakeLoop:
+    def call_soon_threadsafe(self, callback, *args):
+        pass
+
+
+class FakeHass:
+    loop = FakeLoop()
+
+
+def typical_value(dp):
+    for m in dp._config.get("mapping", []):
+        if "dps_val" in m:
+            return m["dps_val"]
+    r = dp._config.get("range")
+    return r.get("min") if r else None
+
+
+def create_device(n, config_type):
+    device = TuyaLocalDevice(
+        f"device {n}", f"device{n:04d}", "127.0.0.1", "0" * 16, None, FakeHass()
+    )
+    config = get_config(config_type)
+    entities = [config.primary_entity, *config.secondary_entities()]
+    dps = {d.id: typical_value(d) for e in entities for d in e.dps()}
+    device._merge_dps(dps)
+    for entity in entities:
+        for dp in entity.dps():
+            try:
+                dp.get_value(device)
+            except Exception:
+                pass
+    # Each entity of the integration holds its entity config
+    return device, config, entities
+
+
+def measure(config_type, count):
+    # Load the yaml and warm up any module level caches first, so that
+    # only the memory that grows with the number of devices is counted
+    create_device(0, config_type)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    devices = [create_device(n, config_type) for n in range(count)]
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    entities = sum(len(e) for _, _, e in devices)
+    return {
+        "type": config_type,
+        "devices": count,
+        "entities": entities,
+        "bytes": used,
+        "bytes_per_device": round(used / count),
+        "bytes_per_entity": round(used / entities),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--type", default="smartplugv2")
+    parser.add_argument("--devices", type=int, default=60)
+    args = parser.parse_args()
+    print(measure(args.type, args.devices))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Replay a recording of device traffic through a TuyaLocalDevice.
+
+Recordings are made with the record_traffic integration setting.  Each
+status and updatedps response is fed to the device as it would be by a
+poll, and each command is sent again, at the recorded pace scaled by
+--speed, or as fast as possible with --speed 0.  With --type, every dp of
+that device config is also read after each refresh, as the entities would.
+The CPU time and the latency of each operation are reported.
+
+    python -m benchmarks.replay recording.jsonl --speed 0 --type kogan_switch
+"""
+import argparse
+from statistics import mean
+from time import perf_counter, process_time
+
+from custom_components.tuya_local.device import TuyaLocalDevice
+from custom_components.tuya_local.helpers import recording
+from custom_components.tuya_local.helpers.device_config import get_config
+
+
+class FakeLoop:
+    def call_soon_threadsafe(self, callback, *args):
+        pass
+
+
+class FakeHass:
+    loop = FakeLoop()
+
+
+def read_all_dps(device, entities):
+    for entity in entities:
+        for dp in entity.dps():
+            dp.get_value(device)
+
+
+def replay(path, speed, config_type=None):
+    transport = recording.ReplayTransport(path, speed)
+    device = TuyaLocalDevice(
+        "replay", "replay", "127.0.0.1", "0" * 16, None, FakeHass()
+    )
+    device._api = transport
+    entities = []
+    if config_type:
+        cfg = get_config(config_type)
+        entities = [cfg.primary_entity, *cfg.secondary_entities()]
+
+    operations = {
+        recording.STATUS: device._refresh_cached_state,
+        recording.UPDATEDPS: device._refresh_fast_dps,
+        recording.CONTROL: device._send_properties,
+    }
+    latency = {kind: [] for kind in operations}
+    cpu = process_time()
+    start = perf_counter()
+    for t, kind, data in recording.read_recording(path):
+        if kind not in operations:
+            continue
+        began = perf_counter()
+        if kind == recording.CONTROL:
+            operations[kind](data)
+        else:
+            operations[kind]()
+            read_all_dps(device, entities)
+        latency[kind].append(perf_counter() - began)
+
+    return {
+        "elapsed": round(perf_counter() - start, 3),
+        "cpu": round(process_time() - cpu, 3),
+        "sent": len(transport.sent),
+        **{
+            kind: {
+                "count": len(times),
+                "mean_ms": round(mean(times) * 1000, 3) if times else None,
+                "max_ms": round(max(times) * 1000, 3) if times else None,
+            }
+            for kind, times in latency.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("recording")
+    parser.add_argument("--speed", type=float, default=0)
+    parser.add_argument("--type", help="device config to read the dps with")
+    args = parser.parse_args()
+    print(replay(args.recording, args.speed, args.type))
+
+
+if __name__ == "__main__":
+    main()
@@ -8,27 +8,135 @@ https://github.com/codetheweb/tuyapi/issues/31.
 """
 import logging
 
+import voluptuous as vol
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_HOST
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.const import CONF_HOST, EVENT_HOMEASSISTANT_STARTED
+from homeassistant.core import CoreState, HomeAssistant, callback
+import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entity_registry import async_migrate_entries
 
 from .const import (
+    CONF_AGGREGATE_SENSORS,
+    CONF_AGGREGATION_WINDOW,
+    CONF_DEBUG_TRACE,
     CONF_DEVICE_ID,
+    CONF_DPS_CHANGED_EVENTS,
+    CONF_ENERGY_SENSORS,
+    CONF_INTENT_TTL,
     CONF_LOCAL_KEY,
+    CONF_POLL_INTERVAL_MAX,
+    CONF_POLL_INTERVAL_MIN,
+    CONF_PROFILE_STARTUP,
+    CONF_RECORD_TRAFFIC,
+    CONF_STARTUP_CONCURRENCY,
+    CONF_STARTUP_TIMEOUT,
+    CONF_TRANSITION_FRAME_RATE,
     CONF_TYPE,
+    DATA_SETTINGS,
     DOMAIN, CONF_DEVICE_CID,
 )
 from .device import setup_device, delete_device, get_device_id
-from .helpers.device_config import get_config
+from .helpers.aggregation import DEFAULT_AGGREGATION_WINDOW
+from .helpers.batch import async_register_services
+from .helpers.device_config import async_get_config
+from .helpers.energy import ENERGY_SENSOR_ID, EnergyMeter
+from .helpers.intents import DEFAULT_INTENT_TTL
+from .helpers.polling import DEFAULT_POLL_INTERVAL_MAX, DEFAULT_POLL_INTERVAL_MIN
+from .helpers.profiling import DATA_PROFILER, StartupProfiler, get_profiler
+from .helpers.startup import (
+    DATA_STARTUP,
+    DEFAULT_STARTUP_CONCURRENCY,
+    DEFAULT_STARTUP_TIMEOUT,
+    StartupRefreshScheduler,
+    get_startup_scheduler,
+)
+from .helpers.transition import DEFAULT_TRANSITION_FRAME_RATE
 
 
 _LOGGER = logging.getLogger(__name__)
 
+CONFIG_SCHEMA = vol.Schema(
+    {
+        vol.Optional(DOMAIN, default={}): vol.Schema(
+            {
+                vol.Optional(CONF_PROFILE_STARTUP, default=False): cv.boolean,
+                vol.Optional(
+                    CONF_STARTUP_CONCURRENCY, default=DEFAULT_STARTUP_CONCURRENCY
+                ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                vol.Optional(
+                    CONF_STARTUP_TIMEOUT, default=DEFAULT_STARTUP_TIMEOUT
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.5)),
+                vol.Optional(
+                    CONF_POLL_INTERVAL_MIN, default=DEFAULT_POLL_INTERVAL_MIN
+                ): vol.All(vol.Coerce(float), vol.Range(min=1)),
+                vol.Optional(
+                    CONF_POLL_INTERVAL_MAX, default=DEFAULT_POLL_INTERVAL_MAX
+                ): vol.All(vol.Coerce(float), vol.Range(min=1)),
+                vol.Optional(CONF_DPS_CHANGED_EVENTS, default=False): cv.boolean,
+                vol.Optional(
+                    CONF_TRANSITION_FRAME_RATE, default=DEFAULT_TRANSITION_FRAME_RATE
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.5, max=20)),
+                vol.Optional(CONF_RECORD_TRAFFIC, default=[]): vol.All(
+                    cv.ensure_list, [cv.string]
+                ),
+                vol.Optional(CONF_DEBUG_TRACE, default=[]): vol.All(
+                    cv.ensure_list, [cv.string]
+                ),
+                vol.Optional(CONF_AGGREGATE_SENSORS, default=[]): vol.All(
+                    cv.ensure_list, [cv.string]
+                ),
+                vol.Optional(CONF_ENERGY_SENSORS, default=[]): vol.All(
+                    cv.ensure_list, [cv.string]
+                ),
+                vol.Optional(CONF_INTENT_TTL, default=DEFAULT_INTENT_TTL): vol.All(
+                    vol.Coerce(float), vol.Range(min=1, max=86400)
+                ),
+                vol.Optional(
+                    CONF_AGGREGATION_WINDOW, default=DEFAULT_AGGREGATION_WINDOW
+                ): vol.All(vol.Coerce(float), vol.Range(min=5, max=3600)),
+            }
+        )
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
+
+async def async_setup(hass: HomeAssistant, config: dict):
+    """Set up integration wide settings from configuration.yaml."""
+    conf = config.get(DOMAIN, {})
+    hass.data[DATA_SETTINGS] = conf
+    profiler = StartupProfiler(conf.get(CONF_PROFILE_STARTUP, False))
+    hass.data[DATA_PROFILER] = profiler
+
+    if profiler.enabled and hass.state != CoreState.running:
+
+        @callback
+        def log_profile(event):
+            """Log what is known of the startup profile once HA has started."""
+            profiler.log_summary()
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STARTED, log_profile)
+
+    scheduler = StartupRefreshScheduler(
+        hass,
+        conf.get(CONF_STARTUP_CONCURRENCY, DEFAULT_STARTUP_CONCURRENCY),
+        conf.get(CONF_STARTUP_TIMEOUT, DEFAULT_STARTUP_TIMEOUT),
+    )
+    await scheduler.async_load()
+    hass.data[DATA_STARTUP] = scheduler
+    async_register_services(hass)
+
+    return True
+
 
 async def async_migrate_entry(hass, entry: ConfigEntry):
     """Migrate to latest config format."""
+    with get_profiler(hass).timeline(entry).phase("async_migrate_entry"):
+        return await _async_migrate_entry(hass, entry)
 
+
+async def _async_migrate_entry(hass, entry: ConfigEntry):
     _LOGGER.debug(f"Calling async_migrate_entry for entry {entry.unique_id}.")
     CONF_TYPE_AUTO = "auto"
 
@@ -36,8 +144,7 @@ async def async_migrate_entry(hass, entry: ConfigEntry):
         # Removal of Auto detection.
         config = {**entry.data, **entry.options, "name": entry.title}
         if config[CONF_TYPE] == CONF_TYPE_AUTO:
-            device = setup_device(hass, config)
-            config[CONF_TYPE] = await device.async_inferred_type()
+            config[CONF_TYPE] = await _async_detect_type(hass, config)
             if config[CONF_TYPE] is None:
                 _LOGGER.error(
                     f"Unable to determine type for device {config[CONF_DEVICE_ID]}."
@@ -59,8 +166,7 @@ async def async_migrate_entry(hass, entry: ConfigEntry):
         # suggest it was removed completely.  But that is probably due to
         # overwriting options without CONF_TYPE.
         if config.get(CONF_TYPE, CONF_TYPE_AUTO) == CONF_TYPE_AUTO:
-            device = setup_device(hass, config)
-            config[CONF_TYPE] = await device.async_inferred_type()
+            config[CONF_TYPE] = await _async_detect_type(hass, config)
             if config[CONF_TYPE] is None:
                 _LOGGER.error(
                     f"Unable to determine type for device {config[CONF_DEVICE_ID]}."
@@ -80,12 +186,11 @@ async def async_migrate_entry(hass, entry: ConfigEntry):
         # Migrate to filename based config_type, to avoid needing to
         # parse config files to find the right one.
         config = {**entry.data, **entry.options, "name": entry.title}
-        config_type = get_config(config[CONF_TYPE]).config_type
+        config_type = (await async_get_config(hass, config[CONF_TYPE])).config_type
 
         # Special case for kogan_switch.  Consider also v2.
         if config_type == "smartplugv1":
-            device = setup_device(hass, config)
-            config_type = await device.async_inferred_type()
+            config_type = await _async_detect_type(hass, config)
             if config_type != "smartplugv2":
                 config_type = "smartplugv1"
 
@@ -100,7 +205,7 @@ async def async_migrate_entry(hass, entry: ConfigEntry):
     if entry.version <= 5:
         # Migrate unique ids of existing entities to new format
         old_id = entry.unique_id
-        conf_file = get_config(entry.data[CONF_TYPE])
+        conf_file = await async_get_config(hass, entry.data[CONF_TYPE])
         if conf_file is None:
             _LOGGER.error(f"Configuration file for {entry.data[CONF_TYPE]} not found.")
             return False
@@ -143,22 +248,53 @@ async def async_migrate_entry(hass, entry: ConfigEntry):
     return True
 
 
+async def _async_detect_type(hass: HomeAssistant, config: dict):
+    """
+    Detect the type of a device during migration.
+    The device is given a single short refresh, so that an unreachable device
+    fails detection quickly rather than holding up startup.  The device is
+    closed afterwards, as it is replaced when the entry is set up.
+    """
+    device = setup_device(hass, config)
+    try:
+        if not await device.async_startup_refresh(get_startup_scheduler(hass).timeout):
+            return None
+        return await device.async_inferred_type()
+    finally:
+        device.async_close()
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     _LOGGER.debug(f"Setting up entry for device: {get_device_id(entry.data)}")
     config = {**entry.data, **entry.options, "name": entry.title}
-    setup_device(hass, config)
-    device_conf = get_config(entry.data[CONF_TYPE])
+    timeline = get_profiler(hass).timeline(entry)
+    with timeline.phase("setup_device"):
+        device = setup_device(hass, config)
+    device.startup_timeline = timeline
+    with timeline.phase("get_config"):
+        device_conf = await async_get_config(hass, entry.data[CONF_TYPE])
     if device_conf is None:
         _LOGGER.error(f"Configuration file for {config[CONF_TYPE]} not found.")
         return False
+    device.set_poll_classes(device_conf.poll_classes())
 
     entities = set()
+    settings = hass.data.get(DATA_SETTINGS, {})
+    if get_device_id(config) in settings.get(CONF_ENERGY_SENSORS, []):
+        device.energy_meter = EnergyMeter.for_config(device_conf, device)
+        if device.energy_meter is None:
+            _LOGGER.warning(f"{device.name} does not report power to meter.")
+        else:
+            entities.add("sensor")
     e = device_conf.primary_entity
     entities.add(e.entity)
     for e in device_conf.secondary_entities():
         entities.add(e.entity)
 
-    await hass.config_entries.async_forward_entry_setups(entry, entities)
+    with timeline.phase("async_forward_entry_setups"):
+        await hass.config_entries.async_forward_entry_setups(entry, entities)
+
+    get_startup_scheduler(hass).async_schedule(get_device_id(config), device)
 
     entry.add_update_listener(async_update_entry)
 
@@ -169,7 +305,7 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     _LOGGER.debug(f"Unloading entry for device: {entry.data[CONF_DEVICE_ID]}")
     config = entry.data
     data = hass.data[DOMAIN][get_device_id(config)]
-    device_conf = get_config(config[CONF_TYPE])
+    device_conf = await async_get_config(hass, config[CONF_TYPE])
     if device_conf is None:
         _LOGGER.error(f"Configuration file for {config[CONF_TYPE]} not found.")
         return False
@@ -181,6 +317,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     for e in device_conf.secondary_entities():
         if e.config_id in data:
             entities[e.entity] = True
+    if ENERGY_SENSOR_ID in data:
+        entities["sensor"] = True
 
     for e in entities:
         await hass.config_entries.async_forward_entry_unload(entry, e)
@@ -9,7 +9,7 @@ from . import DOMAIN
 from .device import TuyaLocalDevice
 from .const import CONF_DEVICE_ID, CONF_LOCAL_KEY, CONF_TYPE, CONF_DEVICE_CID
 from .helpers.config import get_device_id
-from .helpers.device_config import get_config
+from .helpers.device_config import async_get_config
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -61,16 +61,13 @@ class ConfigFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             self.data[CONF_TYPE] = user_input[CONF_TYPE]
             return await self.async_step_choose_entities()
 
-        types = []
+        ranked = await self.device.async_ranked_types()
+        types = [config.config_type for _, config in ranked]
         best_match = 0
         best_matching_type = None
-
-        async for type in self.device.async_possible_types():
-            types.append(type.config_type)
-            q = type.match_quality(self.device._get_cached_state())
-            if q > best_match:
-                best_match = q
-                best_matching_type = type.config_type
+        if ranked and ranked[0][0] > 0:
+            best_match = ranked[0][0]
+            best_matching_type = ranked[0][1].config_type
 
         if best_match < 100:
             best_match = int(best_match)
@@ -99,7 +96,7 @@ class ConfigFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             return self.async_create_entry(
                 title=title, data={**self.data, **user_input}
             )
-        config = get_config(self.data[CONF_TYPE])
+        config = await async_get_config(self.hass, self.data[CONF_TYPE])
         schema = {vol.Required(CONF_NAME, default=config.name): str}
 
         return self.async_show_form(
@@ -139,7 +136,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             vol.Required(CONF_HOST, default=config.get(CONF_HOST, "")): str,
             vol.Optional(CONF_DEVICE_CID, default=config.get(CONF_DEVICE_CID, "")): str,
         }
-        cfg = get_config(config[CONF_TYPE])
+        cfg = await async_get_config(self.hass, config[CONF_TYPE])
         if cfg is None:
             return self.async_abort(reason="not_supported")
 
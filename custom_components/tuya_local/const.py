@@ -1,9 +1,25 @@
 from datetime import timedelta
 
 DOMAIN = "tuya_local"
+DATA_SETTINGS = f"{DOMAIN}_settings"
+EVENT_DPS_CHANGED = f"{DOMAIN}_dps_changed"
+EVENT_BATCH_COMPLETE = f"{DOMAIN}_batch_complete"
 
 CONF_DEVICE_ID = "device_id"
 CONF_LOCAL_KEY = "local_key"
 CONF_DEVICE_CID = "device_cid"
 CONF_TYPE = "type"
+CONF_PROFILE_STARTUP = "profile_startup"
+CONF_STARTUP_CONCURRENCY = "startup_concurrency"
+CONF_STARTUP_TIMEOUT = "startup_timeout"
+CONF_POLL_INTERVAL_MIN = "poll_interval_min"
+CONF_POLL_INTERVAL_MAX = "poll_interval_max"
+CONF_DPS_CHANGED_EVENTS = "dps_changed_events"
+CONF_TRANSITION_FRAME_RATE = "transition_frame_rate"
+CONF_RECORD_TRAFFIC = "record_traffic"
+CONF_DEBUG_TRACE = "debug_trace"
+CONF_AGGREGATE_SENSORS = "aggregate_sensors"
+CONF_AGGREGATION_WINDOW = "aggregation_window"
+CONF_ENERGY_SENSORS = "energy_sensors"
+CONF_INTENT_TTL = "intent_ttl"
 API_PROTOCOL_VERSIONS = [3.3, 3.1, 3.2, 3.4]
@@ -2,32 +2,75 @@
 API for Tuya Local devices.
 """
 
-import json
 import logging
 import tinytuya
 from threading import Lock, Timer
 from time import time
 
 
-from homeassistant.const import CONF_HOST, CONF_NAME, UnitOfTemperature
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    CONF_HOST,
+    CONF_NAME,
+    EVENT_HOMEASSISTANT_STOP,
+    UnitOfTemperature,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
 
 from .const import (
     API_PROTOCOL_VERSIONS,
+    CONF_AGGREGATE_SENSORS,
+    CONF_AGGREGATION_WINDOW,
+    CONF_DEBUG_TRACE,
     CONF_DEVICE_ID,
+    CONF_DPS_CHANGED_EVENTS,
+    CONF_INTENT_TTL,
     CONF_LOCAL_KEY,
+    CONF_POLL_INTERVAL_MAX,
+    CONF_POLL_INTERVAL_MIN,
+    CONF_RECORD_TRAFFIC,
+    DATA_SETTINGS,
     DOMAIN,
+    EVENT_DPS_CHANGED,
     CONF_DEVICE_CID,
 )
+from .helpers import recording, tracing
+from .helpers.aggregation import DEFAULT_AGGREGATION_WINDOW, SensorAggregator
 from .helpers.config import get_device_id
-from .helpers.device_config import possible_matches
+from .helpers.detection import async_rank_matches
+from .helpers.energy import ENERGY_SENSOR_ID
+from .helpers.intents import DEFAULT_INTENT_TTL, IntentQueue
+from .helpers.polling import (
+    DEFAULT_POLL_INTERVAL_MAX,
+    DEFAULT_POLL_INTERVAL_MIN,
+    POLL_FAST,
+    AdaptivePollInterval,
+    full_refresh_age,
+)
+from .helpers.profiling import FIRST_REFRESH
+from .helpers.state import StateStore
 
 
 _LOGGER = logging.getLogger(__name__)
 
 
 class TuyaLocalDevice(object):
-    def __init__(self, name, dev_id, address, local_key, cid, hass: HomeAssistant):
+    def __init__(
+        self,
+        name,
+        dev_id,
+        address,
+        local_key,
+        cid,
+        hass: HomeAssistant,
+        poll_interval_min=DEFAULT_POLL_INTERVAL_MIN,
+        poll_interval_max=DEFAULT_POLL_INTERVAL_MAX,
+        dps_changed_events=False,
+        recorder=None,
+        trace=None,
+        aggregation_window=None,
+        intent_ttl=DEFAULT_INTENT_TTL,
+    ):
         """
         Represents a Tuya-based device.
 
@@ -36,6 +79,16 @@ class TuyaLocalDevice(object):
             address (str): The network address.
             local_key (str): The encryption key.
             cid (str): The sub device id.
+            poll_interval_min (float): The shortest time between polls.
+            poll_interval_max (float): The longest time between polls.
+            dps_changed_events (bool): Fire an event on the bus when dps change.
+            recorder (TrafficRecorder): Records the traffic with the device.
+            trace (DeviceTrace): Keeps the recent events of the device.
+            aggregation_window (float): If given, sample the device at the
+                shortest poll interval, and publish aggregated sensor dps
+                once per this many seconds.
+            intent_ttl (float): How long to keep trying to send a value
+                that the device did not accept.
         """
         self._name = name
         self._api_protocol_version_index = None
@@ -51,8 +104,38 @@ class TuyaLocalDevice(object):
         self._api = tinytuya.Device(tuya_device_id, address, local_key, cid, parent)
         self.cid = cid
         self._refresh_task = None
+        # Set by the integration setup when startup profiling is enabled
+        self.startup_timeline = None
+        self._poll = AdaptivePollInterval(poll_interval_min, poll_interval_max)
+        self._aggregator = None
+        self._aggregates = {}
+        if aggregation_window:
+            self._poll = AdaptivePollInterval(poll_interval_min, poll_interval_min)
+            self._aggregator = SensorAggregator(aggregation_window, time())
+        # Values set on the device that it has not accepted yet
+        self._intents = IntentQueue(intent_ttl)
+        # Integrates the power readings into energy, if enabled
+        self.energy_meter = None
+        self._last_written_energy = None
+        self._poll_cancel = None
+        self._stop_listener = None
+        self._polling_stopped = False
+        # Registered entities, with the dp ids they depend on
+        self._children = []
+        self._last_written_state = {}
+        self._last_confirmed_state = {}
+        self._dps_listeners = []
+        self._dps_changed_events = dps_changed_events
+        self._fast_dps = []
+        self._full_refresh_age = 0
+        self._updatedps_supported = True
+        self._recorder = recorder
+        self._trace = trace if trace is not None else tracing.NULL_TRACE
         self._rotate_api_protocol_version()
 
+        # The cached and pending state are published as immutable versions
+        # by the threads that talk to the device, and read without locking.
+        self._state = StateStore()
         self._reset_cached_state()
 
         self._TEMPERATURE_UNIT = UnitOfTemperature.CELSIUS
@@ -69,6 +152,28 @@ class TuyaLocalDevice(object):
         self._CACHE_TIMEOUT = 20
         self._CONNECTION_ATTEMPTS = 9
         self._lock = Lock()
+        self._send_lock = Lock()
+
+    @property
+    def _cached_state(self):
+        return self._state.current.dps
+
+    @_cached_state.setter
+    def _cached_state(self, dps):
+        self._state.replace(dps=dps)
+
+    @property
+    def _pending_updates(self):
+        return self._state.current.pending
+
+    @_pending_updates.setter
+    def _pending_updates(self, pending):
+        self._state.replace(pending=pending)
+
+    @property
+    def state_version(self):
+        """Return the current version of the state, replaced when it changes."""
+        return self._state.current
 
     @property
     def name(self):
@@ -97,34 +202,130 @@ class TuyaLocalDevice(object):
     def temperature_unit(self):
         return self._TEMPERATURE_UNIT
 
-    async def async_possible_types(self):
+    @property
+    def trace(self):
+        """Return the trace of recent events, or None if not tracing."""
+        return self._trace if self._trace.enabled else None
+
+    @property
+    def poll_interval(self):
+        """Return the adaptive poll interval for this device."""
+        return self._poll
+
+    def register_entity(self, entity, dps=None):
+        """
+        Register an entity to be updated when any of the dp ids in dps
+        change, or on every update if dps is None.
+        """
+        start_polling = not self._children
+        self._children.append((entity, None if dps is None else frozenset(dps)))
+        if start_polling:
+            self._schedule_poll()
+            if self._stop_listener is None:
+                self._stop_listener = self._hass.bus.async_listen_once(
+                    EVENT_HOMEASSISTANT_STOP, self._async_on_stop
+                )
+
+    def unregister_entity(self, entity):
+        """Stop updating an entity, and stop polling if it was the last."""
+        self._children = [c for c in self._children if c[0] is not entity]
+        if not self._children:
+            self._cancel_polling()
+
+    @callback
+    def async_stop_polling(self):
+        """Stop polling for good, when the device is removed."""
+        self._polling_stopped = True
+        self._cancel_polling()
+
+    @callback
+    def async_close(self):
+        """Stop polling and close the traffic recording, if any."""
+        self.async_stop_polling()
+        if self._recorder is not None:
+            self._recorder.close()
+
+    @callback
+    def _async_on_stop(self, event):
+        # The listener is removed once it has been called
+        self._stop_listener = None
+        self.async_close()
+
+    def _cancel_polling(self):
+        if self._poll_cancel is not None:
+            self._poll_cancel()
+            self._poll_cancel = None
+        if self._stop_listener is not None:
+            self._stop_listener()
+            self._stop_listener = None
+
+    def set_poll_classes(self, poll_classes):
+        """
+        Set the poll class of each dp, so that fast changing dps can be
+        refreshed without re-reading the full status every poll.
+        """
+        self._fast_dps = sorted(
+            int(dp) for dp, cls in poll_classes.items() if cls == POLL_FAST
+        )
+        self._full_refresh_age = full_refresh_age(poll_classes)
+
+    def aggregate_dps(self, dps_id):
+        """
+        Publish changes to dps_id once per aggregation window, rather than
+        on every refresh, if the device aggregates sensors.
+        Returns True if it does.
+        """
+        if self._aggregator is None:
+            return False
+        self._aggregator.watch(dps_id)
+        return True
+
+    def aggregate(self, dps_id):
+        """
+        Return the summary of the raw values of dps_id over the last
+        aggregation window, or None if there is none yet.
+        """
+        return self._aggregates.get(dps_id)
+
+    @callback
+    def async_add_dps_listener(self, listener, dps=None):
+        """
+        Call listener with a dict of dp id to (old, new) values whenever
+        any of the dp ids in dps change, or any dp if dps is None.
+        Returns a function to remove the listener.
+        """
+        entry = (listener, None if dps is None else frozenset(dps))
+        self._dps_listeners.append(entry)
+
+        @callback
+        def remove_listener():
+            if entry in self._dps_listeners:
+                self._dps_listeners.remove(entry)
+
+        return remove_listener
+
+    async def async_ranked_types(self, limit=None):
+        """
+        Return the configs that match the device, best first, as a list of
+        (quality, config), up to limit of them.
+        """
         cached_state = self._get_cached_state()
         if len(cached_state) <= 1:
             await self.async_refresh()
             cached_state = self._get_cached_state()
 
-        for match in possible_matches(cached_state):
-            yield match
+        return await async_rank_matches(self._hass, cached_state, limit)
 
     async def async_inferred_type(self):
-        best_match = None
-        best_quality = 0
-        cached_state = {}
-        async for config in self.async_possible_types():
+        ranked = await self.async_ranked_types(limit=1)
+        if not ranked or ranked[0][0] == 0:
             cached_state = self._get_cached_state()
-            quality = config.match_quality(cached_state)
-            _LOGGER.info(
-                f"{self.name} considering {config.name} with quality {quality}"
-            )
-            if quality > best_quality:
-                best_quality = quality
-                best_match = config
-
-        if best_match is None:
             _LOGGER.warning(f"Detection for {self.name} with dps {cached_state} failed")
             return None
 
-        return best_match.config_type
+        quality, config = ranked[0]
+        _LOGGER.info(f"{self.name} detected as {config.name} with quality {quality}")
+        return config.config_type
 
     async def async_refresh(self):
         cache = self._get_cached_state()
@@ -134,33 +335,202 @@ class TuyaLocalDevice(object):
             last_updated = 0
 
         if self._refresh_task is None or time() - last_updated >= self._CACHE_TIMEOUT:
-            self._cached_state["updated_at"] = time()
-            self._refresh_task = self._hass.async_add_executor_job(self.refresh)
+            await self._async_start_refresh(self.refresh)
+        else:
+            await self._refresh_task
+
+    async def async_startup_refresh(self, timeout):
+        """
+        Refresh the device for the first time at startup.
+        A short timeout and a single attempt per protocol version are used,
+        so that unreachable devices do not hold up others.
+        Returns True if the device returned its state.
+        """
+        await self._async_start_refresh(self._startup_refresh, timeout)
+        return self.has_returned_state
+
+    async def _async_start_refresh(self, target, *args):
+        """
+        Run a refresh in the executor and wait for it, timing it if it is
+        the first, then update the registered entities.
+        """
+        self._state.touch(time())
+        self._refresh_task = self._hass.async_add_executor_job(target, *args)
+        timeline = self.startup_timeline
+        if timeline is None:
+            await self._refresh_task
+        else:
+            self.startup_timeline = None
+            with timeline.phase(FIRST_REFRESH):
+                await self._refresh_task
+        self._async_update_entities()
+
+    @callback
+    def _schedule_poll(self):
+        if self._poll_cancel is not None:
+            self._poll_cancel()
+            self._poll_cancel = None
+        if self._polling_stopped:
+            return
+        self._poll_cancel = async_call_later(
+            self._hass, self._poll.interval, self._async_poll
+        )
 
-        await self._refresh_task
+    async def _async_poll(self, now=None):
+        """Refresh the device, then schedule the next poll."""
+        self._poll_cancel = None
+        try:
+            if self._refresh_task is not None and not self._refresh_task.done():
+                await self._refresh_task
+            else:
+                await self._async_start_refresh(self.refresh)
+        finally:
+            if self._children and not self._polling_stopped:
+                self._schedule_poll()
+
+    @callback
+    def _async_boost_polling(self):
+        """Poll at the shortest interval for a while after a command."""
+        self._poll.boost()
+        if self._poll_cancel is not None:
+            self._schedule_poll()
+
+    @callback
+    def _async_update_entities(self):
+        """
+        Write state for the entities that depend on dps that changed since
+        the last update, or all of them if the device availability changed.
+        The energy sensor, registered under ENERGY_SENSOR_ID, is written
+        whenever the energy used has increased, even if the power has not
+        changed.  Changes the device has confirmed while it is available are
+        also passed to dps listeners, and fired as an event if enabled.
+        """
+        state = self._get_cached_state()
+        state.pop("updated_at", None)
+        last = self._last_written_state
+        self._last_written_state = state
+        changed = {k for k in state.keys() | last.keys() if state.get(k) != last.get(k)}
+        written = changed
+        aggregator = self._aggregator
+        if aggregator is not None and aggregator.watched:
+            now = time()
+            if aggregator.due(now):
+                self._aggregates = aggregator.close(now)
+                written = changed | aggregator.watched
+            else:
+                written = changed - aggregator.watched
+        meter = self.energy_meter
+        if meter is not None and meter.total != self._last_written_energy:
+            self._last_written_energy = meter.total
+            written = written | {ENERGY_SENSOR_ID}
+        availability_changed = changed and (not last or not state)
+        if availability_changed or written:
+            for entity, dps in self._children:
+                if availability_changed or dps is None or not dps.isdisjoint(written):
+                    entity.async_write_ha_state()
+        self._async_notify_confirmed_changes()
+
+    @callback
+    def _async_notify_confirmed_changes(self):
+        """
+        Notify the changes in the dps the device has returned since the last
+        update.  Pending values are left out, as the device may not accept
+        them, so a value set is notified once the device reports it.
+        """
+        state = dict(self._state.current.dps)
+        state.pop("updated_at", None)
+        last = self._last_confirmed_state
+        self._last_confirmed_state = state
+        if not last or not state:
+            return
+        changes = {
+            k: (last.get(k), state.get(k))
+            for k in state.keys() | last.keys()
+            if state.get(k) != last.get(k)
+        }
+        if changes:
+            self._async_notify_dps_changed(changes)
+
+    @callback
+    def _async_notify_dps_changed(self, changes):
+        for listener, dps in list(self._dps_listeners):
+            if dps is None:
+                listener(changes)
+            elif not dps.isdisjoint(changes):
+                listener({k: v for k, v in changes.items() if k in dps})
+        if self._dps_changed_events:
+            self._hass.bus.async_fire(
+                EVENT_DPS_CHANGED,
+                {
+                    "device_id": self.unique_id,
+                    "name": self.name,
+                    "changes": {
+                        k: {"old": old, "new": new} for k, (old, new) in changes.items()
+                    },
+                },
+            )
 
     def refresh(self):
-        _LOGGER.debug(f"Refreshing device state for {self.name}.")
-        self._retry_on_failed_connection(
-            lambda: self._refresh_cached_state(),
+        if self._full_refresh_due():
+            _LOGGER.debug(f"Refreshing device state for {self.name}.")
+            refresh = self._refresh_cached_state
+        else:
+            _LOGGER.debug(f"Refreshing fast changing dps for {self.name}.")
+            refresh = self._refresh_fast_dps
+        responded = self._retry_on_failed_connection(
+            refresh,
             f"Failed to refresh device state for {self.name}.",
         )
+        if responded and self._intents.stalled:
+            _LOGGER.info(f"Resending updates to {self.name} now it has responded.")
+            self._send_intents()
+
+    def _full_refresh_due(self):
+        if not self._fast_dps or not self._updatedps_supported:
+            return True
+        return time() - self._last_full_refresh >= self._full_refresh_age
+
+    def _startup_refresh(self, timeout):
+        _LOGGER.debug(f"Refreshing device state for {self.name} at startup.")
+        connection_timeout = self._api.connection_timeout
+        retry_limit = self._api.socketRetryLimit
+        try:
+            self._api.set_socketTimeout(timeout)
+            self._api.set_socketRetryLimit(1)
+            self._retry_on_failed_connection(
+                lambda: self._refresh_cached_state(),
+                f"Failed to refresh device state for {self.name} at startup.",
+                len(API_PROTOCOL_VERSIONS),
+            )
+        finally:
+            self._api.set_socketTimeout(connection_timeout)
+            self._api.set_socketRetryLimit(retry_limit)
 
     def get_property(self, dps_id):
-        cached_state = self._get_cached_state()
-        if dps_id in cached_state:
-            return cached_state[dps_id]
-        else:
-            return None
+        return self._state.current.get(
+            dps_id, time(), self._FAKE_IT_TIL_YOU_MAKE_IT_TIMEOUT
+        )
 
     def set_property(self, dps_id, value):
         self._set_properties({dps_id: value})
 
     async def async_set_property(self, dps_id, value):
         await self._hass.async_add_executor_job(self.set_property, dps_id, value)
+        self._async_update_entities()
 
     async def async_set_properties(self, dps_map):
         await self._hass.async_add_executor_job(self._set_properties, dps_map)
+        self._async_update_entities()
+
+    async def async_send_properties(self, dps_map):
+        """
+        Send dps to the device straight away, without waiting to combine
+        them with other updates, for streaming a series of changes.
+        Returns True if the device accepted them.
+        """
+        sent = await self._hass.async_add_executor_job(self._send_properties, dps_map)
+        self._async_update_entities()
+        return sent
 
     def anticipate_property_value(self, dps_id, value):
         """
@@ -169,21 +539,50 @@ class TuyaLocalDevice(object):
 
         The anticipated value will be cleared with the next update.
         """
-        self._cached_state[dps_id] = value
+        self._state.set_value(dps_id, value)
 
     def _reset_cached_state(self):
-        self._cached_state = {"updated_at": 0}
-        self._pending_updates = {}
+        self._state.reset()
+        if self.energy_meter is not None:
+            self.energy_meter.interrupt()
         self._last_connection = 0
+        self._last_full_refresh = 0
 
     def _refresh_cached_state(self):
         new_state = self._api.status()
-        self._cached_state = self._cached_state | new_state["dps"]
-        self._cached_state["updated_at"] = time()
-        _LOGGER.debug(f"{self.name} refreshed device state: {json.dumps(new_state)}")
-        _LOGGER.debug(
-            f"new cache state (including pending properties): {json.dumps(self._get_cached_state())}"
-        )
+        if self._recorder is not None:
+            self._recorder.record(recording.STATUS, new_state)
+        self._last_full_refresh = self._merge_dps(new_state["dps"])
+        self._trace.record(tracing.REFRESH, dps=new_state["dps"])
+
+    def _refresh_fast_dps(self):
+        new_state = self._api.updatedps(self._fast_dps)
+        if self._recorder is not None:
+            self._recorder.record(recording.UPDATEDPS, new_state)
+        if not new_state or "dps" not in new_state:
+            if not new_state or "Err" not in new_state:
+                _LOGGER.info(
+                    f"{self.name} did not return dps when asked to update "
+                    f"{self._fast_dps}, falling back to full status queries."
+                )
+                self._updatedps_supported = False
+            self._refresh_cached_state()
+            return
+        self._merge_dps(new_state["dps"])
+        self._trace.record(tracing.REFRESH, dps=new_state["dps"], fast=True)
+
+    def _merge_dps(self, dps):
+        """Merge dps into the cached state, returning the time they were merged."""
+        now = time()
+        previous = self._state.merge(dps, now).dps
+        if self._aggregator is not None:
+            self._aggregator.add(dps, now)
+        meter = self.energy_meter
+        if meter is not None and meter.dps_id in dps:
+            meter.add(dps[meter.dps_id], now)
+        if len(previous) > 1:
+            self._poll.observe(any(previous.get(k) != v for k, v in dps.items()))
+        return now
 
     def _set_properties(self, properties):
         if len(properties) == 0:
@@ -192,16 +591,22 @@ class TuyaLocalDevice(object):
         self._add_properties_to_pending_updates(properties)
         self._debounce_sending_updates()
 
+    def _send_properties(self, properties):
+        if len(properties) == 0:
+            return True
+
+        self._add_properties_to_pending_updates(properties)
+        return self._send_intents()
+
     def _add_properties_to_pending_updates(self, properties):
+        self._get_pending_updates()
         now = time()
+        self._state.add_pending(properties, now)
+        self._intents.put(properties, now)
 
-        pending_updates = self._get_pending_updates()
-        for key, value in properties.items():
-            pending_updates[key] = {"value": value, "updated_at": now}
-
-        _LOGGER.debug(
-            f"{self.name} new pending updates: {json.dumps(self._pending_updates)}"
-        )
+    def intent_metrics(self):
+        """Return the depth and age of the queue of values to send."""
+        return self._intents.metrics(time())
 
     def _debounce_sending_updates(self):
         now = time()
@@ -222,59 +627,82 @@ class TuyaLocalDevice(object):
         self._debounce.start()
 
     def _send_pending_updates(self):
-        pending_properties = self._get_pending_properties()
-        payload = self._api.generate_payload(tinytuya.CONTROL, pending_properties)
+        self._send_intents()
 
-        _LOGGER.debug(
-            f"{self.name} sending dps update: {json.dumps(pending_properties)}"
-        )
-
-        self._retry_on_failed_connection(
-            lambda: self._send_payload(payload), "Failed to update device state."
-        )
+    def _send_intents(self):
+        """
+        Send the values queued for the device.  Values the device does not
+        accept stay queued, to be sent again once it responds, until they
+        expire.  Returns True if the device accepted them.
+        """
+        # The debounce timer and a refresh after the device responds again
+        # can both send, so only one sends the queue at a time.
+        with self._send_lock:
+            expired = self._intents.expire(time())
+            if expired:
+                _LOGGER.warning(f"Gave up sending {expired} to {self.name}.")
+                self._trace.record(tracing.INTENT_EXPIRY, dps=expired)
+            intents = self._intents.values()
+            if not intents:
+                return True
+            # Show the values as pending again, in case they were reset
+            self._state.add_pending(intents, time())
+            if self._recorder is not None:
+                self._recorder.record(recording.CONTROL, intents)
+            self._trace.record(tracing.SEND, dps=intents)
+            payload = self._api.generate_payload(tinytuya.CONTROL, intents)
+
+            if self._retry_on_failed_connection(
+                lambda: self._send_payload(payload), "Failed to update device state."
+            ):
+                self._intents.sent(intents)
+                return True
+            self._intents.failed()
+            return False
 
     def _send_payload(self, payload):
         try:
             self._lock.acquire()
-            self._api._send_receive(payload)
-            self._cached_state["updated_at"] = 0
+            reply = self._api._send_receive(payload)
+            if reply and self._recorder is not None:
+                self._recorder.record(recording.REPLY, reply)
+            self._last_full_refresh = 0
             now = time()
             self._last_connection = now
-            pending_updates = self._get_pending_updates()
-            for key, value in pending_updates.items():
-                pending_updates[key]["updated_at"] = now
+            self._get_pending_updates()
+            self._state.mark_sent(now)
         finally:
             self._lock.release()
+        self._hass.loop.call_soon_threadsafe(self._async_boost_polling)
 
-    def _retry_on_failed_connection(self, func, error_message):
-        for i in range(self._CONNECTION_ATTEMPTS):
+    def _retry_on_failed_connection(self, func, error_message, attempts=None):
+        if attempts is None:
+            attempts = self._CONNECTION_ATTEMPTS
+        for i in range(attempts):
             try:
                 func()
                 self._api_protocol_working = True
-                break
+                return True
             except Exception as e:
                 _LOGGER.debug(f"Retrying after exception {e}")
-                if i + 1 == self._CONNECTION_ATTEMPTS:
+                self._trace.record(tracing.RETRY, attempt=i + 1, error=str(e))
+                if i + 1 == attempts:
                     self._reset_cached_state()
                     self._api_protocol_working = False
                     _LOGGER.error(error_message)
                 if not self._api_protocol_working:
                     self._rotate_api_protocol_version()
+        return False
 
     def _get_cached_state(self):
-        cached_state = self._cached_state.copy()
-        return {**cached_state, **self._get_pending_properties()}
-
-    def _get_pending_properties(self):
-        return {key: info["value"] for key, info in self._get_pending_updates().items()}
+        return self._state.current.merged(time(), self._FAKE_IT_TIL_YOU_MAKE_IT_TIMEOUT)
 
     def _get_pending_updates(self):
-        now = time()
-        self._pending_updates = {
-            key: value
-            for key, value in self._pending_updates.items()
-            if now - value["updated_at"] < self._FAKE_IT_TIL_YOU_MAKE_IT_TIMEOUT
-        }
+        expired = self._state.expire_pending(
+            time(), self._FAKE_IT_TIL_YOU_MAKE_IT_TIMEOUT
+        )
+        if expired:
+            self._trace.record(tracing.PENDING_EXPIRY, dps=expired)
         return self._pending_updates
 
     def _rotate_api_protocol_version(self):
@@ -289,6 +717,7 @@ class TuyaLocalDevice(object):
         new_version = API_PROTOCOL_VERSIONS[self._api_protocol_version_index]
         _LOGGER.info(f"Setting protocol version for {self.name} to {new_version}.")
         self._api.set_version(new_version)
+        self._trace.record(tracing.ROTATION, version=new_version)
 
     @staticmethod
     def get_key_for_value(obj, value, fallback=None):
@@ -302,6 +731,20 @@ def setup_device(hass: HomeAssistant, config: dict):
 
     _LOGGER.info(f"Creating device: {get_device_id(config)}")
     hass.data[DOMAIN] = hass.data.get(DOMAIN, {})
+    settings = hass.data.get(DATA_SETTINGS, {})
+    recorder = None
+    if get_device_id(config) in settings.get(CONF_RECORD_TRAFFIC, []):
+        path = hass.config.path(DOMAIN, "recordings", f"{get_device_id(config)}.jsonl")
+        _LOGGER.info(f"Recording traffic with {get_device_id(config)} to {path}")
+        recorder = recording.TrafficRecorder(path)
+    trace = None
+    if get_device_id(config) in settings.get(CONF_DEBUG_TRACE, []):
+        trace = tracing.DeviceTrace()
+    aggregation_window = None
+    if get_device_id(config) in settings.get(CONF_AGGREGATE_SENSORS, []):
+        aggregation_window = settings.get(
+            CONF_AGGREGATION_WINDOW, DEFAULT_AGGREGATION_WINDOW
+        )
     device = TuyaLocalDevice(
         config[CONF_NAME],
         config[CONF_DEVICE_ID],
@@ -309,6 +752,13 @@ def setup_device(hass: HomeAssistant, config: dict):
         config[CONF_LOCAL_KEY],
         config[CONF_DEVICE_CID] if CONF_DEVICE_CID in config else None,
         hass,
+        settings.get(CONF_POLL_INTERVAL_MIN, DEFAULT_POLL_INTERVAL_MIN),
+        settings.get(CONF_POLL_INTERVAL_MAX, DEFAULT_POLL_INTERVAL_MAX),
+        settings.get(CONF_DPS_CHANGED_EVENTS, False),
+        recorder,
+        trace,
+        aggregation_window,
+        settings.get(CONF_INTENT_TTL, DEFAULT_INTENT_TTL),
     )
     hass.data[DOMAIN][get_device_id(config)] = {"device": device}
 
@@ -317,4 +767,5 @@ def setup_device(hass: HomeAssistant, config: dict):
 def delete_device(hass: HomeAssistant, config: dict):
     device_id = get_device_id(config)
     _LOGGER.info(f"Deleting device: {device_id}")
+    hass.data[DOMAIN][device_id]["device"].async_close()
     del hass.data[DOMAIN][device_id]["device"]
@@ -11,6 +11,7 @@ from homeassistant.helpers.device_registry import DeviceEntry
 
 from .const import DOMAIN
 from .device import TuyaLocalDevice
+from .helpers.profiling import get_profiler
 
 
 async def async_get_config_entry_diagnostics(
@@ -47,6 +48,12 @@ def _async_get_diagnostics(
     # TODO: investigate what device entry holds
     data |= _async_device_as_dict(hass, hass_data["device"])
 
+    profiler = get_profiler(hass)
+    timeline = profiler.get(entry.entry_id)
+    if timeline:
+        data["startup_profile"] = timeline.as_dict()
+        data["startup_summary"] = profiler.summary()
+
     return data
 
 
@@ -61,9 +68,13 @@ def _async_device_as_dict(
         "name": device.name,
         "api_version": device._api.version,
         "status": device._api.dps_cache,
-        "cached_state": device._cached_state,
-        "pending_state": device._pending_updates,
+        "cached_state": device._cached_state.copy(),
+        "pending_state": device._pending_updates.copy(),
+        "poll_interval": device.poll_interval.as_dict(),
+        "intents": device.intent_metrics(),
     }
+    if device.trace is not None:
+        data["trace"] = device.trace.as_list()
 
     device_registry = dr.async_get(hass)
     entity_registry = er.async_get(hass)
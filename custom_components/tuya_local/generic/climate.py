@@ -103,7 +103,7 @@ class TuyaLocalClimate(TuyaLocalEntity, ClimateEntity):
         """Return the unit of measurement."""
         # If there is a separate DPS that returns the units, use that
         if self._unit_dps is not None:
-            unit = validate_temp_unit(self._unit_dps.get_value(self._device))
+            unit = validate_temp_unit(self._resolve().get(self._unit_dps))
             # Only return valid units
             if unit is not None:
                 return unit
@@ -120,21 +120,21 @@ class TuyaLocalClimate(TuyaLocalEntity, ClimateEntity):
         """Return the currently set target temperature."""
         if self._temperature_dps is None:
             raise NotImplementedError()
-        return self._temperature_dps.get_value(self._device)
+        return self._resolve().get(self._temperature_dps)
 
     @property
     def target_temperature_high(self):
         """Return the currently set high target temperature."""
         if self._temp_high_dps is None:
             raise NotImplementedError()
-        return self._temp_high_dps.get_value(self._device)
+        return self._resolve().get(self._temp_high_dps)
 
     @property
     def target_temperature_low(self):
         """Return the currently set low target temperature."""
         if self._temp_low_dps is None:
             raise NotImplementedError()
-        return self._temp_low_dps.get_value(self._device)
+        return self._resolve().get(self._temp_low_dps)
 
     @property
     def target_temperature_step(self):
@@ -146,21 +146,21 @@ class TuyaLocalClimate(TuyaLocalEntity, ClimateEntity):
             dps = self._temp_low_dps
         if dps is None:
             return 1
-        return dps.step(self._device)
+        return self._resolve().step(dps)
 
     @property
     def min_temp(self):
         """Return the minimum supported target temperature."""
         # if a separate min_temperature dps is specified, the device tells us.
         if self._mintemp_dps is not None:
-            return self._mintemp_dps.get_value(self._device)
+            return self._resolve().get(self._mintemp_dps)
 
         if self._temperature_dps is None:
             if self._temp_low_dps is None:
                 return None
-            r = self._temp_low_dps.range(self._device)
+            r = self._resolve().range(self._temp_low_dps)
         else:
-            r = self._temperature_dps.range(self._device)
+            r = self._resolve().range(self._temperature_dps)
         return DEFAULT_MIN_TEMP if r is None else r["min"]
 
     @property
@@ -168,14 +168,14 @@ class TuyaLocalClimate(TuyaLocalEntity, ClimateEntity):
         """Return the maximum supported target temperature."""
         # if a separate max_temperature dps is specified, the device tells us.
         if self._maxtemp_dps is not None:
-            return self._maxtemp_dps.get_value(self._device)
+            return self._resolve().get(self._maxtemp_dps)
 
         if self._temperature_dps is None:
             if self._temp_high_dps is None:
                 return None
-            r = self._temp_high_dps.range(self._device)
+            r = self._resolve().range(self._temp_high_dps)
         else:
-            r = self._temperature_dps.range(self._device)
+            r = self._resolve().range(self._temperature_dps)
         return DEFAULT_MAX_TEMP if r is None else r["max"]
 
     async def async_set_temperature(self, **kwargs):
@@ -210,21 +210,21 @@ class TuyaLocalClimate(TuyaLocalEntity, ClimateEntity):
         """Return the current measured temperature."""
         if self._current_temperature_dps is None:
             return None
-        return self._current_temperature_dps.get_value(self._device)
+        return self._resolve().get(self._current_temperature_dps)
 
     @property
     def target_humidity(self):
         """Return the currently set target humidity."""
         if self._humidity_dps is None:
             raise NotImplementedError()
-        return self._humidity_dps.get_value(self._device)
+        return self._resolve().get(self._humidity_dps)
 
     @property
     def min_humidity(self):
         """Return the minimum supported target humidity."""
         if self._humidity_dps is None:
             return None
-        r = self._humidity_dps.range(self._device)
+        r = self._resolve().range(self._humidity_dps)
         return DEFAULT_MIN_HUMIDITY if r is None else r["min"]
 
     @property
@@ -232,7 +232,7 @@ class TuyaLocalClimate(TuyaLocalEntity, ClimateEntity):
         """Return the maximum supported target humidity."""
         if self._humidity_dps is None:
             return None
-        r = self._humidity_dps.range(self._device)
+        r = self._resolve().range(self._humidity_dps)
         return DEFAULT_MAX_HUMIDITY if r is None else r["max"]
 
     async def async_set_humidity(self, humidity: int):
@@ -246,14 +246,14 @@ class TuyaLocalClimate(TuyaLocalEntity, ClimateEntity):
         """Return the current measured humidity."""
         if self._current_humidity_dps is None:
             return None
-        return self._current_humidity_dps.get_value(self._device)
+        return self._resolve().get(self._current_humidity_dps)
 
     @property
     def hvac_action(self):
         """Return the current HVAC action."""
         if self._hvac_action_dps is None:
             return None
-        action = self._hvac_action_dps.get_value(self._device)
+        action = self._resolve().get(self._hvac_action_dps)
         try:
             return HVACAction(action)
         except ValueError:
@@ -265,7 +265,7 @@ class TuyaLocalClimate(TuyaLocalEntity, ClimateEntity):
         """Return current HVAC mode."""
         if self._hvac_mode_dps is None:
             return HVACMode.AUTO
-        hvac_mode = self._hvac_mode_dps.get_value(self._device)
+        hvac_mode = self._resolve().get(self._hvac_mode_dps)
         try:
             return HVACMode(hvac_mode)
         except ValueError:
@@ -278,7 +278,7 @@ class TuyaLocalClimate(TuyaLocalEntity, ClimateEntity):
         if self._hvac_mode_dps is None:
             return []
         else:
-            return self._hvac_mode_dps.values(self._device)
+            return self._resolve().values(self._hvac_mode_dps)
 
     async def async_set_hvac_mode(self, hvac_mode):
         """Set new HVAC mode."""
@@ -310,7 +310,7 @@ class TuyaLocalClimate(TuyaLocalEntity, ClimateEntity):
         if self._aux_heat_dps is None:
             return None
         else:
-            return self._aux_heat_dps.get_value(self._device)
+            return self._resolve().get(self._aux_heat_dps)
 
     async def async_turn_aux_heat_on(self):
         """Turn on aux heater."""
@@ -329,14 +329,14 @@ class TuyaLocalClimate(TuyaLocalEntity, ClimateEntity):
         """Return the current preset mode."""
         if self._preset_mode_dps is None:
             raise NotImplementedError()
-        return self._preset_mode_dps.get_value(self._device)
+        return self._resolve().get(self._preset_mode_dps)
 
     @property
     def preset_modes(self):
         """Return the list of presets that this device supports."""
         if self._preset_mode_dps is None:
             return None
-        return self._preset_mode_dps.values(self._device)
+        return self._resolve().values(self._preset_mode_dps)
 
     async def async_set_preset_mode(self, preset_mode):
         """Set the preset mode."""
@@ -349,14 +349,14 @@ class TuyaLocalClimate(TuyaLocalEntity, ClimateEntity):
         """Return the current swing mode."""
         if self._swing_mode_dps is None:
             raise NotImplementedError()
-        return self._swing_mode_dps.get_value(self._device)
+        return self._resolve().get(self._swing_mode_dps)
 
     @property
     def swing_modes(self):
         """Return the list of swing modes that this device supports."""
         if self._swing_mode_dps is None:
             return None
-        return self._swing_mode_dps.values(self._device)
+        return self._resolve().values(self._swing_mode_dps)
 
     async def async_set_swing_mode(self, swing_mode):
         """Set the preset mode."""
@@ -369,14 +369,14 @@ class TuyaLocalClimate(TuyaLocalEntity, ClimateEntity):
         """Return the current fan mode."""
         if self._fan_mode_dps is None:
             raise NotImplementedError()
-        return self._fan_mode_dps.get_value(self._device)
+        return self._resolve().get(self._fan_mode_dps)
 
     @property
     def fan_modes(self):
         """Return the list of fan modes that this device supports."""
         if self._fan_mode_dps is None:
             return None
-        return self._fan_mode_dps.values(self._device)
+        return self._resolve().values(self._fan_mode_dps)
 
     async def async_set_fan_mode(self, fan_mode):
         """Set the fan mode."""
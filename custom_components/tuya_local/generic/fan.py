@@ -80,18 +80,20 @@ class TuyaLocalFan(TuyaLocalEntity, FanEntity):
         """Return the step for percentage."""
         if self._speed_dps is None:
             return None
-        if self._speed_dps.values(self._device) is None:
+        values = self._speed_dps.cached_values(self._device)
+        if values is None:
             return self._speed_dps.step(self._device)
         else:
-            return 100 / len(self._speed_dps.values(self._device))
+            return 100 / len(values)
 
     @property
     def speed_count(self):
         """Return the number of speeds supported by the fan."""
         if self._speed_dps is None:
             return 0
-        if self._speed_dps.values(self._device) is not None:
-            return len(self._speed_dps.values(self._device))
+        values = self._speed_dps.cached_values(self._device)
+        if values is not None:
+            return len(values)
         return int(round(100 / self.percentage_step))
 
     async def async_set_percentage(self, percentage):
@@ -99,10 +101,7 @@ class TuyaLocalFan(TuyaLocalEntity, FanEntity):
         if self._speed_dps is None:
             return None
         # If there is a fixed list of values, snap to the closest one
-        if self._speed_dps.values(self._device) is not None:
-            percentage = min(
-                self._speed_dps.values(self._device), key=lambda x: abs(x - percentage)
-            )
+        percentage = self._speed_dps.nearest_value(self._device, percentage)
 
         await self._speed_dps.async_set_value(self._device, percentage)
 
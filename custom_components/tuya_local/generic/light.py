@@ -9,18 +9,21 @@ from homeassistant.components.light import (
     ATTR_COLOR_TEMP,
     ATTR_EFFECT,
     ATTR_RGBW_COLOR,
+    ATTR_TRANSITION,
     ColorMode,
     LightEntity,
     LightEntityFeature,
 )
-import homeassistant.util.color as color_util
 
 import logging
-from struct import pack, unpack
+from math import ceil
 
+from ..const import CONF_TRANSITION_FRAME_RATE, DATA_SETTINGS
 from ..device import TuyaLocalDevice
+from ..helpers.color import rgbhsv_codec
 from ..helpers.device_config import TuyaEntityConfig
 from ..helpers.mixin import TuyaLocalEntity
+from ..helpers.transition import DEFAULT_TRANSITION_FRAME_RATE, TransitionEngine
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -42,6 +45,10 @@ class TuyaLocalLight(TuyaLocalEntity, LightEntity):
         self._color_temp_dps = dps_map.pop("color_temp", None)
         self._rgbhsv_dps = dps_map.pop("rgbhsv", None)
         self._effect_dps = dps_map.pop("effect", None)
+        self._rgbhsv_codec = (
+            rgbhsv_codec(self._rgbhsv_dps.format) if self._rgbhsv_dps else None
+        )
+        self._transitions = None
         self._init_end(dps_map)
 
     @property
@@ -65,10 +72,12 @@ class TuyaLocalLight(TuyaLocalEntity, LightEntity):
     @property
     def supported_features(self):
         """Return the supported features for this light."""
+        features = 0
         if self.effect_list:
-            return LightEntityFeature.EFFECT
-        else:
-            return 0
+            features |= LightEntityFeature.EFFECT
+        if self._brightness_dps or self._color_temp_dps or self._rgbhsv_dps:
+            features |= LightEntityFeature.TRANSITION
+        return features
 
     @property
     def color_mode(self):
@@ -127,39 +136,8 @@ class TuyaLocalLight(TuyaLocalEntity, LightEntity):
             # can also be base64 encoded.
             # Either RGB or HSV can be used.
             color = self._rgbhsv_dps.decoded_value(self._device)
-
-            fmt = self._rgbhsv_dps.format
-            if fmt:
-                vals = unpack(fmt.get("format"), color)
-                rgbhsv = {}
-                idx = 0
-                for v in vals:
-                    # Range in HA is 0-100 for s, 0-255 for rgb and v, 0-360
-                    # for h
-                    n = fmt["names"][idx]
-                    r = fmt["ranges"][idx]
-                    if r["min"] != 0:
-                        raise AttributeError(
-                            f"Unhandled minimum range for {n} in RGBW value"
-                        )
-                    mx = r["max"]
-                    scale = 1
-                    if n == "h":
-                        scale = 360 / mx
-                    elif n == "s":
-                        scale = 100 / mx
-                    else:
-                        scale = 255 / mx
-
-                    rgbhsv[n] = round(scale * v)
-                    idx += 1
-
-                h = rgbhsv["h"]
-                s = rgbhsv["s"]
-                # convert RGB from H and S to seperate out the V component
-                r, g, b = color_util.color_hs_to_RGB(h, s)
-                w = rgbhsv["v"]
-                return (r, g, b, w)
+            if self._rgbhsv_codec:
+                return self._rgbhsv_codec.decode(color)
 
     @property
     def effect_list(self):
@@ -183,7 +161,82 @@ class TuyaLocalLight(TuyaLocalEntity, LightEntity):
             if mode and not hasattr(ColorMode, mode.upper()):
                 return mode
 
+    def _transition_engine(self):
+        """Return the engine used to stream transitions to this light."""
+        if self._transitions is None:
+            settings = self.hass.data.get(DATA_SETTINGS, {})
+            self._transitions = TransitionEngine(
+                self.hass,
+                self._device.async_send_properties,
+                settings.get(CONF_TRANSITION_FRAME_RATE, DEFAULT_TRANSITION_FRAME_RATE),
+            )
+        return self._transitions
+
+    def _min_brightness(self):
+        """
+        Return the lowest brightness the light accepts, on Home Assistant's
+        0-255 scale.  The range of the dp is already scaled by its mapping,
+        so it is only rounded up to stay within the range.
+        """
+        if self._brightness_dps:
+            r = self._brightness_dps.range(self._device)
+            if r:
+                return max(ceil(r["min"]), 0)
+        return 0
+
+    def _current_brightness(self):
+        if not self.is_on:
+            return self._min_brightness()
+        if self.color_mode == ColorMode.RGBW:
+            rgbw = self.rgbw_color
+            if rgbw:
+                return rgbw[3]
+        return self.brightness
+
+    def _transition_values(self, params):
+        """
+        Return the start and end values for a transition to params, for the
+        values that can be interpolated from the current state.
+        """
+        start = {}
+        end = {}
+        if ATTR_BRIGHTNESS in params or not self.is_on:
+            current = self._current_brightness()
+            if current is not None:
+                start[ATTR_BRIGHTNESS] = current
+                end[ATTR_BRIGHTNESS] = params.get(
+                    ATTR_BRIGHTNESS, self.brightness or 255
+                )
+        if ATTR_COLOR_TEMP in params and self.color_temp is not None:
+            start[ATTR_COLOR_TEMP] = self.color_temp
+            end[ATTR_COLOR_TEMP] = params[ATTR_COLOR_TEMP]
+        if ATTR_RGBW_COLOR in params and self.rgbw_color is not None:
+            start[ATTR_RGBW_COLOR] = tuple(self.rgbw_color)
+            end[ATTR_RGBW_COLOR] = tuple(params[ATTR_RGBW_COLOR])
+        return start, end
+
     async def async_turn_on(self, **params):
+        transition = params.pop(ATTR_TRANSITION, None)
+        if self._transitions:
+            self._transitions.cancel()
+        if transition:
+            start, end = self._transition_values(params)
+            if start:
+                _LOGGER.debug(f"Transitioning from {start} to {end} in {transition}s")
+                self._transition_engine().start(
+                    start,
+                    end,
+                    transition,
+                    lambda values: self._turn_on_settings({**params, **values}),
+                )
+                return
+
+        settings = self._turn_on_settings(params)
+        if settings:
+            await self._device.async_set_properties(settings)
+
+    def _turn_on_settings(self, params):
+        """Return the dps to set to turn on the light with params."""
         settings = {}
         color_mode = params.get(ATTR_COLOR_MODE, self.color_mode)
 
@@ -223,35 +276,9 @@ class TuyaLocalLight(TuyaLocalEntity, LightEntity):
                 }
             rgbw = params.get(ATTR_RGBW_COLOR, self.rgbw_color or (0, 0, 0, 0))
             brightness = params.get(ATTR_BRIGHTNESS, self.brightness or 255)
-            fmt = self._rgbhsv_dps.format
-            if rgbw and fmt:
-                rgb = (rgbw[0], rgbw[1], rgbw[2])
-                hs = color_util.color_RGB_to_hs(rgbw[0], rgbw[1], rgbw[2])
-                rgbhsv = {
-                    "r": rgb[0],
-                    "g": rgb[1],
-                    "b": rgb[2],
-                    "h": hs[0],
-                    "s": hs[1],
-                    "v": brightness,
-                }
-                _LOGGER.debug(
-                    f"Setting RGBW as {rgb[0]},{rgb[1]},{rgb[2]},{hs[0]},{hs[1]},{brightness}"
-                )
-                ordered = []
-                idx = 0
-                for n in fmt["names"]:
-                    r = fmt["ranges"][idx]
-                    scale = 1
-                    if n == "s":
-                        scale = r["max"] / 100
-                    elif n == "h":
-                        scale = r["max"] / 360
-                    else:
-                        scale = r["max"] / 255
-                    ordered.append(round(rgbhsv[n] * scale))
-                    idx += 1
-                binary = pack(fmt["format"], *ordered)
+            if rgbw and self._rgbhsv_codec:
+                _LOGGER.debug(f"Setting RGBW as {rgbw} with brightness {brightness}")
+                binary = self._rgbhsv_codec.encode(rgbw, brightness)
                 settings = {
                     **settings,
                     **self._rgbhsv_dps.get_values_to_set(
@@ -311,10 +338,29 @@ class TuyaLocalLight(TuyaLocalEntity, LightEntity):
                 **self._switch_dps.get_values_to_set(self._device, True),
             }
 
-        if settings:
-            await self._device.async_set_properties(settings)
+        return settings
+
+    async def async_turn_off(self, **params):
+        transition = params.get(ATTR_TRANSITION)
+        if self._transitions:
+            self._transitions.cancel()
+        if transition and self.is_on:
+            current = self._current_brightness()
+            final = None
+            if self._switch_dps:
+                final = self._switch_dps.get_values_to_set(self._device, False)
+            elif self._brightness_dps:
+                final = self._brightness_dps.get_values_to_set(self._device, 0)
+            if current is not None and final is not None:
+                self._transition_engine().start(
+                    {ATTR_BRIGHTNESS: current},
+                    {ATTR_BRIGHTNESS: self._min_brightness()},
+                    transition,
+                    lambda values: self._turn_on_settings(values),
+                    final,
+                )
+                return
 
-    async def async_turn_off(self):
         if self._switch_dps:
             await self._switch_dps.async_set_value(self._device, False)
         elif self._brightness_dps:
@@ -322,6 +368,11 @@ class TuyaLocalLight(TuyaLocalEntity, LightEntity):
         else:
             raise NotImplementedError()
 
+    async def async_will_remove_from_hass(self):
+        await super().async_will_remove_from_hass()
+        if self._transitions:
+            self._transitions.cancel()
+
     async def async_toggle(self):
         disp_on = self.is_on
 
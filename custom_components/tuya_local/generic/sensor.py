@@ -2,14 +2,19 @@
 Platform to read Tuya sensors.
 """
 from homeassistant.components.sensor import (
+    RestoreSensor,
     SensorDeviceClass,
     SensorEntity,
+    SensorStateClass,
     STATE_CLASSES,
 )
+from homeassistant.const import UnitOfEnergy, UnitOfPower
+from homeassistant.helpers.entity import EntityCategory
 import logging
 
 from ..device import TuyaLocalDevice
 from ..helpers.device_config import TuyaEntityConfig
+from ..helpers.energy import ENERGY_SENSOR_ID, EnergyMeter
 from ..helpers.mixin import TuyaLocalEntity, unit_from_ascii
 
 _LOGGER = logging.getLogger(__name__)
@@ -67,3 +72,116 @@ class TuyaLocalSensor(TuyaLocalEntity, SensorEntity):
             unit = self._unit_dps.get_value(self._device)
 
         return unit_from_ascii(unit)
+
+
+class TuyaLocalAggregatedSensor(TuyaLocalSensor):
+    """
+    A Tuya measurement sensor that is sampled often, and published once per
+    aggregation window as the mean over the window.
+    """
+
+    @staticmethod
+    def supports(config: TuyaEntityConfig):
+        """Return whether the sensor of an entity config can be aggregated."""
+        sensor = next((d for d in config.dps() if d.name == "sensor"), None)
+        return (
+            sensor is not None
+            and sensor.type in (int, float)
+            and sensor.state_class == SensorStateClass.MEASUREMENT
+        )
+
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+        self._device.aggregate_dps(self._sensor_dps.id)
+
+    def _summary(self):
+        summary = self._device.aggregate(self._sensor_dps.id)
+        return summary if isinstance(summary, dict) else None
+
+    @property
+    def native_value(self):
+        """Return the mean value over the last window"""
+        summary = self._summary()
+        if summary is None:
+            return super().native_value
+        return self._sensor_dps._map_from_dps(summary["mean"], self._device)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the statistics of the last window as well."""
+        attr = super().extra_state_attributes
+        summary = self._summary()
+        if summary is None:
+            return attr
+        for key in ("min", "max"):
+            attr[key] = self._sensor_dps._map_from_dps(summary[key], self._device)
+        attr["samples"] = summary["samples"]
+        if self.device_class == SensorDeviceClass.POWER:
+            mean = self._sensor_dps._map_from_dps(summary["mean"], self._device)
+            unit = self.native_unit_of_measurement
+            if unit in (UnitOfPower.WATT, UnitOfPower.KILO_WATT):
+                kwh = mean * summary["duration"] / 3600
+                if unit == UnitOfPower.WATT:
+                    kwh /= 1000
+                attr["energy_kwh"] = round(kwh, 6)
+        return attr
+
+
+class TuyaLocalEnergySensor(RestoreSensor):
+    """
+    The energy used by a Tuya device that only reports its power, integrated
+    by the device from every power reading.  The total is restored after a
+    restart.
+    """
+
+    _attr_device_class = SensorDeviceClass.ENERGY
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_native_unit_of_measurement = UnitOfEnergy.KILO_WATT_HOUR
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_has_entity_name = True
+    _attr_name = "Local energy"
+    _attr_should_poll = False
+
+    def __init__(self, device: TuyaLocalDevice, meter: EnergyMeter):
+        """
+        Initialise the sensor.
+        Args:
+            device (TuyaLocalDevice): the device API instance.
+            meter (EnergyMeter): the meter integrating the device's power.
+        """
+        self._device = device
+        self._meter = meter
+
+    @property
+    def available(self):
+        return self._device.has_returned_state
+
+    @property
+    def unique_id(self):
+        """Return the unique id for this entity."""
+        return f"{self._device.unique_id}-local_energy"
+
+    @property
+    def device_info(self):
+        """Return the device's information."""
+        return self._device.device_info
+
+    @property
+    def native_value(self):
+        """Return the energy used in kWh"""
+        return round(self._meter.total, 4)
+
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+        last = await self.async_get_last_sensor_data()
+        if last is not None and last.native_value is not None:
+            try:
+                self._meter.restore(float(last.native_value))
+            except ValueError:
+                _LOGGER.warning(f"Ignoring invalid energy of {last.native_value}")
+        # Written by the device whenever the energy used increases
+        self._device.register_entity(self, [ENERGY_SENSOR_ID])
+
+    async def async_will_remove_from_hass(self):
+        await super().async_will_remove_from_hass()
+        self._device.unregister_entity(self)
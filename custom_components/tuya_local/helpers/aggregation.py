@@ -0,0 +1,130 @@
+"""
+Aggregation of fast changing sensor dps over a window of time, so that
+devices can be sampled often while their sensors are published less often.
+"""
+from threading import Lock
+
+DEFAULT_AGGREGATION_WINDOW = 60
+
+
+def _numeric(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class SampleWindow:
+    """
+    Statistics of the samples of one dp over a window of time.  Each value
+    is taken to hold until the next sample, so the mean and integral are
+    weighted by how long each value held, however irregular the sampling.
+    """
+
+    __slots__ = ("start", "samples", "minimum", "maximum", "integral", "_value", "_at")
+
+    def __init__(self, start, value=None):
+        """
+        Args:
+            start (float): The time the window starts.
+            value (number): The value holding at the start, if known.
+        """
+        self.start = start
+        self.samples = 0
+        self.minimum = value
+        self.maximum = value
+        self.integral = 0.0
+        self._value = value
+        self._at = start
+
+    @property
+    def value(self):
+        """Return the latest value."""
+        return self._value
+
+    def add(self, value, now):
+        """Add a sample taken at now."""
+        if self._value is not None:
+            self.integral += self._value * (now - self._at)
+            self.minimum = min(self.minimum, value)
+            self.maximum = max(self.maximum, value)
+        else:
+            self.minimum = self.maximum = value
+            self.start = now
+        self.samples += 1
+        self._value = value
+        self._at = now
+
+    def summary(self, now):
+        """
+        Return the statistics of the window up to now, or None if no value
+        was known during it.
+        """
+        if self._value is None:
+            return None
+        duration = now - self.start
+        integral = self.integral + self._value * (now - self._at)
+        return {
+            "min": self.minimum,
+            "max": self.maximum,
+            "mean": integral / duration if duration > 0 else self._value,
+            "samples": self.samples,
+            "duration": duration,
+            "integral": integral,
+        }
+
+
+class SensorAggregator:
+    """
+    Collects samples of the watched dps of a device from every refresh, and
+    summarises them once per window.  Samples are added from the threads
+    that refresh the device, and windows closed from the event loop.
+    """
+
+    def __init__(self, window=DEFAULT_AGGREGATION_WINDOW, start=0):
+        """
+        Args:
+            window (float): The number of seconds in each window.
+            start (float): The time the first window starts.
+        """
+        self.window = window
+        self.watched = set()
+        self._windows = {}
+        self._start = start
+        self._lock = Lock()
+
+    def watch(self, dps_id):
+        """Start aggregating dps_id from the next sample."""
+        self.watched.add(dps_id)
+
+    def add(self, dps, now):
+        """Add the samples of the watched dps among dps, taken at now."""
+        with self._lock:
+            for dps_id in self.watched.intersection(dps):
+                value = dps[dps_id]
+                if not _numeric(value):
+                    continue
+                window = self._windows.get(dps_id)
+                if window is None:
+                    window = self._windows[dps_id] = SampleWindow(self._start)
+                window.add(value, now)
+
+    def due(self, now):
+        """Return whether the current window has ended."""
+        return now - self._start >= self.window
+
+    def close(self, now):
+        """
+        End the current window at now, returning the summary of each dp
+        that had a value during it, and start the next, carrying the latest
+        value of each dp over to it.
+        """
+        with self._lock:
+            summaries = {}
+            for dps_id, window in self._windows.items():
+                summary = window.summary(now)
+                if summary is not None:
+                    summaries[dps_id] = summary
+            self._windows = {
+                dps_id: SampleWindow(now, window.value)
+                for dps_id, window in self._windows.items()
+            }
+            self._start = now
+            return summaries
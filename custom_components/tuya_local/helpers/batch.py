@@ -0,0 +1,175 @@
+"""
+Sending a batch of dp changes to several devices at once.
+"""
+import asyncio
+import logging
+from time import monotonic
+
+import voluptuous as vol
+
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import callback
+import homeassistant.helpers.config_validation as cv
+
+from ..const import DOMAIN, EVENT_BATCH_COMPLETE
+from .color import rgbhsv_codec
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_BATCH_SET = "batch_set"
+ATTR_TARGETS = "targets"
+ATTR_DP = "dp"
+ATTR_VALUE = "value"
+ATTR_CONCURRENCY = "concurrency"
+
+DEFAULT_BATCH_CONCURRENCY = 8
+
+BATCH_SET_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_TARGETS): vol.All(
+            cv.ensure_list,
+            [
+                vol.Schema(
+                    {
+                        vol.Required(ATTR_ENTITY_ID): cv.entity_id,
+                        vol.Required(ATTR_DP): cv.string,
+                        vol.Required(ATTR_VALUE): object,
+                    }
+                )
+            ],
+        ),
+        vol.Optional(ATTR_CONCURRENCY, default=DEFAULT_BATCH_CONCURRENCY): vol.All(
+            vol.Coerce(int), vol.Range(min=1)
+        ),
+    }
+)
+
+
+def _find_entity(hass, entity_id):
+    for data in hass.data.get(DOMAIN, {}).values():
+        for entity in data.values():
+            if getattr(entity, "entity_id", None) == entity_id:
+                return entity
+    return None
+
+
+def _color(dp, value):
+    """
+    Return the (r, g, b, w) color and brightness for a packed color dp, if
+    value is given as a color, or None.  The w component sets the brightness,
+    as the light shows it.
+    """
+    if not dp.format or not isinstance(value, (list, tuple)):
+        return None
+    if len(value) not in (3, 4):
+        raise ValueError(f"{value} is not an RGB or RGBW color")
+    rgbw = tuple(int(c) for c in value)
+    brightness = rgbw[3] if len(rgbw) == 4 else 255
+    return rgbw[:3] + (brightness,), brightness
+
+
+def _resolve(hass, targets):
+    """
+    Resolve targets into the dps to set on each device.
+    Returns a dict of device to dps, and a list of errors for targets
+    that could not be resolved.
+    Colors for packed color dps are converted together per format, so a
+    group of lights set to the same color converts it only once.
+    """
+    per_device = {}
+    errors = []
+    colors = {}
+    for target in targets:
+        entity_id = target[ATTR_ENTITY_ID]
+        entity = _find_entity(hass, entity_id)
+        if entity is None:
+            errors.append(f"{entity_id} is not a {DOMAIN} entity")
+            continue
+        dp = entity._config.find_dps(target[ATTR_DP])
+        if dp is None:
+            errors.append(f"{entity_id} has no dp named {target[ATTR_DP]}")
+            continue
+        if dp.readonly:
+            errors.append(f"{dp.name} on {entity_id} is read only")
+            continue
+        try:
+            color = _color(dp, target[ATTR_VALUE])
+            if color is not None:
+                codec = rgbhsv_codec(dp.format)
+                colors.setdefault(codec, []).append((entity, dp, color))
+                continue
+            dps = dp.get_values_to_set(entity._device, target[ATTR_VALUE])
+        except (TypeError, ValueError) as e:
+            errors.append(f"{entity_id}: {e}")
+            continue
+        per_device.setdefault(entity._device, {}).update(dps)
+
+    for codec, group in colors.items():
+        encoded = codec.encode_many([color for _, _, color in group])
+        for (entity, dp, _), binary in zip(group, encoded):
+            dps = dp.get_values_to_set(entity._device, dp.encode_value(binary))
+            per_device.setdefault(entity._device, {}).update(dps)
+    return per_device, errors
+
+
+async def async_batch_set(hass, targets, concurrency=DEFAULT_BATCH_CONCURRENCY):
+    """
+    Set dps on several devices, grouping the targets per device and
+    sending to up to concurrency devices at the same time.
+
+    Args:
+        targets (list): dicts of entity_id, dp (the name of a dp of the
+            entity) and value, as accepted by the dp when set from the entity.
+        concurrency (int): The maximum number of devices to send to at once.
+    Returns the result for each device, keyed by device id, any errors
+    resolving targets, and the total wall time in seconds.
+    """
+    start = monotonic()
+    per_device, errors = _resolve(hass, targets)
+    semaphore = asyncio.Semaphore(concurrency)
+    results = {}
+
+    async def send(device, dps):
+        async with semaphore:
+            sent_at = monotonic()
+            try:
+                success = await device.async_send_properties(dps)
+                error = None if success else "Failed to update device state."
+            except Exception as e:
+                success = False
+                error = str(e)
+            results[device.unique_id] = {
+                "name": device.name,
+                "dps": dps,
+                "success": success,
+                "error": error,
+                "time": round(monotonic() - sent_at, 3),
+            }
+
+    await asyncio.gather(*(send(d, dps) for d, dps in per_device.items()))
+    return {
+        "devices": results,
+        "errors": errors,
+        "total_time": round(monotonic() - start, 3),
+    }
+
+
+@callback
+def async_register_services(hass):
+    """Register the batch services for the integration."""
+
+    async def async_handle_batch_set(call):
+        result = await async_batch_set(
+            hass, call.data[ATTR_TARGETS], call.data[ATTR_CONCURRENCY]
+        )
+        for error in result["errors"]:
+            _LOGGER.warning(f"Batch set skipped a target: {error}")
+        _LOGGER.debug(
+            f"Batch set to {len(result['devices'])} devices "
+            f"took {result['total_time']}s"
+        )
+        hass.bus.async_fire(EVENT_BATCH_COMPLETE, result, context=call.context)
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_BATCH_SET, async_handle_batch_set, schema=BATCH_SET_SCHEMA
+    )
@@ -0,0 +1,114 @@
+"""
+Conversion between Home Assistant colors and packed Tuya RGB/HSV dps.
+"""
+from functools import lru_cache
+
+import homeassistant.util.color as color_util
+
+# The range Home Assistant uses for each component of a color
+_HA_RANGES = {
+    "h": 360,
+    "s": 100,
+}
+_HA_DEFAULT_RANGE = 255
+
+
+class RgbhsvCodec:
+    """
+    Packs and unpacks the binary color value of a Tuya light, with the
+    scale factors for each field computed once per format.
+    """
+
+    def __init__(self, fmt):
+        """
+        Args:
+            fmt (TuyaDpsFormat): The binary format of the dp.
+        """
+        self._format = fmt
+        names = fmt.names
+        ranges = fmt.ranges
+        self.names = names
+        self._index = {n: i for i, n in enumerate(names)}
+        self._invalid = next((n for n, r in zip(names, ranges) if r["min"] != 0), None)
+        self._decode_scales = tuple(
+            _HA_RANGES.get(n, _HA_DEFAULT_RANGE) / r["max"]
+            for n, r in zip(names, ranges)
+        )
+        self._encode_scales = tuple(
+            r["max"] / _HA_RANGES.get(n, _HA_DEFAULT_RANGE)
+            for n, r in zip(names, ranges)
+        )
+
+    def decode(self, binary):
+        """Return the (r, g, b, w) color of a packed value."""
+        if self._invalid:
+            raise AttributeError(
+                f"Unhandled minimum range for {self._invalid} in RGBW value"
+            )
+        vals = self._format.unpack(binary)
+        idx = self._index
+        scales = self._decode_scales
+        h = round(vals[idx["h"]] * scales[idx["h"]])
+        s = round(vals[idx["s"]] * scales[idx["s"]])
+        w = round(vals[idx["v"]] * scales[idx["v"]])
+        # convert RGB from H and S to seperate out the V component
+        r, g, b = _hs_to_rgb(h, s)
+        return (r, g, b, w)
+
+    def encode(self, rgbw, brightness):
+        """Return the packed value for an (r, g, b, w) color and brightness."""
+        rgb = (rgbw[0], rgbw[1], rgbw[2])
+        hs = _rgb_to_hs(*rgb)
+        rgbhsv = {
+            "r": rgb[0],
+            "g": rgb[1],
+            "b": rgb[2],
+            "h": hs[0],
+            "s": hs[1],
+            "v": brightness,
+        }
+        return self._format.pack(
+            *(
+                round(rgbhsv[n] * scale)
+                for n, scale in zip(self.names, self._encode_scales)
+            )
+        )
+
+    def encode_many(self, targets):
+        """
+        Encode a sequence of (rgbw, brightness) targets, such as a group of
+        lights being set to the same colors, converting each distinct one once.
+        """
+        cache = {}
+        result = []
+        for rgbw, brightness in targets:
+            key = (tuple(rgbw), brightness)
+            if key not in cache:
+                cache[key] = self.encode(rgbw, brightness)
+            result.append(cache[key])
+        return result
+
+
+@lru_cache(maxsize=None)
+def _codec(fmt):
+    return RgbhsvCodec(fmt)
+
+
+def rgbhsv_codec(fmt):
+    """
+    Return the codec for a format as returned by TuyaDpsConfig.format,
+    shared between all dps with the same format.
+    """
+    if not fmt:
+        return None
+    return _codec(fmt)
+
+
+@lru_cache(maxsize=1024)
+def _hs_to_rgb(h, s):
+    return color_util.color_hs_to_RGB(h, s)
+
+
+@lru_cache(maxsize=1024)
+def _rgb_to_hs(r, g, b):
+    return color_util.color_RGB_to_hs(r, g, b)
@@ -5,20 +5,24 @@ import logging
 
 from .. import DOMAIN
 from ..const import CONF_DEVICE_ID, CONF_DEVICE_CID, CONF_TYPE
-from .device_config import get_config
+from .device_config import async_get_config
 
 _LOGGER = logging.getLogger(__name__)
 
 
 async def async_tuya_setup_platform(
-    hass, async_add_entities, discovery_info, platform, entity_class
+    hass, async_add_entities, discovery_info, platform, entity_class, extra=None
 ):
-    """Common functions for async_setup_platform for each entity platform."""
+    """
+    Common functions for async_setup_platform for each entity platform.
+    extra is a function returning entities to add that are not in the device
+    config, by the key to store them under.
+    """
     data = hass.data[DOMAIN][get_device_id(discovery_info)]
     device = data["device"]
     entities = []
 
-    cfg = get_config(discovery_info[CONF_TYPE])
+    cfg = await async_get_config(hass, discovery_info[CONF_TYPE])
     if cfg is None:
         raise ValueError(f"No device config found for {discovery_info}")
     ecfg = cfg.primary_entity
@@ -40,6 +44,11 @@ async def async_tuya_setup_platform(
             if ecfg.deprecated:
                 _LOGGER.warning(ecfg.deprecation_message)
             _LOGGER.debug(f"Adding {platform} for {ecfg.config_id}")
+    if extra is not None:
+        for key, entity in extra(device).items():
+            data[key] = entity
+            entities.append(entity)
+            _LOGGER.debug(f"Adding {platform} for {key}")
     if not entities:
         raise ValueError(f"{device.name} does not support use as a {platform} device.")
     async_add_entities(entities)
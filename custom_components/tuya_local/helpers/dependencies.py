@@ -0,0 +1,132 @@
+"""
+Dependencies between the dps of a device config.
+
+The mapping of a dp can refer to other dps of its entity by name.  A
+constraint reads the raw value of another dp to pick a condition, while
+value_redirect and value_mirror take the mapped value of another dp, which
+has to be evaluated first.  The graph records both, to find what needs
+evaluating again when a dp changes, and checks that no dp ends up taking its
+value from itself.
+"""
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def dps_references(dps):
+    """
+    Return the names of the dps a dp refers to in its mapping, as a tuple
+    of the constraints it reads and the dps it takes values from.
+    """
+    constraints = []
+    values = []
+    for m in dps._config.get("mapping", {}):
+        constraints.append(m.get("constraint"))
+        values += [m.get("value_redirect"), m.get("value_mirror")]
+        for c in m.get("conditions", {}):
+            values += [c.get("value_redirect"), c.get("value_mirror")]
+            values += [m2.get("value_mirror") for m2 in c.get("mapping", {})]
+    return (
+        tuple(n for n in constraints if n),
+        tuple(n for n in values if n),
+    )
+
+
+class DpsDependencyGraph:
+    """
+    The dependencies between the dps of a device, keyed by dp id.
+    """
+
+    def __init__(self, entities, name="device"):
+        """
+        Args:
+            entities (iterable): The TuyaEntityConfigs of the device.
+            name (str): The name of the device config, for error messages.
+        Raises ValueError if dps take their values from each other in a cycle.
+        """
+        self._depends_on = depends_on = {}
+        self._dependents = {}
+        value_deps = {}
+        names = {}
+        for entity in entities:
+            for dps in entity.dps():
+                names.setdefault(dps.id, f"{entity.config_id}.{dps.name}")
+                deps = depends_on.setdefault(dps.id, set())
+                v_deps = value_deps.setdefault(dps.id, set())
+                constraints, values = dps_references(dps)
+                for ref in constraints + values:
+                    target = entity.find_dps(ref)
+                    if target is None:
+                        _LOGGER.debug(
+                            f"{name}: {entity.config_id}.{dps.name} refers "
+                            f"to {ref}, which is not in the same entity"
+                        )
+                        continue
+                    deps.add(target.id)
+                    if ref in values:
+                        v_deps.add(target.id)
+        for dp_id, deps in depends_on.items():
+            for d in deps:
+                self._dependents.setdefault(d, set()).add(dp_id)
+        self.order = self._sort(value_deps, names, name)
+
+    @staticmethod
+    def _sort(value_deps, names, config_name):
+        """
+        Order the dps so that those a dp takes its value from come before it.
+        """
+        order = []
+        done = set()
+        for start in value_deps:
+            if start in done:
+                continue
+            path = [start]
+            visiting = {start}
+            stack = [iter(sorted(value_deps[start]))]
+            while stack:
+                child = next(stack[-1], None)
+                if child is None:
+                    stack.pop()
+                    node = path.pop()
+                    visiting.discard(node)
+                    done.add(node)
+                    order.append(node)
+                elif child in visiting:
+                    cycle = path[path.index(child) :] + [child]
+                    raise ValueError(
+                        f"{config_name}: dps take their values from each "
+                        f"other in a cycle: {' -> '.join(names[c] for c in cycle)}"
+                    )
+                elif child not in done:
+                    path.append(child)
+                    visiting.add(child)
+                    stack.append(iter(sorted(value_deps.get(child, ()))))
+        return tuple(order)
+
+    def dependencies(self, dp_ids):
+        """
+        Return the ids of the dps that the dps in dp_ids depend on, directly
+        or through other dps, including the dps in dp_ids themselves.
+        """
+        found = set(dp_ids)
+        pending = list(found)
+        while pending:
+            for d in self._depends_on.get(pending.pop(), ()):
+                if d not in found:
+                    found.add(d)
+                    pending.append(d)
+        return found
+
+    def affected(self, changed):
+        """
+        Return the ids of the dps that may need evaluating again after the
+        dps in changed do, including the changed dps themselves.
+        """
+        affected = set(changed)
+        pending = list(affected)
+        while pending:
+            for d in self._dependents.get(pending.pop(), ()):
+                if d not in affected:
+                    affected.add(d)
+                    pending.append(d)
+        return affected
@@ -0,0 +1,122 @@
+"""
+Detection of the device configs that match the dps returned by a device.
+"""
+from itertools import chain
+import logging
+
+from .device_config import (
+    TuyaDeviceConfig,
+    _detection_config,
+    _typematch,
+    available_configs,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+_TYPES = (bool, int, float, str)
+
+
+class DetectionIndex:
+    """
+    The dps of every device config, as bitsets of dp ids that are required
+    and that need values of each type, so that a device can be scored
+    against all configs with a few integer operations for each.  Only the
+    file names of the configs are kept, so the configs are loaded again
+    for the matches, unless they are shared by devices already set up.
+    """
+
+    def __init__(self, configs):
+        """
+        Args:
+            configs (iterable): The TuyaDeviceConfigs to detect between.
+        """
+        self._bits = {}
+        self._entries = []
+        for config in configs:
+            required = 0
+            used = 0
+            typed = dict.fromkeys(_TYPES, 0)
+            for entity in chain([config.primary_entity], config.secondary_entities()):
+                for d in entity.dps():
+                    bit = self._bits.setdefault(d.id, 1 << len(self._bits))
+                    used |= bit
+                    if not d.optional:
+                        required |= bit
+                    typed[d.type] = typed.get(d.type, 0) | bit
+            self._entries.append(
+                (
+                    config.config,
+                    required,
+                    used,
+                    tuple((t, b) for t, b in typed.items() if b),
+                )
+            )
+
+    def rank(self, dps, limit=None):
+        """
+        Return the configs that match dps, best first, as a list of
+        (quality, config), where quality is the percentage of the dps that
+        the config uses.  Configs of equal quality are in the order of the
+        config files.
+
+        Args:
+            dps (dict): The dps returned by the device.
+            limit (int): The maximum number of matches to return.  The
+                search stops once this many perfect matches have been found.
+        """
+        keys = [k for k in dps if k != "updated_at"]
+        total = len(keys)
+        if total == 0:
+            return []
+        present = 0
+        matching = dict.fromkeys(_TYPES, 0)
+        for k in keys:
+            bit = self._bits.get(k)
+            if bit is None:
+                continue
+            present |= bit
+            for t in _TYPES:
+                if _typematch(t, dps[k]):
+                    matching[t] |= bit
+
+        ranked = []
+        perfect = 0
+        for fname, required, used, typed in self._entries:
+            if required & ~present:
+                continue
+            if any(bits & present & ~matching.get(t, 0) for t, bits in typed):
+                continue
+            quality = round(bin(used & present).count("1") * 100 / total)
+            ranked.append((quality, fname))
+            if quality == 100:
+                perfect += 1
+                if limit is not None and perfect >= limit:
+                    break
+
+        ranked.sort(key=lambda r: r[0], reverse=True)
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [(quality, _detection_config(fname)) for quality, fname in ranked]
+
+
+_detection_index = None
+
+
+def detection_index():
+    """Return the index of all the available configs, building it once."""
+    global _detection_index
+    if _detection_index is None:
+        _detection_index = DetectionIndex(
+            TuyaDeviceConfig(fname) for fname in available_configs()
+        )
+        _LOGGER.debug("Detection index built")
+    return _detection_index
+
+
+async def async_rank_matches(hass, dps, limit=None):
+    """
+    Return the configs that match dps, best first, as a list of
+    (quality, config), ranked in the executor as the matching configs
+    and the index, if it is not built yet, are loaded from disk.
+    """
+    return await hass.async_add_executor_job(lambda: detection_index().rank(dps, limit))
@@ -1,18 +1,28 @@
 """
 Config parser for Tuya Local devices.
 """
-from base64 import b64decode, b64encode
+from binascii import a2b_base64, b2a_base64
+from bisect import bisect_left
 
 from fnmatch import fnmatch
+from functools import lru_cache
+from itertools import chain
 import logging
+from struct import Struct
+from sys import intern
 from os import walk
-from os.path import join, dirname, splitext, exists
+from os.path import join, dirname, splitext
+from weakref import WeakKeyDictionary
 
 from homeassistant.util import slugify
 from homeassistant.util.yaml import load_yaml
 
 import custom_components.tuya_local.devices as config_dir
 
+from .dependencies import DpsDependencyGraph
+from .mapping import MappingPlan
+from .polling import POLL_CLASS_MAX_AGE, POLL_NORMAL
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -66,18 +76,129 @@ def _bytes_to_fmt(bytes, signed=False):
         return f"{bytes}s"
 
 
+class TuyaDpsFormat:
+    """
+    Compiled layout of a binary dp value, as described by the format
+    of the dp config.  Equal formats share a single instance.
+    """
+
+    def __init__(self, fields):
+        """
+        Args:
+            fields (tuple): (name, bytes, min, max) for each field.
+        """
+        self._fields = fields
+        self.names = tuple(f[0] for f in fields)
+        self.ranges = tuple({"min": f[2], "max": f[3]} for f in fields)
+        self.format = ">" + "".join(_bytes_to_fmt(f[1], f[2] < 0) for f in fields)
+        self.struct = Struct(self.format)
+        # Fields that struct has no integer type for, unpacked as bytes
+        self._three_byte = tuple(
+            (i, f[2] < 0) for i, f in enumerate(fields) if f[1] == 3
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, TuyaDpsFormat) and self._fields == other._fields
+
+    def __hash__(self):
+        return hash(self._fields)
+
+    def unpack(self, data):
+        """Unpack binary data into a tuple of field values."""
+        vals = self.struct.unpack_from(data)
+        if not self._three_byte:
+            return vals
+        vals = list(vals)
+        for i, signed in self._three_byte:
+            vals[i] = int.from_bytes(vals[i], "big", signed=signed)
+        return tuple(vals)
+
+    def pack(self, *values):
+        """Pack field values into binary data."""
+        if self._three_byte:
+            values = list(values)
+            for i, signed in self._three_byte:
+                values[i] = int(values[i]).to_bytes(3, "big", signed=signed)
+        return self.struct.pack(*values)
+
+
+@lru_cache(maxsize=None)
+def _compile_format(fields):
+    _LOGGER.debug(f"format of {fields} compiled")
+    return TuyaDpsFormat(fields)
+
+
+# Device configs by filename, shared by every device of the same type.
+# Only the configs of devices that are set up are kept here, configs read
+# to detect a device are released once detection has finished with them.
+_device_configs = {}
+_available_configs = None
+
+
+def _load_config(fname):
+    """Return the parsed yaml for fname, read from disk."""
+    _CONFIG_DIR = dirname(config_dir.__file__)
+    config = load_yaml(join(_CONFIG_DIR, fname))
+    _LOGGER.debug("Loaded device config %s", fname)
+    return config
+
+
+def _shared_config(fname, config=None):
+    """
+    Return the device config for fname, shared with other users of it.
+    If it is not shared yet, config is shared if given, to save reading
+    the file again.
+    """
+    shared = _device_configs.get(fname)
+    if shared is None:
+        if config is None:
+            config = TuyaDeviceConfig(fname)
+        shared = _device_configs.setdefault(fname, config)
+    return shared
+
+
+def _detection_config(fname):
+    """
+    Return the device config for fname to detect a device with, which is
+    the shared one if there is one, otherwise one of its own that is not
+    kept after detection.
+    """
+    config = _device_configs.get(fname)
+    return TuyaDeviceConfig(fname) if config is None else config
+
+
 class TuyaDeviceConfig:
-    """Representation of a device config for Tuya Local devices."""
+    """
+    Representation of a device config for Tuya Local devices.
+
+    Configs are shared by all the devices of a type, so they keep nothing
+    about a particular device.  The device is passed in wherever its state
+    is needed, and reading or writing values through a config is a pure
+    function of that state, safe to run from any thread.
+    """
+
+    __slots__ = (
+        "_fname",
+        "_config",
+        "_primary_entity",
+        "_secondary_entities",
+        "_dependency_graph",
+    )
 
     def __init__(self, fname):
         """Initialize the device config.
         Args:
-            fname (string): The filename of the yaml config to load."""
-        _CONFIG_DIR = dirname(config_dir.__file__)
+            fname (string): The filename of the yaml config to load.
+        Raises ValueError if dps take their values from each other in a cycle.
+        """
         self._fname = fname
-        filename = join(_CONFIG_DIR, fname)
-        self._config = load_yaml(filename)
-        _LOGGER.debug("Loaded device config %s", fname)
+        self._config = _load_config(fname)
+        self._primary_entity = None
+        self._secondary_entities = None
+        self._dependency_graph = DpsDependencyGraph(
+            chain([self.primary_entity], self.secondary_entities()),
+            self.config_type,
+        )
 
     @property
     def name(self):
@@ -102,12 +223,41 @@ class TuyaDeviceConfig:
     @property
     def primary_entity(self):
         """Return the primary type of entity for this device."""
-        return TuyaEntityConfig(self, self._config["primary_entity"], primary=True)
+        if self._primary_entity is None:
+            self._primary_entity = TuyaEntityConfig(
+                self, self._config["primary_entity"], primary=True
+            )
+        return self._primary_entity
 
     def secondary_entities(self):
         """Iterate through entites for any secondary entites supported."""
-        for conf in self._config.get("secondary_entities", {}):
-            yield TuyaEntityConfig(self, conf)
+        if self._secondary_entities is None:
+            self._secondary_entities = tuple(
+                TuyaEntityConfig(self, conf)
+                for conf in self._config.get("secondary_entities", {})
+            )
+        yield from self._secondary_entities
+
+    @property
+    def dependency_graph(self):
+        """Return the graph of dependencies between the dps of this device."""
+        return self._dependency_graph
+
+    def poll_classes(self):
+        """
+        Return the poll class of each dp used by this device.  Where a dp
+        appears in more than one entity, the fastest class is used.
+        """
+        order = list(POLL_CLASS_MAX_AGE)
+        classes = {}
+        for entity in chain([self.primary_entity], self.secondary_entities()):
+            for dp in entity.dps():
+                cls = dp.poll_class
+                if dp.id not in classes or order.index(cls) < order.index(
+                    classes[dp.id]
+                ):
+                    classes[dp.id] = cls
+        return classes
 
     def matches(self, dps):
         """Determine if this device matches the provided dps map."""
@@ -145,16 +295,15 @@ class TuyaDeviceConfig:
             ):
                 return False
             if d.id in keys:
-                matched.append(d.id)
-                keys.remove(d.id)
+                matched.add(d.id)
+                keys.discard(d.id)
         return True
 
     def match_quality(self, dps):
         """Determine the match quality for the provided dps map."""
-        keys = list(dps.keys())
-        matched = []
-        if "updated_at" in keys:
-            keys.remove("updated_at")
+        keys = set(dps.keys())
+        matched = set()
+        keys.discard("updated_at")
         total = len(keys)
         if not self._entity_match_analyse(self.primary_entity, keys, matched, dps):
             return 0
@@ -169,10 +318,14 @@ class TuyaDeviceConfig:
 class TuyaEntityConfig:
     """Representation of an entity config for a supported entity."""
 
+    __slots__ = ("_device", "_config", "_is_primary", "_dps", "_dps_by_name")
+
     def __init__(self, device, config, primary=False):
         self._device = device
         self._config = config
         self._is_primary = primary
+        self._dps = None
+        self._dps_by_name = None
 
     def name(self):
         """The friendly name for this entity."""
@@ -237,6 +390,11 @@ class TuyaEntityConfig:
                 priority = rule["priority"]
         return icon
 
+    @property
+    def dependency_graph(self):
+        """Return the graph of dependencies between the dps of the device."""
+        return self._device.dependency_graph
+
     @property
     def mode(self):
         """Return the mode (used by Number entities)."""
@@ -244,28 +402,47 @@ class TuyaEntityConfig:
 
     def dps(self):
         """Iterate through the list of dps for this entity."""
-        for d in self._config["dps"]:
-            yield TuyaDpsConfig(self, d)
+        if self._dps is None:
+            self._dps = tuple(TuyaDpsConfig(self, d) for d in self._config["dps"])
+        yield from self._dps
 
     def find_dps(self, name):
         """Find a dps with the specified name."""
-        for d in self.dps():
-            if d.name == name:
-                return d
-        return None
+        if self._dps_by_name is None:
+            by_name = {}
+            for d in self.dps():
+                by_name.setdefault(d.name, d)
+            self._dps_by_name = by_name
+        return self._dps_by_name.get(name)
 
 
 class TuyaDpsConfig:
     """Representation of a dps config."""
 
+    __slots__ = (
+        "_entity",
+        "_config",
+        "_id",
+        "_format",
+        "_value_deps",
+        "_value_tables",
+        "_plan",
+    )
+
     def __init__(self, entity, config):
         self._entity = entity
         self._config = config
-        self.stringify = False
+        # Interned so that the configs of every device share one string
+        # for each id
+        self._id = intern(str(config["id"]))
+        self._format = None
+        self._value_deps = None
+        self._value_tables = None
+        self._plan = None
 
     @property
     def id(self):
-        return str(self._config["id"])
+        return self._id
 
     @property
     def type(self):
@@ -296,13 +473,13 @@ class TuyaDpsConfig:
 
     @property
     def format(self):
-        fmt = self._config.get("format")
-        if fmt:
-            unpack_fmt = ">"
-            ranges = []
-            names = []
+        """Return the compiled binary format of the dp, if it has one."""
+        if self._format is None:
+            fmt = self._config.get("format")
+            if not fmt:
+                return None
+            fields = []
             for f in fmt:
-                name = f.get("name")
                 b = f.get("bytes", 1)
                 r = f.get("range")
                 if r:
@@ -311,14 +488,16 @@ class TuyaDpsConfig:
                 else:
                     mn = 0
                     mx = 256**b - 1
+                fields.append((f.get("name"), b, mn, mx))
+            self._format = _compile_format(tuple(fields))
+        return self._format
 
-                unpack_fmt = unpack_fmt + _bytes_to_fmt(b, mn < 0)
-                ranges.append({"min": mn, "max": mx})
-                names.append(name)
-            _LOGGER.debug(f"format of {unpack_fmt} found")
-            return {"format": unpack_fmt, "ranges": ranges, "names": names}
-
-        return None
+    @property
+    def plan(self):
+        """Return the mapping of the dp compiled for converting values."""
+        if self._plan is None:
+            self._plan = MappingPlan(self)
+        return self._plan
 
     def get_value(self, device):
         """Return the value of the dps from the given device."""
@@ -329,7 +508,7 @@ class TuyaDpsConfig:
         if self.rawtype == "hex" and isinstance(v, str):
             return bytes.fromhex(v)
         elif self.rawtype == "base64":
-            return b64decode(v)
+            return a2b_base64(v)
         else:
             return v
 
@@ -337,20 +516,10 @@ class TuyaDpsConfig:
         if self.rawtype == "hex":
             return v.hex()
         elif self.rawtype == "base64":
-            return b64encode(v).decode("utf-8")
+            return b2a_base64(v, newline=False).decode("ascii")
         else:
             return v
 
-    def _match(self, matchdata, value):
-        """Return true val1 matches val2"""
-        if self.rawtype == "bitfield" and matchdata:
-            try:
-                return (int(value) & int(matchdata)) != 0
-            except (TypeError, ValueError):
-                return False
-        else:
-            return str(value) == str(matchdata)
-
     async def async_set_value(self, device, value):
         """Set the value of the dps in the given device to given value."""
         if self.readonly:
@@ -369,7 +538,8 @@ class TuyaDpsConfig:
             )
             return None
         val = []
-        for m in self._config["mapping"]:
+        for mapping in self.plan.mappings:
+            m = mapping.config
             if "value" in m:
                 val.append(m["value"])
             # If there is a mirroring with no value override, use current value
@@ -383,11 +553,11 @@ class TuyaDpsConfig:
                     r_dps = self._entity.find_dps(c["value_mirror"])
                     val.append(r_dps.get_value(device))
 
-            cond = self._active_condition(m, device)
-            if cond and "mapping" in cond:
+            cond = mapping.active_condition(device)
+            if cond and "mapping" in cond.config:
                 _LOGGER.debug("Considering conditional mappings")
                 c_val = []
-                for m2 in cond["mapping"]:
+                for m2 in cond.config["mapping"]:
                     if "value" in m2:
                         c_val.append(m2["value"])
                     elif "value_mirror" in m:
@@ -401,6 +571,88 @@ class TuyaDpsConfig:
         _LOGGER.debug(f"{self.name} values: {val}")
         return list(set(val)) if val else None
 
+    def _values_depend_on(self):
+        """
+        Return the ids of the dps that the possible values depend on, both
+        those referred to by the mapping and the dps those depend on in turn.
+        """
+        if self._value_deps is None:
+            deps = set()
+            for m in self._config.get("mapping", []):
+                names = [m.get("constraint"), m.get("value_mirror")]
+                for c in m.get("conditions", {}):
+                    names.append(c.get("value_mirror"))
+                    for m2 in c.get("mapping", []):
+                        names.append(m2.get("value_mirror"))
+                for n in names:
+                    dps = self._entity.find_dps(n) if n else None
+                    if dps is not None:
+                        deps.add(dps.id)
+            if deps:
+                deps = self._entity.dependency_graph.dependencies(deps)
+            self._value_deps = tuple(sorted(deps))
+        return self._value_deps
+
+    def _cached_values(self, device):
+        """
+        Return the possible values of the dps for a device, as returned by
+        values(), with the numeric ones sorted.
+
+        They are kept per device, as the config is shared between devices,
+        and only rebuilt when one of the dps they depend on changes.
+        """
+        key = tuple(device.get_property(d) for d in self._values_depend_on())
+        if self._value_tables is None:
+            self._value_tables = WeakKeyDictionary()
+        cached = self._value_tables.get(device)
+        if cached is not None and cached[0] == key:
+            return cached[1:]
+        vals = self.values(device)
+        table = None
+        if vals is not None:
+            vals = tuple(vals)
+            numbers = [
+                v
+                for v in vals
+                if isinstance(v, (int, float)) and not isinstance(v, bool)
+            ]
+            table = tuple(sorted(numbers)) or None
+        self._value_tables[device] = (key, vals, table)
+        return vals, table
+
+    def cached_values(self, device):
+        """
+        Return the possible values of the dps as a tuple, as values() does,
+        but only rebuilt when one of the dps they depend on changes.
+        """
+        return self._cached_values(device)[0]
+
+    def value_table(self, device):
+        """
+        Return the numeric values the dps can take as a sorted tuple, or
+        None if it does not have a fixed list of numeric values.  Any
+        values that are not numbers are left out, as they cannot be
+        compared with a number to snap to.
+        """
+        return self._cached_values(device)[1]
+
+    def nearest_value(self, device, value):
+        """
+        Return the value from the fixed list of values the dps can take
+        that is closest to value, or value itself if there is no list.
+        Where value is half way between two, the lower is returned.
+        """
+        table = self.value_table(device)
+        if not table:
+            return value
+        i = bisect_left(table, value)
+        if i == 0:
+            return table[0]
+        if i == len(table):
+            return table[-1]
+        lower, upper = table[i - 1], table[i]
+        return upper if upper - value < value - lower else lower
+
     def default(self):
         """Return the default value for a dp."""
         if "mapping" not in self._config.keys():
@@ -414,60 +666,27 @@ class TuyaDpsConfig:
 
     def range(self, device, scaled=True):
         """Return the range for this dps if configured."""
-        mapping = self._find_map_for_dps(device.get_property(self.id))
-        scale = 1
-        if mapping:
-            _LOGGER.debug(f"Considering mapping for range of {self.name}")
-            if scaled:
-                scale = mapping.get("scale", scale)
-            cond = self._active_condition(mapping, device)
-            if cond:
-                constraint = mapping.get("constraint")
-                if scaled:
-                    scale = mapping.get("scale", scale)
-                _LOGGER.debug(f"Considering condition on {constraint}")
-            r = None if cond is None else cond.get("range")
-            if r and "min" in r and "max" in r:
-                _LOGGER.debug(f"Conditional range returned for {self.name}")
-                return _scale_range(r, scale)
-            r = mapping.get("range")
-            if r and "min" in r and "max" in r:
-                _LOGGER.debug(f"Mapped range returned for {self.name}")
-                return _scale_range(r, scale)
-        r = self._config.get("range")
-        if r and "min" in r and "max" in r:
-            return _scale_range(r, scale)
-        else:
-            return None
+        return self.plan.range(device, scaled)
 
     def step(self, device, scaled=True):
-        step = 1
-        scale = 1
-        mapping = self._find_map_for_dps(device.get_property(self.id))
-        if mapping:
-            _LOGGER.debug(f"Considering mapping for step of {self.name}")
-            step = mapping.get("step", 1)
-            scale = mapping.get("scale", 1)
-            cond = self._active_condition(mapping, device)
-            if cond:
-                constraint = mapping.get("constraint")
-                _LOGGER.debug(f"Considering condition on {constraint}")
-                step = cond.get("step", step)
-                scale = cond.get("scale", scale)
-        if step != 1 or scale != 1:
-            _LOGGER.debug(f"Step for {self.name} is {step} with scale {scale}")
-        return step / scale if scaled else step
+        return self.plan.step(device, scaled)
 
     @property
     def readonly(self):
         return self._config.get("readonly", False)
 
+    @property
+    def poll_class(self):
+        """How often this dp needs to be refreshed from the device."""
+        poll = self._config.get("poll", POLL_NORMAL)
+        return poll if poll in POLL_CLASS_MAX_AGE else POLL_NORMAL
+
     def invalid_for(self, value, device):
-        mapping = self._find_map_for_value(value, device)
+        mapping = self.plan.find_for_value(value, device)
         if mapping:
-            cond = self._active_condition(mapping, device)
+            cond = mapping.active_condition(device)
             if cond:
-                return cond.get("invalid", False)
+                return cond.invalid
         return False
 
     @property
@@ -483,17 +702,28 @@ class TuyaDpsConfig:
         """The state class of this measurement."""
         return self._config.get("class")
 
-    def _find_map_for_dps(self, value):
-        default = None
-        for m in self._config.get("mapping", {}):
-            if "dps_val" not in m:
-                default = m
-            elif self._match(m["dps_val"], value):
-                return m
-        return default
-
-    def _correct_type(self, result):
-        """Convert value to the correct type for this dp."""
+    def _stringified(self, device):
+        """
+        Return whether device reports the value of this dp as a string,
+        though the dp is of another type, so values set should be sent as
+        strings too.  This is read from the state of the device each time,
+        rather than remembered, so reading and writing values stays a pure
+        function of the config and the device state.
+        """
+        t = self.type
+        if t is None or t is str:
+            return False
+        value = device.get_property(self.id)
+        if not isinstance(value, str):
+            return False
+        try:
+            t(value)
+        except ValueError:
+            return False
+        return True
+
+    def _correct_type(self, result, device):
+        """Convert value to the correct type for this dp on device."""
         if self.type is int:
             _LOGGER.debug(f"Rounding {self.name}")
             result = int(round(result))
@@ -504,251 +734,53 @@ class TuyaDpsConfig:
         elif self.type is str:
             result = str(result)
 
-        if self.stringify:
+        if self._stringified(device):
             result = str(result)
 
         return result
 
     def _map_from_dps(self, value, device):
-        if value is not None and self.type is not str and isinstance(value, str):
-            try:
-                value = self.type(value)
-                self.stringify = True
-            except ValueError:
-                self.stringify = False
-        else:
-
-            self.stringify = False
-
-        result = value
-
-        mapping = self._find_map_for_dps(value)
-        if mapping:
-            scale = mapping.get("scale", 1)
-            invert = mapping.get("invert", False)
-
-            if not isinstance(scale, (int, float)):
-                scale = 1
-            redirect = mapping.get("value_redirect")
-            mirror = mapping.get("value_mirror")
-            replaced = "value" in mapping
-            result = mapping.get("value", result)
-            cond = self._active_condition(mapping, device)
-            if cond:
-                if cond.get("invalid", False):
-                    return None
-                replaced = replaced or "value" in cond
-                result = cond.get("value", result)
-                scale = cond.get("scale", scale)
-                redirect = cond.get("value_redirect", redirect)
-                mirror = cond.get("value_mirror", mirror)
-                for m in cond.get("mapping", {}):
-                    if str(m.get("dps_val")) == str(result):
-                        replaced = "value" in m
-                        result = m.get("value", result)
-
-            if redirect:
-                _LOGGER.debug(f"Redirecting {self.name} to {redirect}")
-                r_dps = self._entity.find_dps(redirect)
-                return r_dps.get_value(device)
-            if mirror:
-                r_dps = self._entity.find_dps(mirror)
-                return r_dps.get_value(device)
-
-            if invert and isinstance(result, (int, float)):
-                r = self._config.get("range")
-                if r and "min" in r and "max" in r:
-                    result = -1 * result + r["min"] + r["max"]
-                    replaced = True
-
-            if scale != 1 and isinstance(result, (int, float)):
-                result = result / scale
-                replaced = True
-
-            if replaced:
-                _LOGGER.debug(
-                    "%s: Mapped dps %s value from %s to %s",
-                    self._entity._device.name,
-                    self.id,
-                    value,
-                    result,
-                )
-
-        return result
-
-    def _find_map_for_value(self, value, device):
-        default = None
-        for m in self._config.get("mapping", {}):
-            if "dps_val" not in m:
-                default = m
-            if "value" in m and str(m["value"]) == str(value):
-                return m
-            if "value" not in m and "value_mirror" in m:
-                r_dps = self._entity.find_dps(m["value_mirror"])
-                if str(r_dps.get_value(device)) == str(value):
-                    return m
-
-            for c in m.get("conditions", {}):
-                if "value" in c and str(c["value"]) == str(value):
-                    return m
-                if "value" not in c and "value_mirror" in c:
-                    r_dps = self._entity.find_dps(c["value_mirror"])
-                    if str(r_dps.get_value(device)) == str(value):
-                        return m
-        return default
-
-    def _active_condition(self, mapping, device, value=None):
-        constraint = mapping.get("constraint")
-        conditions = mapping.get("conditions")
-        c_match = None
-        if constraint and conditions:
-            c_dps = self._entity.find_dps(constraint)
-            c_val = None if c_dps is None else device.get_property(c_dps.id)
-            for cond in conditions:
-                if c_val is not None and c_val == cond.get("dps_val"):
-                    c_match = cond
-                # Case where matching None, need extra checks to ensure we
-                # are not just defaulting and it is really a match
-                elif (
-                    c_val is None
-                    and c_dps is not None
-                    and "dps_val" in cond
-                    and cond.get("dps_val") is None
-                ):
-                    c_match = cond
-                # when changing, another condition may become active
-                # return that if it exists over a current condition
-                if value is not None and value == cond.get("value"):
-                    return cond
-
-        return c_match
+        return self.plan.decode(value, device)
 
     def get_values_to_set(self, device, value):
         """Return the dps values that would be set when setting to value"""
-        result = value
-        dps_map = {}
-        mapping = self._find_map_for_value(value, device)
-        if mapping:
-            replaced = False
-            scale = mapping.get("scale", 1)
-            redirect = mapping.get("value_redirect")
-            invert = mapping.get("invert", False)
-
-            if not isinstance(scale, (int, float)):
-                scale = 1
-            step = mapping.get("step")
-            if not isinstance(step, (int, float)):
-                step = None
-            if "dps_val" in mapping:
-                result = mapping["dps_val"]
-                replaced = True
-            # Conditions may have side effect of setting another value.
-            cond = self._active_condition(mapping, device, value)
-            if cond:
-                cval = cond.get("value")
-                if cval is None:
-                    r_dps = cond.get("value_mirror")
-                    if r_dps:
-                        cval = self._entity.find_dps(r_dps).get_value(device)
-
-                if cval == value:
-                    c_dps = self._entity.find_dps(mapping["constraint"])
-                    c_val = c_dps._map_from_dps(
-                        cond.get("dps_val", device.get_property(c_dps.id)),
-                        device,
-                    )
-                    dps_map.update(c_dps.get_values_to_set(device, c_val))
-
-                # Allow simple conditional mapping overrides
-                for m in cond.get("mapping", {}):
-                    if m.get("value") == value:
-                        result = m.get("dps_val", result)
-
-                scale = cond.get("scale", scale)
-                step = cond.get("step", step)
-                redirect = cond.get("value_redirect", redirect)
-
-            if redirect:
-                _LOGGER.debug(f"Redirecting {self.name} to {redirect}")
-                r_dps = self._entity.find_dps(redirect)
-                return r_dps.get_values_to_set(device, value)
-
-            if scale != 1 and isinstance(result, (int, float)):
-                _LOGGER.debug(f"Scaling {result} by {scale}")
-                result = result * scale
-                remap = self._find_map_for_value(result, device)
-                if remap and "dps_val" in remap and "dps_val" not in mapping:
-                    result = remap["dps_val"]
-                replaced = True
-
-            if invert:
-                r = self._config.get("range")
-                if r and "min" in r and "max" in r:
-                    result = -1 * result + r["min"] + r["max"]
-                    replaced = True
-
-            if step and isinstance(result, (int, float)):
-                _LOGGER.debug(f"Stepping {result} to {step}")
-                result = step * round(float(result) / step)
-                remap = self._find_map_for_value(result, device)
-                if remap and "dps_val" in remap and "dps_val" not in mapping:
-                    result = remap["dps_val"]
-                replaced = True
-
-            if replaced:
-                _LOGGER.debug(
-                    "%s: Mapped dps %s to %s from %s",
-                    self._entity._device.name,
-                    self.id,
-                    result,
-                    value,
-                )
-
-        r = self.range(device, scaled=False)
-        if r and isinstance(result, (int, float)):
-            minimum = r["min"]
-            maximum = r["max"]
-            if result < minimum or result > maximum:
-                # Output scaled values in the error message
-                r = self.range(device, scaled=True)
-                minimum = r["min"]
-                maximum = r["max"]
-                raise ValueError(
-                    f"{self.name} ({value}) must be between {minimum} and {maximum}"
-                )
-
-        dps_map[self.id] = self._correct_type(result)
-        return dps_map
+        return self.plan.encode(value, device)
 
     def icon_rule(self, device):
-        mapping = self._find_map_for_dps(device.get_property(self.id))
+        mapping = self.plan.find_for_dps(device.get_property(self.id))
         icon = None
         priority = 100
         if mapping:
-            icon = mapping.get("icon", icon)
-            priority = mapping.get("icon_priority", 10 if icon else 100)
-            cond = self._active_condition(mapping, device)
-            if cond and cond.get("icon_priority", 10) < priority:
-                icon = cond.get("icon", icon)
-                priority = cond.get("icon_priority", 10 if icon else 100)
+            icon = mapping.config.get("icon", icon)
+            priority = mapping.config.get("icon_priority", 10 if icon else 100)
+            cond = mapping.active_condition(device)
+            if cond and cond.config.get("icon_priority", 10) < priority:
+                icon = cond.config.get("icon", icon)
+                priority = cond.config.get("icon_priority", 10 if icon else 100)
 
         return {"priority": priority, "icon": icon}
 
 
 def available_configs():
     """List the available config files."""
-    _CONFIG_DIR = dirname(config_dir.__file__)
+    global _available_configs
 
-    for (path, dirs, files) in walk(_CONFIG_DIR):
-        for basename in sorted(files):
-            if fnmatch(basename, "*.yaml"):
-                yield basename
+    if _available_configs is None:
+        _CONFIG_DIR = dirname(config_dir.__file__)
+        found = []
+        for (path, dirs, files) in walk(_CONFIG_DIR):
+            for basename in sorted(files):
+                if fnmatch(basename, "*.yaml"):
+                    found.append(basename)
+        _available_configs = found
+
+    yield from _available_configs
 
 
 def possible_matches(dps):
     """Return possible matching configs for a given set of dps values."""
     for cfg in available_configs():
-        parsed = TuyaDeviceConfig(cfg)
+        parsed = _detection_config(cfg)
         if parsed.matches(dps):
             yield parsed
 
@@ -757,15 +789,24 @@ def get_config(conf_type):
     """
     Return a config to use with config_type.
     """
-    _CONFIG_DIR = dirname(config_dir.__file__)
     fname = conf_type + ".yaml"
-    fpath = join(_CONFIG_DIR, fname)
-    if exists(fpath):
-        return TuyaDeviceConfig(fname)
+    if fname in available_configs():
+        return _shared_config(fname)
     else:
         return config_for_legacy_use(conf_type)
 
 
+async def async_get_config(hass, conf_type):
+    """
+    Return a config to use with config_type, without blocking the event loop.
+    Configs that have been loaded before are served from the cache, others
+    are loaded in the executor.
+    """
+    if _available_configs is not None and f"{conf_type}.yaml" in _device_configs:
+        return get_config(conf_type)
+    return await hass.async_add_executor_job(get_config, conf_type)
+
+
 def config_for_legacy_use(conf_type):
     """
     Return a config to use with config_type for legacy transition.
@@ -774,8 +815,8 @@ def config_for_legacy_use(conf_type):
     the legacy class during the transition period.
     """
     for cfg in available_configs():
-        parsed = TuyaDeviceConfig(cfg)
+        parsed = _detection_config(cfg)
         if parsed.legacy_type == conf_type:
-            return parsed
+            return _shared_config(cfg, parsed)
 
     return None
@@ -0,0 +1,96 @@
+"""
+Cumulative energy integrated locally from the power readings of a device,
+for devices that report their power but not the energy they have used.
+"""
+from threading import Lock
+
+# Readings further apart than this are not integrated across, as the power
+# in between is unknown, such as while the device was unreachable.
+MAX_SAMPLE_GAP = 600
+
+# The key the energy sensor of a device is stored under, like config ids
+ENERGY_SENSOR_ID = "sensor_local_energy"
+
+_KW_PER_UNIT = {"W": 0.001, "kW": 1.0}
+
+
+def find_power_dps(config):
+    """
+    Return the dp that reports the power of a device in a device config,
+    with the factor that converts its values to kW, or (None, None) if
+    the device does not report power.
+    """
+    entities = [config.primary_entity, *config.secondary_entities()]
+    for entity in entities:
+        if entity.entity == "sensor" and entity.device_class == "power":
+            dp = next((d for d in entity.dps() if d.name == "sensor"), None)
+            if dp is not None and (dp.unit or "W") in _KW_PER_UNIT:
+                return dp, _KW_PER_UNIT[dp.unit or "W"]
+    for entity in entities:
+        if entity.entity == "switch":
+            dp = next((d for d in entity.dps() if d.name == "current_power_w"), None)
+            if dp is not None:
+                return dp, _KW_PER_UNIT["W"]
+    return None, None
+
+
+class EnergyMeter:
+    """
+    Integrates the power readings of a device into the energy used, in kWh.
+    Each reading is taken to hold until the next, and every reading the
+    device returns is counted, however often its entities are written.
+    """
+
+    def __init__(self, dps, device, kw_per_unit, max_gap=MAX_SAMPLE_GAP):
+        """
+        Args:
+            dps (TuyaDpsConfig): The dp that reports the power.
+            device (TuyaLocalDevice): The device, for decoding readings.
+            kw_per_unit (float): The factor to convert readings to kW.
+            max_gap (float): The longest time between readings to
+                integrate across.
+        """
+        self.dps_id = dps.id
+        self.total = 0.0
+        self._dps = dps
+        self._device = device
+        self._kw_per_unit = kw_per_unit
+        self._max_gap = max_gap
+        self._power = None
+        self._at = None
+        self._restored = False
+        self._lock = Lock()
+
+    @classmethod
+    def for_config(cls, config, device):
+        """Return a meter for the power dp in a device config, if it has one."""
+        dps, kw_per_unit = find_power_dps(config)
+        if dps is None:
+            return None
+        return cls(dps, device, kw_per_unit)
+
+    def restore(self, total):
+        """
+        Add the total from before a restart to the energy used since.
+        Only the first total restored is added.
+        """
+        with self._lock:
+            if not self._restored:
+                self.total += total
+                self._restored = True
+
+    def add(self, value, now):
+        """Add a raw power reading taken at now."""
+        power = self._dps._map_from_dps(value, self._device)
+        if not isinstance(power, (int, float)) or isinstance(power, bool):
+            return
+        with self._lock:
+            if self._power is not None and 0 < now - self._at <= self._max_gap:
+                self.total += self._power * self._kw_per_unit * (now - self._at) / 3600
+            self._power = power
+            self._at = now
+
+    def interrupt(self):
+        """Stop integrating until the next reading, as readings were lost."""
+        with self._lock:
+            self._power = None
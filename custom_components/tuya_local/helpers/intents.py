@@ -0,0 +1,93 @@
+"""
+Queue of the values set on a device that it has not yet accepted, so that
+commands survive a device being briefly unreachable.
+"""
+from threading import Lock
+
+DEFAULT_INTENT_TTL = 120
+
+
+class IntentQueue:
+    """
+    The latest value set on each dp of a device, with the time it was set,
+    kept until the device accepts it or it is too old to still be wanted.
+    Setting a dp again supersedes the value queued for it, so only the
+    latest value of each dp is ever sent.
+    """
+
+    def __init__(self, ttl=DEFAULT_INTENT_TTL):
+        """
+        Args:
+            ttl (float): The number of seconds to keep trying to send a value.
+        """
+        self.ttl = ttl
+        self._intents = {}
+        self._collapsed = 0
+        self._expired = 0
+        self._failed = 0
+        # Whether sending the queued values failed, so they are waiting for
+        # the device to respond again
+        self.stalled = False
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._intents)
+
+    def put(self, properties, now):
+        """Queue values to send, superseding any queued for the same dps."""
+        with self._lock:
+            for key, value in properties.items():
+                if self._intents.pop(key, None) is not None:
+                    self._collapsed += 1
+                self._intents[key] = (value, now)
+
+    def expire(self, now):
+        """Drop the values older than the ttl, returning them."""
+        with self._lock:
+            expired = {
+                key: value
+                for key, (value, queued_at) in self._intents.items()
+                if now - queued_at >= self.ttl
+            }
+            for key in expired:
+                del self._intents[key]
+            self._expired += len(expired)
+            if not self._intents:
+                self.stalled = False
+            return expired
+
+    def values(self):
+        """Return the queued values, oldest first."""
+        with self._lock:
+            return {key: value for key, (value, _) in self._intents.items()}
+
+    def sent(self, properties):
+        """
+        Remove the values the device accepted, unless they were superseded
+        while being sent.
+        """
+        with self._lock:
+            for key, value in properties.items():
+                intent = self._intents.get(key)
+                if intent is not None and intent[0] == value:
+                    del self._intents[key]
+            if not self._intents:
+                self.stalled = False
+
+    def failed(self):
+        """Count a failure to send the queued values, which are kept."""
+        with self._lock:
+            self._failed += 1
+            self.stalled = bool(self._intents)
+
+    def metrics(self, now):
+        """Return the depth and age of the queue, and what happened to it."""
+        with self._lock:
+            oldest = min((t for _, t in self._intents.values()), default=None)
+            return {
+                "depth": len(self._intents),
+                "oldest_age": None if oldest is None else round(now - oldest, 3),
+                "collapsed": self._collapsed,
+                "expired": self._expired,
+                "failed_sends": self._failed,
+            }
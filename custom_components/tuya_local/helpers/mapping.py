@@ -0,0 +1,432 @@
+"""
+Compilation of the mapping config of a dp into a plan for converting values.
+
+The yaml mapping of a dp is a list of dicts, each optionally with conditions
+on another dp.  Rather than looking up keys in those dicts on every read and
+write, a MappingPlan does it once, resolving the dps they refer to and the
+defaults for missing keys, and indexes the mappings by the values they match.
+"""
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+_NUMBER = (int, float)
+# Marks a key missing from a condition, which then inherits from its mapping
+_INHERIT = object()
+
+
+def _valid_range(r):
+    return r if r and "min" in r and "max" in r else None
+
+
+def _scale_range(r, s):
+    "Scale range r by factor s"
+    if s == 1:
+        return r
+    return {"min": r["min"] / s, "max": r["max"] / s}
+
+
+def _find_dps(entity, name):
+    if name is _INHERIT or not name:
+        return None
+    return entity.find_dps(name)
+
+
+class _Condition:
+    """A condition of a mapping, compiled."""
+
+    __slots__ = (
+        "config",
+        "dps_val",
+        "has_dps_val",
+        "value",
+        "has_value",
+        "invalid",
+        "scale",
+        "step",
+        "range",
+        "redirect",
+        "redirect_dps",
+        "mirror",
+        "mirror_dps",
+        "decode_map",
+        "encode_map",
+    )
+
+    def __init__(self, entity, cond):
+        self.config = cond
+        self.dps_val = cond.get("dps_val")
+        self.has_dps_val = "dps_val" in cond
+        self.value = cond.get("value")
+        self.has_value = "value" in cond
+        self.invalid = cond.get("invalid", False)
+        self.scale = cond.get("scale", _INHERIT)
+        self.step = cond.get("step", _INHERIT)
+        self.range = _valid_range(cond.get("range"))
+        self.redirect = cond.get("value_redirect", _INHERIT)
+        self.redirect_dps = _find_dps(entity, self.redirect)
+        self.mirror = cond.get("value_mirror", _INHERIT)
+        self.mirror_dps = _find_dps(entity, self.mirror)
+        submaps = cond.get("mapping", {})
+        self.decode_map = tuple(
+            (str(m.get("dps_val")), "value" in m, m.get("value")) for m in submaps
+        )
+        self.encode_map = tuple(
+            (m.get("value"), "dps_val" in m, m.get("dps_val")) for m in submaps
+        )
+
+
+class _Mapping:
+    """An entry in the mapping list of a dp, compiled."""
+
+    __slots__ = (
+        "config",
+        "dps_val",
+        "has_dps_val",
+        "value",
+        "has_value",
+        "scale",
+        "raw_scale",
+        "step",
+        "raw_step",
+        "range",
+        "invert",
+        "redirect",
+        "redirect_dps",
+        "mirror",
+        "mirror_dps",
+        "constraint_dps",
+        "conditions",
+        "all_conditions",
+    )
+
+    def __init__(self, entity, m):
+        self.config = m
+        self.dps_val = m.get("dps_val")
+        self.has_dps_val = "dps_val" in m
+        self.value = m.get("value")
+        self.has_value = "value" in m
+        self.raw_scale = m.get("scale", 1)
+        self.scale = self.raw_scale if isinstance(self.raw_scale, _NUMBER) else 1
+        self.raw_step = m.get("step", 1)
+        step = m.get("step")
+        self.step = step if isinstance(step, _NUMBER) else None
+        self.range = _valid_range(m.get("range"))
+        self.invert = m.get("invert", False)
+        self.redirect = m.get("value_redirect")
+        self.redirect_dps = _find_dps(entity, self.redirect)
+        self.mirror = m.get("value_mirror")
+        self.mirror_dps = _find_dps(entity, self.mirror)
+        constraint = m.get("constraint")
+        # Conditions without a constraint are never active, but still
+        # supply values that the dp can be set to.
+        self.all_conditions = tuple(
+            _Condition(entity, c) for c in m.get("conditions", {})
+        )
+        if constraint and self.all_conditions:
+            self.constraint_dps = entity.find_dps(constraint)
+            self.conditions = self.all_conditions
+        else:
+            self.constraint_dps = None
+            self.conditions = ()
+
+    def active_condition(self, device, value=None):
+        """Return the condition that applies given the device state."""
+        c_match = None
+        if self.conditions:
+            c_dps = self.constraint_dps
+            c_val = None if c_dps is None else device.get_property(c_dps.id)
+            for cond in self.conditions:
+                if c_val is not None and c_val == cond.dps_val:
+                    c_match = cond
+                # Case where matching None, need extra checks to ensure we
+                # are not just defaulting and it is really a match
+                elif (
+                    c_val is None
+                    and c_dps is not None
+                    and cond.has_dps_val
+                    and cond.dps_val is None
+                ):
+                    c_match = cond
+                # when changing, another condition may become active
+                # return that if it exists over a current condition
+                if value is not None and value == cond.value:
+                    return cond
+        return c_match
+
+
+class MappingPlan:
+    """
+    The mapping of a dp compiled for decoding values read from the device
+    and encoding values to be sent to it.  Behaves the same as interpreting
+    the yaml config of the dp on each call, as tests/test_mapping.py checks.
+    """
+
+    def __init__(self, dps):
+        """
+        Args:
+            dps (TuyaDpsConfig): The dp to compile the mapping of.
+        """
+        entity = dps._entity
+        config = dps._config
+        self._dps = dps
+        self._type = dps.type
+        self._range = _valid_range(config.get("range"))
+        self._invert_sum = (
+            None if self._range is None else self._range["min"] + self._range["max"]
+        )
+        self.mappings = tuple(_Mapping(entity, m) for m in config.get("mapping", {}))
+        self._by_config = {id(m.config): m for m in self.mappings}
+
+        default = None
+        for m in self.mappings:
+            if not m.has_dps_val:
+                default = m
+        self._default = default
+
+        # Index the mappings by the dps values they match.  Bitfields match
+        # on bits rather than the whole value, so are searched in order.
+        self._bitfield = dps.rawtype == "bitfield"
+        self._by_dps_val = {}
+        for m in self.mappings:
+            if m.has_dps_val:
+                self._by_dps_val.setdefault(str(m.dps_val), m)
+
+        # Index the mappings by the values they produce, unless any values
+        # come from mirroring another dp, which have to be searched in order.
+        self._by_value = {}
+        mirrored = False
+        for m in self.mappings:
+            if m.has_value:
+                self._by_value.setdefault(str(m.value), m)
+            elif m.mirror:
+                mirrored = True
+            for c in m.all_conditions:
+                if c.has_value:
+                    self._by_value.setdefault(str(c.value), m)
+                elif c.mirror is not _INHERIT and c.mirror:
+                    mirrored = True
+        self._mirrored = mirrored
+
+    def for_config(self, mapping):
+        """Return the compiled mapping for a mapping dict of the dp."""
+        return self._by_config.get(id(mapping))
+
+    def find_for_dps(self, value):
+        """Return the mapping that applies to a value read from the device."""
+        if self._bitfield:
+            for m in self.mappings:
+                if m.has_dps_val and self._match_bits(m.dps_val, value):
+                    return m
+            return self._default
+        return self._by_dps_val.get(str(value), self._default)
+
+    @staticmethod
+    def _match_bits(matchdata, value):
+        if matchdata:
+            try:
+                return (int(value) & int(matchdata)) != 0
+            except (TypeError, ValueError):
+                return False
+        return str(value) == str(matchdata)
+
+    def find_for_value(self, value, device):
+        """Return the mapping that produces a value to be set."""
+        if not self._mirrored:
+            return self._by_value.get(str(value), self._default)
+        sval = str(value)
+        for m in self.mappings:
+            if m.has_value and str(m.value) == sval:
+                return m
+            if not m.has_value and m.mirror:
+                if str(m.mirror_dps.get_value(device)) == sval:
+                    return m
+            for c in m.all_conditions:
+                if c.has_value and str(c.value) == sval:
+                    return m
+                if not c.has_value and c.mirror is not _INHERIT and c.mirror:
+                    if str(c.mirror_dps.get_value(device)) == sval:
+                        return m
+        return self._default
+
+    def decode(self, value, device):
+        """Return the value to report for a value read from the device."""
+        dps = self._dps
+        t = self._type
+        if value is not None and t is not str and isinstance(value, str):
+            try:
+                value = t(value)
+            except ValueError:
+                pass
+
+        if not self.mappings:
+            return value
+        m = self.find_for_dps(value)
+        if m is None:
+            return value
+
+        result = m.value if m.has_value else value
+        replaced = m.has_value
+        scale = m.scale
+        redirect, redirect_dps = m.redirect, m.redirect_dps
+        mirror, mirror_dps = m.mirror, m.mirror_dps
+        cond = m.active_condition(device)
+        if cond:
+            if cond.invalid:
+                return None
+            if cond.has_value:
+                replaced = True
+                result = cond.value
+            if cond.scale is not _INHERIT:
+                scale = cond.scale
+            if cond.redirect is not _INHERIT:
+                redirect, redirect_dps = cond.redirect, cond.redirect_dps
+            if cond.mirror is not _INHERIT:
+                mirror, mirror_dps = cond.mirror, cond.mirror_dps
+            for dps_val, has_value, v in cond.decode_map:
+                if dps_val == str(result):
+                    replaced = has_value
+                    if has_value:
+                        result = v
+
+        if redirect:
+            _LOGGER.debug(f"Redirecting {dps.name} to {redirect}")
+            return redirect_dps.get_value(device)
+        if mirror:
+            return mirror_dps.get_value(device)
+
+        if m.invert and isinstance(result, _NUMBER) and self._invert_sum is not None:
+            result = -1 * result + self._invert_sum
+            replaced = True
+
+        if scale != 1 and isinstance(result, _NUMBER):
+            result = result / scale
+            replaced = True
+
+        if replaced and _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(
+                "%s: Mapped dps %s value from %s to %s",
+                dps._entity._device.name,
+                dps.id,
+                value,
+                result,
+            )
+        return result
+
+    def encode(self, value, device):
+        """Return the dps to set on the device to set the dp to value."""
+        dps = self._dps
+        result = value
+        dps_map = {}
+        m = self.find_for_value(value, device)
+        if m:
+            replaced = False
+            scale = m.scale
+            step = m.step
+            redirect, redirect_dps = m.redirect, m.redirect_dps
+            if m.has_dps_val:
+                result = m.dps_val
+                replaced = True
+            # Conditions may have side effect of setting another value.
+            cond = m.active_condition(device, value)
+            if cond:
+                cval = cond.value
+                if cval is None and cond.mirror is not _INHERIT and cond.mirror:
+                    cval = cond.mirror_dps.get_value(device)
+
+                if cval == value:
+                    c_dps = m.constraint_dps
+                    c_val = c_dps._map_from_dps(
+                        cond.dps_val
+                        if cond.has_dps_val
+                        else device.get_property(c_dps.id),
+                        device,
+                    )
+                    dps_map.update(c_dps.get_values_to_set(device, c_val))
+
+                # Allow simple conditional mapping overrides
+                for v, has_dps_val, dps_val in cond.encode_map:
+                    if v == value and has_dps_val:
+                        result = dps_val
+
+                if cond.scale is not _INHERIT:
+                    scale = cond.scale
+                if cond.step is not _INHERIT:
+                    step = cond.step
+                if cond.redirect is not _INHERIT:
+                    redirect, redirect_dps = cond.redirect, cond.redirect_dps
+
+            if redirect:
+                _LOGGER.debug(f"Redirecting {dps.name} to {redirect}")
+                return redirect_dps.get_values_to_set(device, value)
+
+            if scale != 1 and isinstance(result, _NUMBER):
+                result = result * scale
+                remap = self.find_for_value(result, device)
+                if remap and remap.has_dps_val and not m.has_dps_val:
+                    result = remap.dps_val
+                replaced = True
+
+            if m.invert and self._invert_sum is not None:
+                result = -1 * result + self._invert_sum
+                replaced = True
+
+            if step and isinstance(result, _NUMBER):
+                result = step * round(float(result) / step)
+                remap = self.find_for_value(result, device)
+                if remap and remap.has_dps_val and not m.has_dps_val:
+                    result = remap.dps_val
+                replaced = True
+
+            if replaced and _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug(
+                    "%s: Mapped dps %s to %s from %s",
+                    dps._entity._device.name,
+                    dps.id,
+                    result,
+                    value,
+                )
+
+        if isinstance(result, _NUMBER):
+            r = self.range(device, scaled=False)
+            if r and (result < r["min"] or result > r["max"]):
+                # Output scaled values in the error message
+                r = self.range(device, scaled=True)
+                raise ValueError(
+                    f"{dps.name} ({value}) must be between {r['min']} and {r['max']}"
+                )
+
+        dps_map[dps.id] = dps._correct_type(result, device)
+        return dps_map
+
+    def range(self, device, scaled=True):
+        """Return the range of the dp given the device state."""
+        scale = 1
+        m = self.find_for_dps(device.get_property(self._dps.id))
+        if m:
+            if scaled:
+                scale = m.raw_scale
+            cond = m.active_condition(device)
+            if cond and cond.range:
+                return _scale_range(cond.range, scale)
+            if m.range:
+                return _scale_range(m.range, scale)
+        if self._range:
+            return _scale_range(self._range, scale)
+        return None
+
+    def step(self, device, scaled=True):
+        """Return the step of the dp given the device state."""
+        step = 1
+        scale = 1
+        m = self.find_for_dps(device.get_property(self._dps.id))
+        if m:
+            step = m.raw_step
+            scale = m.raw_scale
+            cond = m.active_condition(device)
+            if cond:
+                if cond.step is not _INHERIT:
+                    step = cond.step
+                if cond.scale is not _INHERIT:
+                    scale = cond.scale
+        return step / scale if scaled else step
@@ -7,8 +7,12 @@ from homeassistant.const import (
     CONCENTRATION_MICROGRAMS_PER_CUBIC_METER,
     UnitOfTemperature,
 )
+from homeassistant.core import callback
 from homeassistant.helpers.entity import EntityCategory
 
+from .resolver import EntityResolver
+from .state import DeviceState
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -26,9 +30,39 @@ class TuyaLocalEntity:
             if not d.hidden:
                 self._attr_dps.append(d)
 
+    def _resolve(self):
+        """
+        Return the dps of the entity resolved against the device state.
+        While state is being written, every property shares one snapshot,
+        which is reused afterwards until the device state changes.  State
+        with pending updates expires over time, so it is always resolved.
+        """
+        version = self._device.state_version
+        resolver = getattr(self, "_resolver", None)
+        if resolver is None:
+            resolver = self._resolver = EntityResolver(self._config, self._device)
+        elif not getattr(self, "_writing_state", False) and not (
+            version is getattr(self, "_resolved_version", None)
+            and isinstance(version, DeviceState)
+            and not version.pending
+        ):
+            resolver.refresh(self._device)
+        self._resolved_version = version
+        return resolver
+
+    @callback
+    def async_write_ha_state(self):
+        self._resolve()
+        self._writing_state = True
+        try:
+            super().async_write_ha_state()
+        finally:
+            self._writing_state = False
+
     @property
     def should_poll(self):
-        return True
+        # The device polls on an adaptive interval and updates its entities
+        return False
 
     @property
     def available(self):
@@ -75,12 +109,21 @@ class TuyaLocalEntity:
     def extra_state_attributes(self):
         """Get additional attributes that the platform itself does not support."""
         attr = {}
+        resolver = self._resolve()
         for a in self._attr_dps:
-            value = a.get_value(self._device)
+            value = resolver.get(a)
             if value is not None or not a.optional:
                 attr[a.name] = value
         return attr
 
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+        self._device.register_entity(self, [d.id for d in self._config.dps()])
+
+    async def async_will_remove_from_hass(self):
+        await super().async_will_remove_from_hass()
+        self._device.unregister_entity(self)
+
     async def async_update(self):
         await self._device.async_refresh()
 
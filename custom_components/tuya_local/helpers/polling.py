@@ -0,0 +1,101 @@
+"""
+Adaptive poll interval for Tuya Local devices.
+"""
+from time import time
+
+DEFAULT_POLL_INTERVAL_MIN = 5
+DEFAULT_POLL_INTERVAL_MAX = 120
+DEFAULT_POLL_INTERVAL = 30
+
+# How much to narrow the interval when a change is seen, and widen it when
+# nothing changed.  Narrowing quickly and widening slowly means a device
+# that starts changing is tracked closely almost immediately.
+NARROW_FACTOR = 0.5
+WIDEN_FACTOR = 1.25
+
+# How long to poll at the minimum interval after a command is sent.
+WRITE_BOOST_DURATION = 30
+
+# Poll classes that device configs can declare for each dp.  Fast dps are
+# refreshed on every poll, other dps are refreshed by a full status query
+# once the last one is older than the maximum age for their class.
+POLL_FAST = "fast"
+POLL_NORMAL = "normal"
+POLL_SLOW = "slow"
+POLL_CLASS_MAX_AGE = {
+    POLL_FAST: 0,
+    POLL_NORMAL: 60,
+    POLL_SLOW: 600,
+}
+
+
+def full_refresh_age(poll_classes):
+    """
+    Return the maximum age of a full status query for a device whose dps
+    have the given poll classes, or 0 if every poll must be a full query.
+    """
+    fast = [dp for dp, cls in poll_classes.items() if cls == POLL_FAST]
+    if not fast:
+        return 0
+    return min(
+        (
+            POLL_CLASS_MAX_AGE.get(cls, 0)
+            for cls in poll_classes.values()
+            if cls != POLL_FAST
+        ),
+        default=POLL_CLASS_MAX_AGE[POLL_SLOW],
+    )
+
+
+class AdaptivePollInterval:
+    """
+    Track how often a device's state changes between refreshes, and adapt
+    the interval between refreshes to match, within the given bounds.
+    """
+
+    def __init__(
+        self,
+        minimum=DEFAULT_POLL_INTERVAL_MIN,
+        maximum=DEFAULT_POLL_INTERVAL_MAX,
+    ):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self._interval = min(max(DEFAULT_POLL_INTERVAL, self.minimum), self.maximum)
+        self._boost_until = 0
+        self.refreshes = 0
+        self.changes = 0
+
+    @property
+    def interval(self):
+        """Return the number of seconds until the next poll."""
+        if time() < self._boost_until:
+            return self.minimum
+        return self._interval
+
+    @property
+    def change_rate(self):
+        """Return the proportion of refreshes that returned changed dps."""
+        return self.changes / self.refreshes if self.refreshes else None
+
+    def observe(self, changed):
+        """Adapt the interval after a refresh that did or did not see changes."""
+        self.refreshes += 1
+        if changed:
+            self.changes += 1
+            self._interval = max(self.minimum, self._interval * NARROW_FACTOR)
+        else:
+            self._interval = min(self.maximum, self._interval * WIDEN_FACTOR)
+
+    def boost(self, duration=WRITE_BOOST_DURATION):
+        """Poll at the minimum interval for a while, such as after a write."""
+        self._boost_until = time() + duration
+
+    def as_dict(self):
+        """Return the current state for diagnostics."""
+        rate = self.change_rate
+        return {
+            "interval": round(self.interval, 2),
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+            "change_rate": None if rate is None else round(rate, 3),
+        }
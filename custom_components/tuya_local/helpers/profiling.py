@@ -0,0 +1,176 @@
+"""
+Opt-in profiling of the integration setup path.
+"""
+from contextlib import contextmanager, nullcontext
+import logging
+from time import monotonic
+
+from ..const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_PROFILER = f"{DOMAIN}_profiler"
+
+FIRST_REFRESH = "first_refresh"
+
+
+class SetupTimeline:
+    """Timeline of the setup phases for a single config entry."""
+
+    def __init__(self, name, on_complete=None):
+        self.name = name
+        self._started = monotonic()
+        self._phases = []
+        self._on_complete = on_complete
+
+    @contextmanager
+    def phase(self, name):
+        """Context manager to time a phase of setup."""
+        start = monotonic()
+        try:
+            yield
+        finally:
+            self.record(name, start, monotonic())
+
+    def record(self, name, start, end):
+        """Record a phase that ran from start to end (monotonic seconds)."""
+        self._phases.append((name, start - self._started, end - start))
+        if name == FIRST_REFRESH and self._on_complete:
+            self._on_complete()
+
+    @property
+    def complete(self):
+        """Return True once the first refresh of the device has finished."""
+        return any(p[0] == FIRST_REFRESH for p in self._phases)
+
+    @property
+    def total(self):
+        """Return the total time spent in recorded phases."""
+        return sum(p[2] for p in self._phases)
+
+    def durations(self):
+        """Return the total duration of each phase."""
+        result = {}
+        for name, offset, duration in self._phases:
+            result[name] = result.get(name, 0) + duration
+        return result
+
+    def as_dict(self):
+        """Return the timeline in a form suitable for diagnostics."""
+        return {
+            "name": self.name,
+            "total": round(self.total, 4),
+            "phases": [
+                {
+                    "phase": name,
+                    "offset": round(offset, 4),
+                    "duration": round(duration, 4),
+                }
+                for name, offset, duration in self._phases
+            ],
+        }
+
+
+class _NullTimeline:
+    """Stand in for SetupTimeline when profiling is disabled."""
+
+    name = None
+    complete = False
+
+    def phase(self, name):
+        return nullcontext()
+
+    def record(self, name, start, end):
+        pass
+
+
+NULL_TIMELINE = _NullTimeline()
+
+
+class StartupProfiler:
+    """Collects setup timelines for all config entries."""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._timelines = {}
+        self._summary_logged = False
+
+    def timeline(self, entry):
+        """Return the timeline for a config entry, creating it if needed."""
+        if not self.enabled:
+            return NULL_TIMELINE
+        timeline = self._timelines.get(entry.entry_id)
+        if timeline is None:
+            timeline = SetupTimeline(entry.title, self._timeline_complete)
+            self._timelines[entry.entry_id] = timeline
+            self._summary_logged = False
+        return timeline
+
+    def get(self, entry_id):
+        """Return the timeline for entry_id if one was recorded."""
+        return self._timelines.get(entry_id)
+
+    def slowest_entries(self, count=5):
+        """Return the count slowest entries as (name, total) tuples."""
+        ranked = sorted(self._timelines.values(), key=lambda t: t.total, reverse=True)
+        return [(t.name, round(t.total, 4)) for t in ranked[:count]]
+
+    def slowest_phases(self, count=5):
+        """
+        Return the count most expensive phases, summed over all entries,
+        with the worst entry for each phase.
+        """
+        phases = {}
+        for timeline in self._timelines.values():
+            for name, duration in timeline.durations().items():
+                total, worst, worst_name = phases.get(name, (0, 0, None))
+                if duration > worst:
+                    worst, worst_name = duration, timeline.name
+                phases[name] = (total + duration, worst, worst_name)
+        ranked = sorted(phases.items(), key=lambda p: p[1][0], reverse=True)
+        return [
+            {
+                "phase": name,
+                "total": round(total, 4),
+                "worst": round(worst, 4),
+                "worst_entry": worst_name,
+            }
+            for name, (total, worst, worst_name) in ranked[:count]
+        ]
+
+    def summary(self):
+        """Return a summary of the slowest entries and phases."""
+        return {
+            "entries": len(self._timelines),
+            "slowest_entries": self.slowest_entries(),
+            "slowest_phases": self.slowest_phases(),
+        }
+
+    def log_summary(self):
+        """Log a summary of the startup profile at debug level."""
+        summary = self.summary()
+        _LOGGER.debug(
+            "Startup profile for %d entries. Slowest entries: %s. Slowest phases: %s",
+            summary["entries"],
+            ", ".join(f"{n} ({t:.3f}s)" for n, t in summary["slowest_entries"]),
+            ", ".join(
+                f"{p['phase']} ({p['total']:.3f}s, worst {p['worst_entry']})"
+                for p in summary["slowest_phases"]
+            ),
+        )
+
+    def _timeline_complete(self):
+        if self._summary_logged:
+            return
+        if all(t.complete for t in self._timelines.values()):
+            self._summary_logged = True
+            self.log_summary()
+
+
+def get_profiler(hass):
+    """Return the startup profiler for hass, disabled if not configured."""
+    profiler = hass.data.get(DATA_PROFILER)
+    if profiler is None:
+        profiler = StartupProfiler()
+        hass.data[DATA_PROFILER] = profiler
+    return profiler
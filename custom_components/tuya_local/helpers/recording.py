@@ -0,0 +1,138 @@
+"""
+Recording of the traffic to and from a device, and replaying it.
+
+A recording is an append-only file with one compact json record per line,
+holding the time since recording started, the kind of record and its data:
+
+    [12.402,"status",{"dps":{"1":true,"2":21}}]
+
+Kinds recorded are status and updatedps responses, control payloads sent
+to the device and any frames it replied to them with.
+"""
+import json
+import logging
+import os
+from threading import Lock
+from time import monotonic, sleep
+
+import tinytuya
+
+_LOGGER = logging.getLogger(__name__)
+
+STATUS = "status"
+UPDATEDPS = "updatedps"
+CONTROL = "control"
+REPLY = "reply"
+
+
+class TrafficRecorder:
+    """Appends records of a device's traffic to a file."""
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): The file to append to, created with its directory
+                the first time a record is written.
+        """
+        self.path = path
+        self._file = None
+        self._start = monotonic()
+        self._lock = Lock()
+
+    def record(self, kind, data):
+        """Append a record.  Called from executor threads."""
+        line = json.dumps(
+            [round(monotonic() - self._start, 3), kind, data],
+            separators=(",", ":"),
+            default=str,
+        )
+        with self._lock:
+            try:
+                if self._file is None:
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                    self._file = open(self.path, "a", encoding="utf-8")
+                self._file.write(line + "\n")
+                self._file.flush()
+            except OSError as e:
+                _LOGGER.warning(f"Unable to record device traffic to {self.path}: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_recording(path):
+    """Yield the (time, kind, data) records of a recording."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                t, kind, data = json.loads(line)
+                yield t, kind, data
+
+
+class ReplayTransport:
+    """
+    Stands in for the tinytuya device of a TuyaLocalDevice, answering status
+    and updatedps requests with the responses from a recording.  Each
+    response is held back until the time it was recorded at, scaled by
+    speed, so a recording can be played back at real or accelerated speed,
+    or as fast as possible with a speed of 0.  Control payloads sent are
+    kept in sent, to compare with those recorded.
+    """
+
+    def __init__(self, path, speed=1.0, id="replay"):
+        self.id = id
+        self.connection_timeout = 5
+        self.socketRetryLimit = 5
+        self.version = None
+        self.speed = speed
+        self.sent = []
+        self._responses = {STATUS: [], UPDATEDPS: []}
+        for t, kind, data in read_recording(path):
+            if kind in self._responses:
+                self._responses[kind].append((t, data))
+        self._start = None
+
+    @property
+    def remaining(self):
+        """Return the number of responses not yet replayed."""
+        return sum(len(r) for r in self._responses.values())
+
+    def _next(self, kind):
+        if self._start is None:
+            self._start = monotonic()
+        responses = self._responses[kind]
+        if not responses:
+            raise EOFError(f"No {kind} responses left to replay")
+        t, data = responses.pop(0)
+        if self.speed:
+            delay = self._start + t / self.speed - monotonic()
+            if delay > 0:
+                sleep(delay)
+        return data
+
+    def status(self):
+        return self._next(STATUS)
+
+    def updatedps(self, index=None):
+        return self._next(UPDATEDPS)
+
+    def generate_payload(self, command, data=None):
+        return (command, data)
+
+    def _send_receive(self, payload):
+        command, data = payload
+        if command == tinytuya.CONTROL:
+            self.sent.append(data)
+        return None
+
+    def set_version(self, version):
+        self.version = version
+
+    def set_socketTimeout(self, timeout):
+        self.connection_timeout = timeout
+
+    def set_socketRetryLimit(self, limit):
+        self.socketRetryLimit = limit
@@ -0,0 +1,92 @@
+"""
+Resolution of all the dps of an entity against one snapshot of device state.
+"""
+
+
+class StateSnapshot:
+    """
+    A copy of the dps an entity uses, taken from the device at one time.
+    Dps configs read it in place of the device, so everything resolved
+    against it agrees, even if the device state changes part way through.
+    """
+
+    def __init__(self, device, ids):
+        self.name = device.name
+        self._state = {i: device.get_property(i) for i in ids}
+
+    def get_property(self, dps_id):
+        return self._state.get(dps_id)
+
+
+class EntityResolver:
+    """
+    The values of all the dps of an entity, evaluated in one pass against
+    a snapshot of the device state.  The possible values, range and step
+    of a dps are evaluated the first time they are asked for, and then
+    reused until a dp they depend on changes.
+    """
+
+    def __init__(self, config, device):
+        """
+        Args:
+            config (TuyaEntityConfig): The entity config to resolve.
+            device (TuyaLocalDevice): The device to take the snapshot from.
+        """
+        graph = config.dependency_graph
+        position = {dp_id: i for i, dp_id in enumerate(graph.order)}
+        self._graph = graph
+        # Dps that take their values from others are evaluated after them
+        self._dps = sorted(config.dps(), key=lambda d: position.get(d.id, 0))
+        self._ids = {d.id for d in self._dps}
+        self._id_of = {d.name: d.id for d in self._dps}
+        self.snapshot = StateSnapshot(device, self._ids)
+        self._values = {d.name: d.get_value(self.snapshot) for d in self._dps}
+        self._derived = {}
+
+    def refresh(self, device):
+        """
+        Take a new snapshot of the device state, evaluating again only the
+        dps affected by those that changed.  Returns the ids that changed.
+        """
+        snapshot = StateSnapshot(device, self._ids)
+        old = self.snapshot
+        changed = {
+            i for i in self._ids if snapshot.get_property(i) != old.get_property(i)
+        }
+        self.snapshot = snapshot
+        if changed:
+            affected = self._graph.affected(changed)
+            for d in self._dps:
+                if d.id in affected:
+                    self._values[d.name] = d.get_value(snapshot)
+            self._derived = {
+                k: v
+                for k, v in self._derived.items()
+                if self._id_of.get(k[1]) not in affected
+            }
+        return changed
+
+    def get(self, dps):
+        """Return the value of a dps."""
+        try:
+            return self._values[dps.name]
+        except KeyError:
+            return dps.get_value(self.snapshot)
+
+    def _derive(self, kind, dps, fn):
+        key = (kind, dps.name)
+        if key not in self._derived:
+            self._derived[key] = fn(self.snapshot)
+        return self._derived[key]
+
+    def values(self, dps):
+        """Return the possible values of a dps."""
+        return self._derive("values", dps, dps.values)
+
+    def range(self, dps):
+        """Return the range of a dps."""
+        return self._derive("range", dps, dps.range)
+
+    def step(self, dps):
+        """Return the step of a dps."""
+        return self._derive("step", dps, dps.step)
@@ -0,0 +1,123 @@
+"""
+Scheduler for the first refresh of devices at startup.
+"""
+from heapq import heappop, heappush
+from itertools import count
+import logging
+from time import monotonic
+
+from homeassistant.core import callback
+from homeassistant.helpers.storage import Store
+
+from ..const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_STARTUP = f"{DOMAIN}_startup"
+STORAGE_KEY = f"{DOMAIN}.startup"
+STORAGE_VERSION = 1
+SAVE_DELAY = 30
+
+DEFAULT_STARTUP_CONCURRENCY = 8
+DEFAULT_STARTUP_TIMEOUT = 3
+
+# Priority classes for devices in the queue
+_RESPONSIVE = 0
+_UNKNOWN = 1
+_UNREACHABLE = 2
+
+
+class StartupRefreshScheduler:
+    """
+    Refresh newly set up devices with bounded concurrency.
+    Devices that responded quickly last time are refreshed first, devices
+    that have not been seen before next, and devices that were unreachable
+    last time go to the back of the queue.
+    """
+
+    def __init__(
+        self,
+        hass,
+        concurrency=DEFAULT_STARTUP_CONCURRENCY,
+        timeout=DEFAULT_STARTUP_TIMEOUT,
+    ):
+        self._hass = hass
+        self._concurrency = concurrency
+        self._timeout = timeout
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        # Latency of the last startup refresh per device, None if it failed
+        self._history = {}
+        self._queue = []
+        self._sequence = count()
+        self._workers = 0
+
+    async def async_load(self):
+        """Load the responsiveness history from the last startup."""
+        self._history = await self._store.async_load() or {}
+
+    def priority(self, device_id):
+        """Return the sort key for a device based on its history."""
+        if device_id not in self._history:
+            return (_UNKNOWN, 0)
+        latency = self._history[device_id]
+        if latency is None:
+            return (_UNREACHABLE, 0)
+        return (_RESPONSIVE, latency)
+
+    @property
+    def timeout(self):
+        """Return the connection timeout used for startup refreshes."""
+        return self._timeout
+
+    @property
+    def pending(self):
+        """Return the number of devices waiting for their first refresh."""
+        return len(self._queue)
+
+    @callback
+    def async_schedule(self, device_id, device):
+        """Queue a device for its first refresh."""
+        heappush(
+            self._queue,
+            (self.priority(device_id), next(self._sequence), device_id, device),
+        )
+        while self._workers < min(self._concurrency, len(self._queue)):
+            self._workers += 1
+            self._hass.async_create_task(self._async_worker())
+
+    async def _async_worker(self):
+        try:
+            while self._queue:
+                _, _, device_id, device = heappop(self._queue)
+                await self._async_refresh(device_id, device)
+        finally:
+            self._workers -= 1
+
+    async def _async_refresh(self, device_id, device):
+        if device.has_returned_state:
+            # An entity update got there first
+            return
+        start = monotonic()
+        try:
+            responded = await device.async_startup_refresh(self._timeout)
+        except Exception:
+            _LOGGER.exception(f"Startup refresh of {device.name} failed")
+            responded = False
+        if responded:
+            self._history[device_id] = round(monotonic() - start, 3)
+        else:
+            _LOGGER.warning(
+                f"{device.name} did not respond at startup, it will be "
+                "unavailable until it responds to a later update."
+            )
+            self._history[device_id] = None
+        self._store.async_delay_save(lambda: self._history, SAVE_DELAY)
+
+
+def get_startup_scheduler(hass):
+    """Return the startup scheduler for hass, creating a default if needed."""
+    scheduler = hass.data.get(DATA_STARTUP)
+    if scheduler is None:
+        scheduler = StartupRefreshScheduler(hass)
+        hass.data[DATA_STARTUP] = scheduler
+    return scheduler
@@ -0,0 +1,143 @@
+"""
+Versions of the state of a device, shared between the event loop and the
+threads that talk to the device.
+"""
+from threading import Lock
+from types import MappingProxyType
+
+
+def _read_only(mapping):
+    if isinstance(mapping, MappingProxyType):
+        return mapping
+    return MappingProxyType(mapping)
+
+
+class DeviceState:
+    """
+    One version of the state of a device: the dps it last returned, with
+    the time they were updated at, and the values set on it that it may not
+    have reported yet, with the time each was set or sent.  A version is
+    never modified once published, so it can be read without locking.
+    """
+
+    __slots__ = ("dps", "pending")
+
+    def __init__(self, dps, pending):
+        """
+        Args:
+            dps (dict): The dps, including updated_at.  Not copied, so it
+                must not be modified afterwards.
+            pending (dict): The pending updates, as (value, updated_at)
+                tuples by dp id.  Not copied either.
+        """
+        self.dps = _read_only(dps)
+        self.pending = _read_only(pending)
+
+    def pending_values(self, now, timeout):
+        """Return the pending values that have not expired."""
+        return {
+            key: value
+            for key, (value, updated_at) in self.pending.items()
+            if now - updated_at < timeout
+        }
+
+    def merged(self, now, timeout):
+        """Return a new dict of the dps with the pending values overlaid."""
+        if not self.pending:
+            return dict(self.dps)
+        return {**self.dps, **self.pending_values(now, timeout)}
+
+    def get(self, dps_id, now, timeout):
+        """Return the value of a dp, or its pending value if there is one."""
+        pending = self.pending.get(dps_id)
+        if pending is not None and now - pending[1] < timeout:
+            return pending[0]
+        return self.dps.get(dps_id)
+
+
+EMPTY_STATE = DeviceState({"updated_at": 0}, {})
+
+
+class StateStore:
+    """
+    Holds the current version of a device's state.  Writers build a new
+    version from the current one and publish it by rebinding current, one
+    writer at a time so that no update is lost.  Readers take current once
+    and use that version throughout, without locking.
+    """
+
+    def __init__(self):
+        self.current = EMPTY_STATE
+        self._lock = Lock()
+
+    def reset(self):
+        with self._lock:
+            self.current = EMPTY_STATE
+
+    def replace(self, dps=None, pending=None):
+        """Publish a version with dps or pending replaced by copies of those given."""
+        with self._lock:
+            state = self.current
+            self.current = DeviceState(
+                state.dps if dps is None else dict(dps),
+                state.pending if pending is None else dict(pending),
+            )
+
+    def merge(self, dps, updated_at):
+        """Publish a version with dps merged in, returning the previous one."""
+        with self._lock:
+            state = self.current
+            self.current = DeviceState(
+                {**state.dps, **dps, "updated_at": updated_at}, state.pending
+            )
+            return state
+
+    def set_value(self, dps_id, value):
+        """Publish a version with a single dp set."""
+        with self._lock:
+            state = self.current
+            self.current = DeviceState({**state.dps, dps_id: value}, state.pending)
+
+    def touch(self, updated_at):
+        """Publish a version with the dps marked as updated at updated_at."""
+        self.set_value("updated_at", updated_at)
+
+    def add_pending(self, properties, now):
+        """Publish a version with properties pending from now."""
+        with self._lock:
+            state = self.current
+            pending = dict(state.pending)
+            for key, value in properties.items():
+                pending[key] = (value, now)
+            self.current = DeviceState(state.dps, pending)
+
+    def mark_sent(self, now):
+        """
+        Publish a version with the dps due to be refreshed, and the pending
+        values kept until the timeout from now, after sending them.
+        """
+        with self._lock:
+            state = self.current
+            self.current = DeviceState(
+                {**state.dps, "updated_at": 0},
+                {key: (value, now) for key, (value, _) in state.pending.items()},
+            )
+
+    def expire_pending(self, now, timeout):
+        """
+        Publish a version without the pending values that have expired,
+        returning the expired values.
+        """
+        with self._lock:
+            state = self.current
+            expired = {
+                key: value
+                for key, (value, updated_at) in state.pending.items()
+                if now - updated_at >= timeout
+            }
+            if expired:
+                self.current = DeviceState(
+                    state.dps,
+                    {k: v for k, v in state.pending.items() if k not in expired},
+                )
+            return expired
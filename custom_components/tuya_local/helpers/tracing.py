@@ -0,0 +1,73 @@
+"""
+Opt-in trace of what a device has been doing, for diagnosing problems with
+a single device without turning on debug logging for the whole integration.
+"""
+from collections import deque
+from time import time
+
+DEFAULT_TRACE_SIZE = 200
+
+REFRESH = "refresh"
+SEND = "send"
+RETRY = "retry"
+ROTATION = "rotation"
+PENDING_EXPIRY = "pending_expiry"
+INTENT_EXPIRY = "intent_expiry"
+
+_PLAIN_TYPES = (str, int, float, bool, type(None))
+
+
+def _plain(value):
+    """Return value in a form that can be serialised for diagnostics."""
+    if isinstance(value, _PLAIN_TYPES):
+        return value
+    if isinstance(value, dict):
+        return {str(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    return str(value)
+
+
+class DeviceTrace:
+    """
+    The most recent events of a device, held in a ring buffer.  Events are
+    stored as given, and only converted when the trace is dumped, so
+    recording one costs little more than appending a tuple.
+    """
+
+    enabled = True
+
+    def __init__(self, size=DEFAULT_TRACE_SIZE):
+        self._events = deque(maxlen=size)
+
+    def __len__(self):
+        return len(self._events)
+
+    def record(self, event, **data):
+        """Record an event.  The data must not be modified afterwards."""
+        self._events.append((time(), event, data))
+
+    def as_list(self):
+        """Return the events, oldest first, in a form suitable for diagnostics."""
+        return [
+            {"time": round(t, 3), "event": event, **_plain(data)}
+            for t, event, data in list(self._events)
+        ]
+
+
+class _NullTrace:
+    """Stand in for DeviceTrace when tracing is disabled."""
+
+    enabled = False
+
+    def __len__(self):
+        return 0
+
+    def record(self, event, **data):
+        pass
+
+    def as_list(self):
+        return []
+
+
+NULL_TRACE = _NullTrace()
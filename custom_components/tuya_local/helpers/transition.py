@@ -0,0 +1,115 @@
+"""
+Streaming of transitions to lights as a paced series of frames.
+"""
+import asyncio
+import logging
+from time import monotonic
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_TRANSITION_FRAME_RATE = 5
+
+
+def interpolate(start, end, fraction):
+    """
+    Return the value fraction of the way from start to end, rounded to an
+    integer.  Tuples such as colors are interpolated element by element.
+    """
+    if isinstance(end, tuple):
+        return tuple(interpolate(s, e, fraction) for s, e in zip(start, end))
+    return round(start + (end - start) * fraction)
+
+
+class TransitionEngine:
+    """
+    Streams a transition between two light states to a device.
+
+    Each frame is rendered from the values for the time it is sent, and
+    the next frame is only started once the device has accepted the last,
+    so a slow device is sent fewer frames rather than falling behind.
+    Starting a new transition replaces one that is still running.
+    """
+
+    def __init__(self, hass, send, frame_rate=DEFAULT_TRANSITION_FRAME_RATE):
+        """
+        Args:
+            hass: The Home Assistant instance, used to run transitions.
+            send: Coroutine function to send a dict of dps to the device.
+            frame_rate (float): The maximum number of frames per second.
+        """
+        self._hass = hass
+        self._send = send
+        self.frame_period = 1 / frame_rate
+        self._task = None
+        self.frames_sent = 0
+        self.frames_dropped = 0
+
+    @property
+    def running(self):
+        """Return True while a transition is being streamed."""
+        return self._task is not None and not self._task.done()
+
+    def start(self, start, end, duration, render, final=None):
+        """
+        Start a transition in the background, replacing any running one.
+
+        Args:
+            start (dict): The values at the start, keyed by name.
+            end (dict): The values at the end, with the same names as start.
+            duration (float): The length of the transition in seconds.
+            render: Function returning the dps to send for a dict of values.
+            final (dict): dps to send as the last frame instead of
+                rendering end, such as to turn a light off after fading.
+        Returns the task streaming the transition.
+        """
+        self.cancel()
+        self._task = self._hass.async_create_task(
+            self.async_run(start, end, duration, render, final)
+        )
+        return self._task
+
+    def cancel(self):
+        """Stop any running transition where it is."""
+        if self.running:
+            self._task.cancel()
+        self._task = None
+
+    async def async_run(self, start, end, duration, render, final=None):
+        """Stream a transition, returning once the last frame is sent."""
+        began = monotonic()
+        last = None
+        next_frame = began
+        while True:
+            elapsed = monotonic() - began
+            if elapsed >= duration:
+                break
+            fraction = elapsed / duration
+            frame = render({k: interpolate(start[k], end[k], fraction) for k in end})
+            if frame != last:
+                await self._send(frame)
+                self.frames_sent += 1
+                last = frame
+            next_frame += self.frame_period
+            now = monotonic()
+            if now > next_frame:
+                # Drop the frames that were due while waiting for the device
+                self.frames_dropped += int((now - next_frame) / self.frame_period)
+                next_frame = now
+            await asyncio.sleep(min(next_frame, began + duration) - monotonic())
+
+        frame = render(end) if final is None else final
+        if frame != last:
+            await self._send(frame)
+            self.frames_sent += 1
+        _LOGGER.debug(
+            f"Transition complete in {monotonic() - began:.2f}s, "
+            f"{self.frames_sent} frames sent, {self.frames_dropped} dropped"
+        )
+
+    def as_dict(self):
+        """Return statistics for diagnostics and benchmarks."""
+        return {
+            "frame_rate": round(1 / self.frame_period, 2),
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.frames_dropped,
+        }
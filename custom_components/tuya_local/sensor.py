@@ -1,16 +1,41 @@
 """
 Setup for different kinds of Tuya sensors
 """
-from .generic.sensor import TuyaLocalSensor
-from .helpers.config import async_tuya_setup_platform
+from .const import CONF_AGGREGATE_SENSORS, CONF_ENERGY_SENSORS, DATA_SETTINGS
+from .generic.sensor import (
+    TuyaLocalAggregatedSensor,
+    TuyaLocalEnergySensor,
+    TuyaLocalSensor,
+)
+from .helpers.config import async_tuya_setup_platform, get_device_id
+from .helpers.energy import ENERGY_SENSOR_ID, EnergyMeter
 
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     config = {**config_entry.data, **config_entry.options}
+    settings = hass.data.get(DATA_SETTINGS, {})
+    device_id = get_device_id(config)
+    entity_class = TuyaLocalSensor
+    if device_id in settings.get(CONF_AGGREGATE_SENSORS, []):
+
+        def entity_class(device, ecfg):
+            if TuyaLocalAggregatedSensor.supports(ecfg):
+                return TuyaLocalAggregatedSensor(device, ecfg)
+            return TuyaLocalSensor(device, ecfg)
+
+    def extra(device):
+        meter = getattr(device, "energy_meter", None)
+        if device_id in settings.get(CONF_ENERGY_SENSORS, []) and isinstance(
+            meter, EnergyMeter
+        ):
+            return {ENERGY_SENSOR_ID: TuyaLocalEnergySensor(device, meter)}
+        return {}
+
     await async_tuya_setup_platform(
         hass,
         async_add_entities,
         config,
         "sensor",
-        TuyaLocalSensor,
+        entity_class,
+        extra,
     )
@@ -91,7 +91,18 @@ class TuyaDeviceTestCase(IsolatedAsyncioTestCase):
 
     def test_should_poll(self):
         for e in self.entities.values():
-            self.assertTrue(e.should_poll)
+            self.assertFalse(e.should_poll)
+
+    async def test_registers_with_device_when_added(self):
+        for e in self.entities.values():
+            self.mock_device.register_entity.reset_mock()
+            self.mock_device.unregister_entity.reset_mock()
+            await e.async_added_to_hass()
+            self.mock_device.register_entity.assert_called_once_with(
+                e, [d.id for d in e._config.dps()]
+            )
+            await e.async_will_remove_from_hass()
+            self.mock_device.unregister_entity.assert_called_once_with(e)
 
     def test_available(self):
         for e in self.entities.values():
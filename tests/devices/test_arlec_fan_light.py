@@ -110,12 +110,12 @@ class TestArlecFan(SwitchableTests, BasicSelectTests, TuyaDeviceTestCase):
         self.assertEqual(self.subject.speed_count, 6)
 
     async def test_set_speed(self):
-        async with assert_device_properties_set(self.subject._device, {SPEED_DPS: 2}):
+        async with assert_device_properties_set(self.subject._device, {SPEED_DPS: "2"}):
             await self.subject.async_set_percentage(33)
 
     async def test_set_speed_in_normal_mode_snaps(self):
         self.dps[PRESET_DPS] = "normal"
-        async with assert_device_properties_set(self.subject._device, {SPEED_DPS: 5}):
+        async with assert_device_properties_set(self.subject._device, {SPEED_DPS: "5"}):
             await self.subject.async_set_percentage(80)
 
     def test_light_is_on(self):
@@ -130,7 +130,9 @@ class TestAwowTH213v2Thermostat(
         )
 
     async def test_legacy_set_temperature_with_preset_mode(self):
-        async with assert_device_properties_set(self.subject._device, {PRESET_DPS: 2}):
+        async with assert_device_properties_set(
+            self.subject._device, {PRESET_DPS: "2"}
+        ):
             await self.subject.async_set_temperature(preset_mode="Away")
 
     async def test_legacy_set_temperature_with_both_properties(self):
@@ -138,7 +140,7 @@ class TestAwowTH213v2Thermostat(
             self.subject._device,
             {
                 TEMPERATURE_DPS: 25,
-                PRESET_DPS: 3,
+                PRESET_DPS: "3",
             },
         ):
             await self.subject.async_set_temperature(
@@ -196,28 +198,28 @@ class TestAwowTH213v2Thermostat(
     async def test_set_preset_mode_to_home(self):
         async with assert_device_properties_set(
             self.subject._device,
-            {PRESET_DPS: 1},
+            {PRESET_DPS: "1"},
         ):
             await self.subject.async_set_preset_mode("Home")
 
     async def test_set_preset_mode_to_away(self):
         async with assert_device_properties_set(
             self.subject._device,
-            {PRESET_DPS: 2},
+            {PRESET_DPS: "2"},
         ):
             await self.subject.async_set_preset_mode("Away")
 
     async def test_set_preset_mode_to_smart(self):
         async with assert_device_properties_set(
             self.subject._device,
-            {PRESET_DPS: 3},
+            {PRESET_DPS: "3"},
         ):
             await self.subject.async_set_preset_mode("Smart")
 
     async def test_set_preset_mode_to_sleep(self):
         async with assert_device_properties_set(
             self.subject._device,
-            {PRESET_DPS: 4},
+            {PRESET_DPS: "4"},
         ):
             await self.subject.async_set_preset_mode("Sleep")
 
@@ -55,7 +55,9 @@ class TestBecaBHP6000Thermostat(
         self.assertEqual(self.subject.temperature_unit, UnitOfTemperature.FAHRENHEIT)
 
     async def test_legacy_set_temperature_with_preset_mode(self):
-        async with assert_device_properties_set(self.subject._device, {PRESET_DPS: 1}):
+        async with assert_device_properties_set(
+            self.subject._device, {PRESET_DPS: "1"}
+        ):
             await self.subject.async_set_temperature(preset_mode="Schedule")
 
     async def test_legacy_set_temperature_with_both_properties(self):
@@ -63,7 +65,7 @@ class TestBecaBHP6000Thermostat(
             self.subject._device,
             {
                 TEMPERATURE_DPS: 78,
-                PRESET_DPS: 4,
+                PRESET_DPS: "4",
             },
         ):
             await self.subject.async_set_temperature(
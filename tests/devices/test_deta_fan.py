@@ -41,7 +41,7 @@ class TestDetaFan(
         self.assertAlmostEqual(self.subject.percentage_step, 33.3, 1)
 
     async def test_set_speed(self):
-        async with assert_device_properties_set(self.subject._device, {SPEED_DPS: 2}):
+        async with assert_device_properties_set(self.subject._device, {SPEED_DPS: "2"}):
             await self.subject.async_set_percentage(66.7)
 
     async def test_auto_stringify_speed(self):
@@ -51,7 +51,7 @@ class TestDetaFan(
             await self.subject.async_set_percentage(66.7)
 
     async def test_set_speed_snaps(self):
-        async with assert_device_properties_set(self.subject._device, {SPEED_DPS: 2}):
+        async with assert_device_properties_set(self.subject._device, {SPEED_DPS: "2"}):
             await self.subject.async_set_percentage(55)
 
     def test_extra_state_attributes(self):
@@ -112,7 +112,10 @@ class TestDigooNightlightSwitch(BasicSwitchTests, TuyaDeviceTestCase):
         )
 
     def test_light_supported_features(self):
-        self.assertEqual(self.light.supported_features, LightEntityFeature.EFFECT)
+        self.assertEqual(
+            self.light.supported_features,
+            LightEntityFeature.EFFECT | LightEntityFeature.TRANSITION,
+        )
 
     async def test_turn_on(self):
         self.dps[LIGHTSW_DPS] = False
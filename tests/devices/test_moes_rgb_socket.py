@@ -164,7 +164,10 @@ class TestMoesRGBWSocket(
         )
 
     def test_light_supported_features(self):
-        self.assertEqual(self.light.supported_features, LightEntityFeature.EFFECT)
+        self.assertEqual(
+            self.light.supported_features,
+            LightEntityFeature.EFFECT | LightEntityFeature.TRANSITION,
+        )
 
     async def test_turn_on(self):
         self.dps[LIGHT_DPS] = False
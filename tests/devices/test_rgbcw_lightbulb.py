@@ -1,3 +1,6 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
 from homeassistant.components.light import (
     ColorMode,
     LightEntityFeature,
@@ -6,6 +9,8 @@ from homeassistant.components.light import (
 )
 from homeassistant.const import TIME_MINUTES
 
+from custom_components.tuya_local.helpers.device_config import TuyaDpsConfig
+
 from ..const import RGBCW_LIGHTBULB_PAYLOAD
 from ..helpers import assert_device_properties_set
 from ..mixins.number import BasicNumberTests
@@ -97,7 +102,10 @@ class TestRGBCWLightbulb(BasicNumberTests, TuyaDeviceTestCase):
         )
 
     def test_supported_features(self):
-        self.assertEqual(self.subject.supported_features, LightEntityFeature.EFFECT)
+        self.assertEqual(
+            self.subject.supported_features,
+            LightEntityFeature.EFFECT | LightEntityFeature.TRANSITION,
+        )
 
     async def test_turn_on(self):
         self.dps[SWITCH_DPS] = False
@@ -125,6 +133,41 @@ class TestRGBCWLightbulb(BasicNumberTests, TuyaDeviceTestCase):
         ):
             await self.subject.async_turn_on(color_mode=ColorMode.WHITE, brightness=128)
 
+    async def test_brightness_transition_streams_frames(self):
+        self.dps[SWITCH_DPS] = False
+        self.subject._device.async_send_properties = AsyncMock()
+        self.subject.hass = MagicMock()
+        self.subject.hass.data = {"tuya_local_settings": {"transition_frame_rate": 20}}
+        self.subject.hass.async_create_task = asyncio.ensure_future
+
+        await self.subject.async_turn_on(
+            color_mode=ColorMode.WHITE, brightness=128, transition=0.2
+        )
+        await self.subject._transitions._task
+
+        calls = self.subject._device.async_send_properties.call_args_list
+        self.assertGreater(len(calls), 2)
+        levels = [c.args[0][BRIGHTNESS_DPS] for c in calls]
+        self.assertEqual(levels, sorted(levels))
+        self.assertEqual(calls[0].args[0][SWITCH_DPS], True)
+        self.assertEqual(
+            calls[-1].args[0],
+            {SWITCH_DPS: True, MODE_DPS: "white", BRIGHTNESS_DPS: 502},
+        )
+        self.subject._device.async_set_properties.assert_not_called()
+
+    def test_min_brightness_is_scaled(self):
+        # The device range starts at 10, which is 2.55 on the 0-255 scale
+        self.assertEqual(self.subject._min_brightness(), 3)
+        self.dps[SWITCH_DPS] = False
+        self.assertEqual(self.subject._current_brightness(), 3)
+
+    def test_min_brightness_stays_within_range(self):
+        with patch.object(
+            TuyaDpsConfig, "range", return_value={"min": 2.4, "max": 255}
+        ):
+            self.assertEqual(self.subject._min_brightness(), 3)
+
     async def test_set_rgbw(self):
         self.dps[BRIGHTNESS_DPS] = 1000
         self.dps[SWITCH_DPS] = True
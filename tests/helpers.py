@@ -4,6 +4,20 @@ from unittest.mock import AsyncMock
 from custom_components.tuya_local.device import TuyaLocalDevice
 
 
+def as_reported(dps, dps_id, value):
+    """
+    Return value as it should be sent to a device with the given dps, as a
+    string if the device reports that dp as a string.
+    """
+    if value is None or isinstance(value, str):
+        return value
+    if not isinstance(dps.get(dps_id), str):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
 @asynccontextmanager
 async def assert_device_properties_set(
     device: TuyaLocalDevice, properties: dict, msg=None
@@ -1,5 +1,5 @@
 # Mixins for testing number entities
-from ..helpers import assert_device_properties_set
+from ..helpers import as_reported, assert_device_properties_set
 
 
 class BasicNumberTests:
@@ -40,7 +40,9 @@ class BasicNumberTests:
 
     async def test_number_set_value(self):
         val = min(max(self.basicNumberMin, self.basicNumberStep), self.basicNumberMax)
-        dps_val = val * self.basicNumberScale
+        dps_val = as_reported(
+            self.dps, self.basicNumberDps, val * self.basicNumberScale
+        )
         async with assert_device_properties_set(
             self.basicNumber._device, {self.basicNumberDps: dps_val}
         ):
@@ -131,7 +133,9 @@ class MultiNumberTests:
                 max(self.multiNumberMin[key], self.multiNumberStep[key]),
                 self.multiNumberMax[key],
             )
-            dps_val = val * self.multiNumberScale[key]
+            dps_val = as_reported(
+                self.dps, self.multiNumberDps[key], val * self.multiNumberScale[key]
+            )
             async with assert_device_properties_set(
                 subject._device,
                 {self.multiNumberDps[key]: dps_val},
@@ -1,5 +1,5 @@
 # Mixins for testing select entities
-from ..helpers import assert_device_properties_set
+from ..helpers import as_reported, assert_device_properties_set
 
 
 class BasicSelectTests:
@@ -22,7 +22,12 @@ class BasicSelectTests:
     async def test_basicSelect_select_option(self):
         for dpsVal, val in self.basicSelectOptions.items():
             async with assert_device_properties_set(
-                self.basicSelect._device, {self.basicSelectDps: dpsVal}
+                self.basicSelect._device,
+                {
+                    self.basicSelectDps: as_reported(
+                        self.dps, self.basicSelectDps, dpsVal
+                    )
+                },
             ):
                 await self.basicSelect.async_select_option(val)
 
@@ -67,7 +72,11 @@ class MultiSelectTests:
             for dpsVal, val in self.multiSelectOptions[key].items():
                 async with assert_device_properties_set(
                     subject._device,
-                    {self.multiSelectDps[key]: dpsVal},
+                    {
+                        self.multiSelectDps[key]: as_reported(
+                            self.dps, self.multiSelectDps[key], dpsVal
+                        )
+                    },
                     f"{key} failed to select expected option",
                 ):
                     await subject.async_select_option(val)
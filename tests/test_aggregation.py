@@ -0,0 +1,60 @@
+"""Tests for aggregating sensor samples over a window"""
+from unittest import TestCase
+
+from custom_components.tuya_local.helpers.aggregation import (
+    SampleWindow,
+    SensorAggregator,
+)
+
+
+class TestSampleWindow(TestCase):
+    def test_mean_is_weighted_by_time(self):
+        window = SampleWindow(0, 100)
+        window.add(400, 45)
+        summary = window.summary(60)
+        self.assertEqual(summary["mean"], 175)
+        self.assertEqual(summary["integral"], 100 * 45 + 400 * 15)
+        self.assertEqual((summary["min"], summary["max"]), (100, 400))
+        self.assertEqual(summary["samples"], 1)
+
+    def test_window_starts_at_first_sample_when_no_value_known(self):
+        window = SampleWindow(0)
+        self.assertIsNone(window.summary(10))
+        window.add(50, 20)
+        summary = window.summary(30)
+        self.assertEqual(summary["duration"], 10)
+        self.assertEqual(summary["mean"], 50)
+
+    def test_summary_of_instant_window_is_the_value(self):
+        window = SampleWindow(5)
+        window.add(7, 5)
+        self.assertEqual(window.summary(5)["mean"], 7)
+
+
+class TestSensorAggregator(TestCase):
+    def setUp(self):
+        self.subject = SensorAggregator(60, start=0)
+        self.subject.watch("19")
+
+    def test_only_watched_numeric_dps_are_sampled(self):
+        self.subject.add({"1": True, "19": 10}, 0)
+        self.subject.add({"19": "bad"}, 5)
+        summaries = self.subject.close(10)
+        self.assertEqual(list(summaries), ["19"])
+        self.assertEqual(summaries["19"]["samples"], 1)
+
+    def test_due_at_end_of_window(self):
+        self.assertFalse(self.subject.due(59))
+        self.assertTrue(self.subject.due(60))
+        self.subject.close(60)
+        self.assertFalse(self.subject.due(100))
+        self.assertTrue(self.subject.due(120))
+
+    def test_latest_value_carries_into_next_window(self):
+        self.subject.add({"19": 10}, 0)
+        self.subject.add({"19": 30}, 30)
+        self.assertEqual(self.subject.close(60)["19"]["mean"], 20)
+        summary = self.subject.close(120)["19"]
+        self.assertEqual(summary["mean"], 30)
+        self.assertEqual(summary["samples"], 0)
+        self.assertEqual(summary["duration"], 60)
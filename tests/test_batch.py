@@ -0,0 +1,125 @@
+"""Tests for the batch set service"""
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from custom_components.tuya_local.const import DOMAIN
+from custom_components.tuya_local.generic.light import TuyaLocalLight
+from custom_components.tuya_local.generic.switch import TuyaLocalSwitch
+from custom_components.tuya_local.helpers.batch import async_batch_set
+from custom_components.tuya_local.helpers.color import RgbhsvCodec, rgbhsv_codec
+from custom_components.tuya_local.helpers.device_config import get_config
+
+
+def mock_device(name, dps, latency=0):
+    device = MagicMock()
+    device.name = name
+    device.unique_id = name
+    device.get_property.side_effect = lambda id: dps.get(id)
+
+    async def send(dps_map):
+        await asyncio.sleep(latency)
+        return True
+
+    device.async_send_properties = AsyncMock(side_effect=send)
+    return device
+
+
+class TestBatchSet(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.hass = MagicMock()
+        self.hass.data = {DOMAIN: {}}
+        self.devices = {}
+        for i in range(4):
+            self.add_light(f"bulb{i}")
+        self.plug = mock_device("plug", {"1": False})
+        switch = TuyaLocalSwitch(self.plug, get_config("smartplugv1").primary_entity)
+        switch.entity_id = "switch.plug"
+        self.hass.data[DOMAIN]["plug"] = {"device": self.plug, "switch": switch}
+
+    def add_light(self, name, latency=0.05):
+        device = mock_device(name, {"20": True, "21": "white"}, latency)
+        light = TuyaLocalLight(device, get_config("rgbcw_lightbulb").primary_entity)
+        light.entity_id = f"light.{name}"
+        self.devices[name] = device
+        self.hass.data[DOMAIN][name] = {"device": device, "light": light}
+
+    async def test_groups_targets_per_device(self):
+        result = await async_batch_set(
+            self.hass,
+            [
+                {"entity_id": "light.bulb0", "dp": "brightness", "value": 128},
+                {"entity_id": "light.bulb0", "dp": "switch", "value": True},
+                {"entity_id": "switch.plug", "dp": "switch", "value": True},
+            ],
+        )
+        self.devices["bulb0"].async_send_properties.assert_awaited_once_with(
+            {"22": 502, "20": True}
+        )
+        self.plug.async_send_properties.assert_awaited_once_with({"1": True})
+        self.assertEqual(result["errors"], [])
+        self.assertTrue(result["devices"]["bulb0"]["success"])
+        self.assertEqual(result["devices"]["plug"]["dps"], {"1": True})
+        self.assertIn("total_time", result)
+
+    async def test_sends_to_devices_concurrently_within_bound(self):
+        targets = [
+            {"entity_id": f"light.bulb{i}", "dp": "switch", "value": False}
+            for i in range(4)
+        ]
+        result = await async_batch_set(self.hass, targets, concurrency=4)
+        self.assertLess(result["total_time"], 0.15)
+
+        result = await async_batch_set(self.hass, targets, concurrency=2)
+        self.assertGreaterEqual(result["total_time"], 0.1)
+        self.assertEqual(len(result["devices"]), 4)
+
+    async def test_reports_unresolved_targets_and_failures(self):
+        self.plug.async_send_properties = AsyncMock(return_value=False)
+        result = await async_batch_set(
+            self.hass,
+            [
+                {"entity_id": "light.missing", "dp": "switch", "value": True},
+                {"entity_id": "light.bulb1", "dp": "missing", "value": True},
+                {"entity_id": "light.bulb1", "dp": "brightness", "value": 1000},
+                {"entity_id": "switch.plug", "dp": "switch", "value": True},
+            ],
+        )
+        self.assertEqual(len(result["errors"]), 3)
+        self.assertFalse(result["devices"]["plug"]["success"])
+        self.devices["bulb1"].async_send_properties.assert_not_called()
+
+    async def test_colors_are_encoded_once_per_group(self):
+        codec = rgbhsv_codec(
+            get_config("rgbcw_lightbulb").primary_entity.find_dps("rgbhsv").format
+        )
+        with patch.object(
+            RgbhsvCodec, "encode", autospec=True, side_effect=RgbhsvCodec.encode
+        ) as encode:
+            result = await async_batch_set(
+                self.hass,
+                [
+                    {"entity_id": f"light.bulb{i}", "dp": "rgbhsv", "value": color}
+                    for i, color in enumerate(
+                        [[255, 0, 0, 255], [255, 0, 0, 255], [0, 0, 255], [0, 0, 255]]
+                    )
+                ],
+            )
+        self.assertEqual(result["errors"], [])
+        self.assertEqual(encode.call_count, 2)
+        red = codec.encode((255, 0, 0, 255), 255).hex()
+        for name in ("bulb0", "bulb1"):
+            self.devices[name].async_send_properties.assert_awaited_once_with(
+                {"24": red}
+            )
+        self.devices["bulb2"].async_send_properties.assert_awaited_once_with(
+            {"24": codec.encode((0, 0, 255, 255), 255).hex()}
+        )
+
+    async def test_reports_invalid_colors(self):
+        result = await async_batch_set(
+            self.hass,
+            [{"entity_id": "light.bulb0", "dp": "rgbhsv", "value": [1, 2]}],
+        )
+        self.assertEqual(len(result["errors"]), 1)
+        self.devices["bulb0"].async_send_properties.assert_not_called()
@@ -0,0 +1,72 @@
+"""Tests for the RGB/HSV color codec"""
+from unittest import TestCase
+
+from custom_components.tuya_local.helpers.color import rgbhsv_codec
+from custom_components.tuya_local.helpers.device_config import TuyaDpsFormat
+
+HSV_FORMAT = TuyaDpsFormat(
+    (("h", 2, 0, 360), ("s", 2, 0, 1000), ("v", 2, 0, 1000)),
+)
+RGBHSV_FORMAT = TuyaDpsFormat(
+    (
+        ("r", 1, 0, 255),
+        ("g", 1, 0, 255),
+        ("b", 1, 0, 255),
+        ("h", 2, 0, 360),
+        ("s", 1, 0, 255),
+        ("v", 1, 0, 255),
+    ),
+)
+
+
+class TestRgbhsvCodec(TestCase):
+    def test_no_codec_without_format(self):
+        self.assertIsNone(rgbhsv_codec(None))
+
+    def test_codec_is_shared_between_equal_formats(self):
+        self.assertIs(
+            rgbhsv_codec(HSV_FORMAT), rgbhsv_codec(TuyaDpsFormat(HSV_FORMAT._fields))
+        )
+        self.assertIsNot(rgbhsv_codec(HSV_FORMAT), rgbhsv_codec(RGBHSV_FORMAT))
+
+    def test_decode_hsv(self):
+        codec = rgbhsv_codec(HSV_FORMAT)
+        self.assertEqual(
+            codec.decode(bytes.fromhex("000003e803e8")),
+            (255, 0, 0, 255),
+        )
+        self.assertEqual(
+            codec.decode(bytes.fromhex("007803e801f4")),
+            (0, 255, 0, 128),
+        )
+
+    def test_encode_hsv(self):
+        codec = rgbhsv_codec(HSV_FORMAT)
+        self.assertEqual(
+            codec.encode((255, 0, 0, 255), 255).hex(),
+            "000003e803e8",
+        )
+        self.assertEqual(
+            codec.encode((0, 0, 255, 255), 128).hex(),
+            "00f003e801f6",
+        )
+
+    def test_encode_rgbhsv(self):
+        codec = rgbhsv_codec(RGBHSV_FORMAT)
+        self.assertEqual(
+            codec.encode((0, 255, 0, 0), 255).hex(),
+            "00ff000078ffff",
+        )
+
+    def test_decode_rejects_non_zero_minimum(self):
+        codec = rgbhsv_codec(
+            TuyaDpsFormat((("h", 1, 0, 255), ("s", 1, 1, 255), ("v", 1, 0, 255)))
+        )
+        with self.assertRaises(AttributeError):
+            codec.decode(b"\x00\x01\x02")
+
+    def test_batch_encoding(self):
+        codec = rgbhsv_codec(HSV_FORMAT)
+        targets = [((255, 0, 0, 255), 255), ((0, 0, 255, 255), 128)] * 3
+        encoded = codec.encode_many(targets)
+        self.assertEqual(encoded, [codec.encode(*t) for t in targets])
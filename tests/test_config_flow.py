@@ -26,6 +26,13 @@ def auto_enable_custom_integrations(enable_custom_integrations):
     yield
 
 
+@pytest.fixture(autouse=True)
+def bypass_startup_refresh():
+    """Prevent devices set up in tests from connecting at startup."""
+    with patch("custom_components.tuya_local.get_startup_scheduler"):
+        yield
+
+
 @pytest.fixture
 def bypass_setup():
     """Prevent actual setup of the integration after config flow."""
@@ -63,6 +70,7 @@ async def test_migrate_entry(mock_setup, hass):
     """Test migration from old entry format."""
     mock_device = MagicMock()
     mock_device.async_inferred_type = AsyncMock(return_value="goldair_gpph_heater")
+    mock_device.async_startup_refresh = AsyncMock(return_value=True)
     mock_setup.return_value = mock_device
 
     entry = MockConfigEntry(
@@ -80,6 +88,8 @@ async def test_migrate_entry(mock_setup, hass):
         },
     )
     assert await async_migrate_entry(hass, entry)
+    # Each device set up to detect the type is closed again
+    assert mock_device.async_close.call_count == mock_setup.call_count
 
     mock_device.async_inferred_type = AsyncMock(return_value=None)
     mock_device.reset_mock()
@@ -285,10 +295,9 @@ def setup_device_mock(mock, failure=False, type="test"):
     mock_type = MagicMock()
     mock_type.legacy_type = type
     mock_type.config_type = type
-    mock_type.match_quality.return_value = 100
-    mock_iter = MagicMock()
-    mock_iter.__aiter__.return_value = [mock_type] if not failure else []
-    mock.async_possible_types = MagicMock(return_value=mock_iter)
+    mock.async_ranked_types = AsyncMock(
+        return_value=[(100, mock_type)] if not failure else []
+    )
 
 
 @patch("custom_components.tuya_local.config_flow.async_test_connection")
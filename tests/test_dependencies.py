@@ -0,0 +1,79 @@
+"""Tests for the dependency graph between dps"""
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from custom_components.tuya_local.helpers.dependencies import DpsDependencyGraph
+from custom_components.tuya_local.helpers import device_config
+from custom_components.tuya_local.helpers.device_config import (
+    TuyaDeviceConfig,
+    TuyaEntityConfig,
+    get_config,
+)
+
+
+def entity(dps):
+    return TuyaEntityConfig(MagicMock(), {"entity": "sensor", "dps": dps})
+
+
+class TestDpsDependencyGraph(TestCase):
+    def test_heater_dependencies(self):
+        cfg = get_config("goldair_gpph_heater")
+        graph = cfg.dependency_graph
+        self.assertIs(cfg.dependency_graph, graph)
+        # eco_temperature is evaluated before temperature, which redirects to it
+        self.assertLess(graph.order.index("106"), graph.order.index("2"))
+        # temperature is constrained by preset_mode and redirects to eco_temperature
+        self.assertEqual(graph.affected({"4"}), {"4", "2", "106"})
+        self.assertEqual(graph.affected({"106"}), {"106", "2"})
+        self.assertEqual(graph.affected({"3"}), {"3"})
+
+    def test_constraints_may_refer_to_each_other(self):
+        graph = DpsDependencyGraph(
+            [
+                entity(
+                    [
+                        {
+                            "id": 1,
+                            "name": "a",
+                            "type": "string",
+                            "mapping": [{"constraint": "b", "conditions": []}],
+                        },
+                        {
+                            "id": 2,
+                            "name": "b",
+                            "type": "string",
+                            "mapping": [{"constraint": "a", "conditions": []}],
+                        },
+                    ]
+                )
+            ]
+        )
+        self.assertEqual(graph.affected({"1"}), {"1", "2"})
+
+    def test_value_cycles_are_reported(self):
+        dps = [
+            {
+                "id": 1,
+                "name": "a",
+                "type": "integer",
+                "mapping": [{"value_mirror": "b"}],
+            },
+            {
+                "id": 2,
+                "name": "b",
+                "type": "integer",
+                "mapping": [
+                    {"constraint": "a", "conditions": [{"value_redirect": "a"}]}
+                ],
+            },
+        ]
+        with self.assertRaisesRegex(
+            ValueError, r"test: .* cycle: sensor.a -> sensor.b -> sensor.a"
+        ):
+            DpsDependencyGraph([entity(dps)], "test")
+
+        # Configs are checked as they are loaded, not when first used
+        yaml = {"name": "Test", "primary_entity": {"entity": "sensor", "dps": dps}}
+        with patch.object(device_config, "_load_config", return_value=yaml):
+            with self.assertRaisesRegex(ValueError, "test: .* cycle"):
+                TuyaDeviceConfig("test.yaml")
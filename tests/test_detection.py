@@ -0,0 +1,93 @@
+"""Tests for detecting the config of a device from its dps"""
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from custom_components.tuya_local.helpers import detection, device_config
+from custom_components.tuya_local.helpers.detection import (
+    DetectionIndex,
+    async_rank_matches,
+    detection_index,
+)
+from custom_components.tuya_local.helpers.device_config import (
+    get_config,
+    possible_matches,
+)
+
+from . import const
+
+
+def payloads():
+    for name in dir(const):
+        if name.endswith("_PAYLOAD"):
+            yield name, getattr(const, name)
+
+
+class TestDetectionIndex(TestCase):
+    def test_rank_agrees_with_match_quality(self):
+        """Test ranking gives the same matches and qualities as match_quality."""
+        index = detection_index()
+        for name, dps in payloads():
+            with self.subTest(payload=name):
+                expected = sorted(
+                    (
+                        (cfg.match_quality(dps), cfg.config)
+                        for cfg in possible_matches(dps)
+                    ),
+                    key=lambda r: r[0],
+                    reverse=True,
+                )
+                ranked = [(q, cfg.config) for q, cfg in index.rank(dps)]
+                self.assertEqual(ranked, expected)
+
+    def test_rank_returns_best_first(self):
+        ranked = detection_index().rank(const.GPPH_HEATER_PAYLOAD, limit=3)
+        self.assertLessEqual(len(ranked), 3)
+        self.assertEqual(ranked[0][0], 100)
+        self.assertEqual(ranked[0][1].config_type, "goldair_gpph_heater")
+
+    def test_rank_stops_at_perfect_matches(self):
+        configs = [
+            get_config("kogan_heater"),
+            get_config("goldair_gpph_heater"),
+            get_config("goldair_gpph_heater"),
+        ]
+        index = DetectionIndex(configs)
+        with patch.object(
+            detection, "_typematch", wraps=detection._typematch
+        ) as typematch:
+            self.assertEqual(
+                [c for _, c in index.rank(const.GPPH_HEATER_PAYLOAD, limit=1)],
+                [configs[1]],
+            )
+        # Type checks are done once for each dp of the device, not per config
+        self.assertLessEqual(typematch.call_count, 4 * len(const.GPPH_HEATER_PAYLOAD))
+        self.assertEqual(len(index.rank(const.GPPH_HEATER_PAYLOAD)), 2)
+
+    def test_rank_with_no_dps(self):
+        self.assertEqual(detection_index().rank({"updated_at": 0}), [])
+
+    def test_detection_does_not_keep_configs(self):
+        """Test only the configs of devices that are set up are kept."""
+        with patch.object(device_config, "_device_configs", {}) as shared:
+            index = DetectionIndex(
+                device_config.TuyaDeviceConfig(fname)
+                for fname in ("kogan_kahtp_heater.yaml", "goldair_gpph_heater.yaml")
+            )
+            self.assertEqual(shared, {})
+            (_, config), *_ = index.rank(const.GPPH_HEATER_PAYLOAD, limit=1)
+            self.assertEqual(config.config_type, "goldair_gpph_heater")
+            self.assertEqual(shared, {})
+
+            heater = get_config("goldair_gpph_heater")
+            self.assertEqual(list(shared), ["goldair_gpph_heater.yaml"])
+            self.assertIs(index.rank(const.GPPH_HEATER_PAYLOAD, limit=1)[0][1], heater)
+
+
+class TestAsyncRankMatches(IsolatedAsyncioTestCase):
+    async def test_index_is_built_in_executor(self):
+        hass = MagicMock()
+        hass.async_add_executor_job = AsyncMock(side_effect=lambda func: func())
+        with patch.object(detection, "_detection_index", None):
+            ranked = await async_rank_matches(hass, const.KOGAN_HEATER_PAYLOAD, 1)
+            hass.async_add_executor_job.assert_awaited_once()
+        self.assertEqual(ranked[0][1].legacy_type, "kogan_heater")
@@ -1,12 +1,16 @@
 import tinytuya
 from datetime import datetime
+from threading import Event, Thread
 from time import sleep, time
 from unittest import IsolatedAsyncioTestCase
-from unittest.mock import AsyncMock, call, patch
+from unittest.mock import AsyncMock, MagicMock, Mock, call, patch
 
-from homeassistant.const import UnitOfTemperature
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP, UnitOfTemperature
 
-from custom_components.tuya_local.device import TuyaLocalDevice
+from custom_components.tuya_local.const import CONF_DEVICE_ID, DOMAIN
+from custom_components.tuya_local.device import TuyaLocalDevice, delete_device
+from custom_components.tuya_local.helpers.energy import ENERGY_SENSOR_ID, EnergyMeter
+from custom_components.tuya_local.helpers.tracing import DeviceTrace
 
 from .const import (
     EUROM_600_HEATER_PAYLOAD,
@@ -63,7 +67,13 @@ class TestDevice(IsolatedAsyncioTestCase):
     def test_temperature_unit(self):
         self.assertEqual(self.subject.temperature_unit, UnitOfTemperature.CELSIUS)
 
+    def run_executor_jobs_inline(self):
+        self.subject._hass.async_add_executor_job = AsyncMock(
+            side_effect=lambda func, *args: func(*args)
+        )
+
     async def test_refreshes_state_if_no_cached_state_exists(self):
+        self.run_executor_jobs_inline()
         self.subject._cached_state = {}
         self.subject.async_refresh = AsyncMock()
 
@@ -72,6 +82,7 @@ class TestDevice(IsolatedAsyncioTestCase):
         self.subject.async_refresh.assert_awaited()
 
     async def test_detection_returns_none_when_device_type_could_not_be_detected(self):
+        self.run_executor_jobs_inline()
         self.subject._cached_state = {"2": False, "updated_at": datetime.now()}
         self.assertEqual(await self.subject.async_inferred_type(), None)
 
@@ -112,6 +123,311 @@ class TestDevice(IsolatedAsyncioTestCase):
         self.assertIs(self.subject._refresh_task, awaitable)
         async_job.assert_awaited()
 
+    async def test_first_refresh_is_recorded_on_startup_timeline(self):
+        async_job = AsyncMock()
+        self.subject._hass.async_add_executor_job.return_value = async_job()
+        timeline = self.subject.startup_timeline = MagicMock()
+
+        await self.subject.async_refresh()
+
+        timeline.phase.assert_called_once_with("first_refresh")
+        self.assertIsNone(self.subject.startup_timeline)
+
+    async def test_startup_refresh_uses_short_timeout(self):
+        async_job = AsyncMock()
+        self.subject._hass.async_add_executor_job.return_value = async_job()
+        self.subject._cached_state = {"1": True, "updated_at": 0}
+
+        self.assertTrue(await self.subject.async_startup_refresh(2))
+        self.subject._hass.async_add_executor_job.assert_called_once_with(
+            self.subject._startup_refresh, 2
+        )
+
+    def test_startup_refresh_tries_each_protocol_once(self):
+        self.subject._api.connection_timeout = 5
+        self.subject._api.socketRetryLimit = 5
+        self.subject._api.status.side_effect = Exception("Error")
+
+        self.subject._startup_refresh(2)
+
+        self.assertEqual(self.subject._api.status.call_count, 4)
+        self.subject._api.set_socketTimeout.assert_has_calls([call(2), call(5)])
+        self.subject._api.set_socketRetryLimit.assert_has_calls([call(1), call(5)])
+        self.assertFalse(self.subject.has_returned_state)
+
+    def test_startup_refresh_restores_socket_settings_on_error(self):
+        self.subject._api.connection_timeout = 5
+        self.subject._api.socketRetryLimit = 5
+        self.subject._api.set_version.side_effect = Exception("Error")
+        self.subject._api.status.side_effect = Exception("Error")
+
+        with self.assertRaises(Exception):
+            self.subject._startup_refresh(2)
+
+        self.subject._api.set_socketTimeout.assert_called_with(5)
+        self.subject._api.set_socketRetryLimit.assert_called_with(5)
+
+    def test_refresh_adapts_poll_interval_to_changes(self):
+        self.subject._cached_state = {"1": True, "updated_at": 0}
+        self.subject._api.status.return_value = {"dps": {"1": True}}
+        self.subject.refresh()
+        self.assertEqual(self.subject.poll_interval.interval, 37.5)
+
+        self.subject._api.status.return_value = {"dps": {"1": False}}
+        self.subject.refresh()
+        self.assertEqual(self.subject.poll_interval.interval, 18.75)
+        self.assertEqual(self.subject.poll_interval.change_rate, 0.5)
+
+    def test_refresh_uses_updatedps_for_fast_dps_between_full_refreshes(self):
+        self.subject.set_poll_classes({"1": "normal", "19": "fast", "18": "fast"})
+        self.subject._api.status.return_value = {"dps": {"1": True, "19": 10}}
+        self.subject._api.updatedps.return_value = {"dps": {"19": 20}}
+
+        self.subject.refresh()
+        self.subject._api.status.assert_called_once()
+        self.subject._api.updatedps.assert_not_called()
+
+        self.subject.refresh()
+        self.subject._api.status.assert_called_once()
+        self.subject._api.updatedps.assert_called_once_with([18, 19])
+        self.assertEqual(self.subject.get_property("19"), 20)
+        self.assertEqual(self.subject.get_property("1"), True)
+
+        self.subject._last_full_refresh = time() - 60
+        self.subject.refresh()
+        self.assertEqual(self.subject._api.status.call_count, 2)
+
+    def test_refresh_without_fast_dps_always_reads_full_status(self):
+        self.subject.set_poll_classes({"1": "normal", "2": "slow"})
+        self.subject._api.status.return_value = {"dps": {"1": True}}
+
+        self.subject.refresh()
+        self.subject.refresh()
+
+        self.assertEqual(self.subject._api.status.call_count, 2)
+        self.subject._api.updatedps.assert_not_called()
+
+    def test_refresh_falls_back_when_updatedps_returns_no_dps(self):
+        self.subject.set_poll_classes({"1": "slow", "19": "fast"})
+        self.subject._api.status.return_value = {"dps": {"1": True, "19": 10}}
+        self.subject._api.updatedps.return_value = None
+
+        self.subject.refresh()
+        self.subject.refresh()
+        self.subject.refresh()
+
+        self.subject._api.updatedps.assert_called_once()
+        self.assertEqual(self.subject._api.status.call_count, 3)
+
+    def test_register_entity_starts_polling(self):
+        with patch("custom_components.tuya_local.device.async_call_later") as mock:
+            entity = Mock()
+            self.subject.register_entity(entity)
+            mock.assert_called_once_with(
+                self.subject._hass, 30, self.subject._async_poll
+            )
+            other = Mock()
+            self.subject.register_entity(other)
+            mock.assert_called_once()
+
+            self.subject.unregister_entity(entity)
+            mock.return_value.assert_not_called()
+            self.subject.unregister_entity(other)
+            mock.return_value.assert_called_once()
+            self.assertIsNone(self.subject._poll_cancel)
+
+    def test_polling_stops_when_home_assistant_stops(self):
+        with patch("custom_components.tuya_local.device.async_call_later") as mock:
+            self.subject.register_entity(Mock())
+            listen = self.subject._hass.bus.async_listen_once
+            listen.assert_called_once_with(
+                EVENT_HOMEASSISTANT_STOP, self.subject._async_on_stop
+            )
+
+            self.subject._async_on_stop(Mock())
+            mock.return_value.assert_called_once()
+            listen.return_value.assert_not_called()
+            self.subject._async_boost_polling()
+            self.subject._schedule_poll()
+            mock.assert_called_once()
+
+    def test_stop_polling_cancels_poll_and_stop_listener(self):
+        with patch("custom_components.tuya_local.device.async_call_later") as mock:
+            self.subject.register_entity(Mock())
+            self.subject.async_stop_polling()
+            mock.return_value.assert_called_once()
+            self.subject._hass.bus.async_listen_once.return_value.assert_called_once()
+            self.assertIsNone(self.subject._poll_cancel)
+
+    def test_delete_device_closes_device(self):
+        device = Mock()
+        self.hass.data = {DOMAIN: {"dev_id": {"device": device}}}
+        delete_device(self.hass, {CONF_DEVICE_ID: "dev_id"})
+        device.async_close.assert_called_once()
+        self.assertEqual(self.hass.data[DOMAIN], {"dev_id": {}})
+
+    async def test_poll_is_not_rescheduled_after_stopping(self):
+        async_job = AsyncMock()
+        self.subject._hass.async_add_executor_job.return_value = async_job()
+        with patch("custom_components.tuya_local.device.async_call_later") as mock:
+            self.subject.register_entity(Mock())
+            self.subject.async_stop_polling()
+            await self.subject._async_poll()
+            mock.assert_called_once()
+
+    async def test_poll_refreshes_and_updates_entities(self):
+        async_job = AsyncMock()
+        self.subject._hass.async_add_executor_job.return_value = async_job()
+        self.subject._cached_state = {"1": True, "updated_at": 0}
+        entity = Mock()
+        with patch("custom_components.tuya_local.device.async_call_later") as mock:
+            self.subject.register_entity(entity)
+            mock.reset_mock()
+
+            await self.subject._async_poll()
+
+            self.subject._hass.async_add_executor_job.assert_called_once_with(
+                self.subject.refresh
+            )
+            entity.async_write_ha_state.assert_called_once()
+            mock.assert_called_once_with(
+                self.subject._hass, 30, self.subject._async_poll
+            )
+
+    def test_update_entities_only_writes_entities_with_changed_dps(self):
+        power = Mock()
+        switch = Mock()
+        everything = Mock()
+        self.subject.register_entity(power, ["19"])
+        self.subject.register_entity(switch, ["1", "2"])
+        self.subject.register_entity(everything)
+
+        self.subject._cached_state = {"1": True, "19": 10, "updated_at": 0}
+        self.subject._async_update_entities()
+        power.async_write_ha_state.assert_called_once()
+        switch.async_write_ha_state.assert_called_once()
+        everything.async_write_ha_state.assert_called_once()
+
+        self.subject._cached_state = {"1": True, "19": 20, "updated_at": 1}
+        self.subject._async_update_entities()
+        self.assertEqual(power.async_write_ha_state.call_count, 2)
+        switch.async_write_ha_state.assert_called_once()
+        self.assertEqual(everything.async_write_ha_state.call_count, 2)
+
+        self.subject._async_update_entities()
+        self.assertEqual(power.async_write_ha_state.call_count, 2)
+        self.assertEqual(everything.async_write_ha_state.call_count, 2)
+
+    def test_update_entities_writes_all_when_availability_changes(self):
+        power = Mock()
+        switch = Mock()
+        self.subject.register_entity(power, ["19"])
+        self.subject.register_entity(switch, ["1"])
+
+        self.subject._cached_state = {"1": True, "updated_at": 0}
+        self.subject._async_update_entities()
+        power.async_write_ha_state.assert_called_once()
+
+        self.subject._reset_cached_state()
+        self.subject._async_update_entities()
+        self.assertEqual(power.async_write_ha_state.call_count, 2)
+        self.assertEqual(switch.async_write_ha_state.call_count, 2)
+
+    async def test_set_properties_updates_entities_with_pending_values(self):
+        self.run_executor_jobs_inline()
+        self.subject._debounce_sending_updates = MagicMock()
+        entity = Mock()
+        self.subject.register_entity(entity, ["1"])
+
+        await self.subject.async_set_properties({"1": True})
+
+        entity.async_write_ha_state.assert_called_once()
+
+    def test_dps_listeners_receive_changes(self):
+        listener = Mock()
+        power = Mock()
+        self.subject.async_add_dps_listener(listener)
+        remove = self.subject.async_add_dps_listener(power, ["19"])
+
+        self.subject._cached_state = {"1": True, "19": 10, "updated_at": 0}
+        self.subject._async_update_entities()
+        listener.assert_not_called()
+        power.assert_not_called()
+
+        self.subject._cached_state = {"1": False, "19": 10, "updated_at": 1}
+        self.subject._async_update_entities()
+        listener.assert_called_once_with({"1": (True, False)})
+        power.assert_not_called()
+
+        self.subject._cached_state = {"1": False, "19": 20, "updated_at": 2}
+        self.subject._async_update_entities()
+        power.assert_called_once_with({"19": (10, 20)})
+
+        remove()
+        self.subject._cached_state = {"1": False, "19": 30, "updated_at": 3}
+        self.subject._async_update_entities()
+        power.assert_called_once()
+        self.assertEqual(listener.call_count, 3)
+
+    def test_dps_listeners_only_receive_confirmed_changes(self):
+        listener = Mock()
+        entity = Mock()
+        self.subject.async_add_dps_listener(listener)
+        self.subject.register_entity(entity, ["1"])
+        self.subject._cached_state = {"1": True, "updated_at": 0}
+        self.subject._async_update_entities()
+
+        self.subject._add_properties_to_pending_updates({"1": False})
+        self.subject._async_update_entities()
+        self.assertEqual(entity.async_write_ha_state.call_count, 2)
+        listener.assert_not_called()
+
+        self.subject._merge_dps({"1": False})
+        self.subject._async_update_entities()
+        listener.assert_called_once_with({"1": (True, False)})
+
+        # A value the device does not accept is never notified
+        self.subject._add_properties_to_pending_updates({"1": True})
+        self.subject._async_update_entities()
+        self.subject._pending_updates = {}
+        self.subject._async_update_entities()
+        self.assertEqual(entity.async_write_ha_state.call_count, 4)
+        listener.assert_called_once()
+
+    def test_dps_changed_event_is_opt_in(self):
+        self.subject._cached_state = {"1": True, "updated_at": 0}
+        self.subject._async_update_entities()
+        self.subject._cached_state = {"1": False, "updated_at": 1}
+        self.subject._async_update_entities()
+        self.subject._hass.bus.async_fire.assert_not_called()
+
+        self.subject._dps_changed_events = True
+        self.subject._cached_state = {"1": True, "2": 5, "updated_at": 2}
+        self.subject._async_update_entities()
+        self.subject._hass.bus.async_fire.assert_called_once_with(
+            "tuya_local_dps_changed",
+            {
+                "device_id": self.subject.unique_id,
+                "name": "Some name",
+                "changes": {
+                    "1": {"old": False, "new": True},
+                    "2": {"old": None, "new": 5},
+                },
+            },
+        )
+
+    def test_boost_polling_reschedules_poll(self):
+        with patch("custom_components.tuya_local.device.async_call_later") as mock:
+            self.subject.register_entity(Mock())
+            self.subject.poll_interval.observe(False)
+            mock.reset_mock()
+
+            self.subject._async_boost_polling()
+
+            mock.assert_called_once_with(
+                self.subject._hass, 5, self.subject._async_poll
+            )
+
     def test_refresh_reloads_status_from_device(self):
         self.subject._api.status.return_value = {"dps": {"1": False}}
         self.subject._cached_state = {"1": True}
@@ -208,6 +524,123 @@ class TestDevice(IsolatedAsyncioTestCase):
             [call(3.1), call(3.2), call(3.4)]
         )
 
+    def test_trace_is_disabled_by_default(self):
+        self.assertIsNone(self.subject.trace)
+
+    def test_trace_records_device_events(self):
+        trace = DeviceTrace()
+        subject = TuyaLocalDevice(
+            "Some name",
+            "some_dev_id",
+            "some.ip.address",
+            "some_local_key",
+            None,
+            self.hass(),
+            trace=trace,
+        )
+        self.assertIs(subject.trace, trace)
+        subject._api.status.side_effect = [
+            Exception("Error"),
+            {"dps": {"1": True}},
+        ]
+        subject.refresh()
+        subject._send_properties({"1": False})
+        subject._pending_updates = {"1": (False, time() - 10)}
+        subject._add_properties_to_pending_updates({"2": 1})
+
+        self.assertEqual(
+            [(e["event"], e.get("dps")) for e in trace.as_list()],
+            [
+                ("rotation", None),
+                ("retry", None),
+                ("rotation", None),
+                ("refresh", {"1": True}),
+                ("send", {"1": False}),
+                ("pending_expiry", {"1": False}),
+            ],
+        )
+        self.assertEqual(trace.as_list()[1]["error"], "Error")
+
+    def test_aggregated_dps_are_written_once_per_window(self):
+        with patch("custom_components.tuya_local.device.time") as mock_time:
+            mock_time.return_value = 1000
+            subject = TuyaLocalDevice(
+                "Some name",
+                "some_dev_id",
+                "some.ip.address",
+                "some_local_key",
+                None,
+                self.hass(),
+                aggregation_window=60,
+            )
+            power = Mock()
+            switch = Mock()
+            subject.register_entity(power, ["19"])
+            subject.register_entity(switch, ["1"])
+            self.assertTrue(subject.aggregate_dps("19"))
+            listener = Mock()
+            subject.async_add_dps_listener(listener, ["19"])
+
+            subject._merge_dps({"1": True, "19": 100})
+            subject._async_update_entities()
+            power.async_write_ha_state.assert_called_once()
+            switch.async_write_ha_state.assert_called_once()
+
+            mock_time.return_value = 1030
+            subject._merge_dps({"19": 300})
+            subject._async_update_entities()
+            power.async_write_ha_state.assert_called_once()
+            listener.assert_called_with({"19": (100, 300)})
+            self.assertIsNone(subject.aggregate("19"))
+
+            mock_time.return_value = 1060
+            subject._async_update_entities()
+            self.assertEqual(power.async_write_ha_state.call_count, 2)
+            switch.async_write_ha_state.assert_called_once()
+            summary = subject.aggregate("19")
+            self.assertEqual(summary["mean"], 200)
+            self.assertEqual((summary["min"], summary["max"]), (100, 300))
+            self.assertEqual(summary["samples"], 2)
+
+    def test_energy_meter_is_fed_every_power_reading(self):
+        meter = Mock()
+        meter.dps_id = "19"
+        self.subject.energy_meter = meter
+        self.subject._api.status.return_value = {"dps": {"1": True, "19": 100}}
+        self.subject._api.updatedps.return_value = {"dps": {"19": 200}}
+        self.subject.set_poll_classes({"19": "fast"})
+        self.subject._refresh_cached_state()
+        self.subject._refresh_fast_dps()
+        self.subject._merge_dps({"1": False})
+        self.assertEqual([c[0][0] for c in meter.add.call_args_list], [100, 200])
+
+        self.subject._reset_cached_state()
+        meter.interrupt.assert_called_once()
+
+    def test_energy_sensor_is_written_under_steady_power(self):
+        meter = EnergyMeter(Mock(id="19"), self.subject, 0.001)
+        meter._dps._map_from_dps.side_effect = lambda value, device: value
+        self.subject.energy_meter = meter
+        power = Mock()
+        energy = Mock()
+        self.subject._api.status.return_value = {"dps": {"1": True, "19": 1000}}
+        with patch("custom_components.tuya_local.device.async_call_later"):
+            self.subject.register_entity(power, ["19"])
+            self.subject.register_entity(energy, [ENERGY_SENSOR_ID])
+        with patch("custom_components.tuya_local.device.time") as mock_time:
+            for now in (1000, 1060, 1120):
+                mock_time.return_value = now
+                self.subject._refresh_cached_state()
+                self.subject._async_update_entities()
+
+        power.async_write_ha_state.assert_called_once()
+        self.assertEqual(energy.async_write_ha_state.call_count, 3)
+        self.assertAlmostEqual(meter.total, 1 / 30)
+
+    def test_aggregation_is_disabled_by_default(self):
+        self.assertFalse(self.subject.aggregate_dps("19"))
+        self.assertIsNone(self.subject.aggregate("19"))
+
     def test_reset_cached_state_clears_cached_state_and_pending_updates(self):
         self.subject._cached_state = {"1": True, "updated_at": time()}
         self.subject._pending_updates = {"1": False}
@@ -217,29 +650,86 @@ class TestDevice(IsolatedAsyncioTestCase):
         self.assertEqual(self.subject._cached_state, {"updated_at": 0})
         self.assertEqual(self.subject._pending_updates, {})
 
+    def test_reset_cached_state_keeps_updates_to_send(self):
+        self.subject._add_properties_to_pending_updates({"1": False})
+        self.subject._reset_cached_state()
+        self.assertEqual(self.subject._intents.values(), {"1": False})
+
+    def test_failed_updates_are_resent_when_device_responds(self):
+        self.subject._CONNECTION_ATTEMPTS = 2
+        self.subject._api.generate_payload.side_effect = lambda cmd, dps: dict(dps)
+        self.subject._api._send_receive.side_effect = Exception("Error")
+        self.subject._api.status.return_value = {"dps": {"1": False}}
+
+        self.assertFalse(self.subject._send_properties({"1": True, "2": 10}))
+        self.assertEqual(self.subject._cached_state, {"updated_at": 0})
+        self.assertEqual(self.subject.intent_metrics()["depth"], 2)
+        self.subject._send_properties({"2": 20})
+        self.assertEqual(self.subject.intent_metrics()["collapsed"], 1)
+
+        self.subject._api._send_receive.side_effect = None
+        self.subject._api._send_receive.reset_mock()
+        self.subject.refresh()
+        self.subject._api._send_receive.assert_called_once_with({"1": True, "2": 20})
+        self.assertEqual(self.subject.intent_metrics()["depth"], 0)
+        self.assertEqual(self.subject.get_property("1"), True)
+
+    def test_queued_updates_are_sent_by_one_thread_at_a_time(self):
+        self.subject._api.generate_payload.side_effect = lambda cmd, dps: dict(dps)
+        self.subject._add_properties_to_pending_updates({"1": True})
+        sending = Event()
+        release = Event()
+
+        def send(payload):
+            sending.set()
+            release.wait(5)
+
+        self.subject._api._send_receive.side_effect = send
+        debounce = Thread(target=self.subject._send_pending_updates)
+        debounce.start()
+        self.assertTrue(sending.wait(5))
+        resend = Thread(target=self.subject._send_intents)
+        resend.start()
+        sleep(0.05)
+        release.set()
+        debounce.join(5)
+        resend.join(5)
+
+        self.subject._api._send_receive.assert_called_once_with({"1": True})
+        self.assertEqual(self.subject.intent_metrics()["depth"], 0)
+
+    def test_failed_updates_expire(self):
+        self.subject._CONNECTION_ATTEMPTS = 1
+        self.subject._intents.ttl = 30
+        self.subject._api._send_receive.side_effect = Exception("Error")
+        self.subject._api.status.return_value = {"dps": {"1": False}}
+        self.subject._send_properties({"1": True})
+
+        self.subject._api._send_receive.side_effect = None
+        self.subject._api._send_receive.reset_mock()
+        with patch("custom_components.tuya_local.device.time") as mock_time:
+            mock_time.return_value = time() + 30
+            self.subject.refresh()
+        self.subject._api._send_receive.assert_not_called()
+        self.assertEqual(self.subject.intent_metrics()["expired"], 1)
+
     def test_get_property_returns_value_from_cached_state(self):
         self.subject._cached_state = {"1": True}
         self.assertEqual(self.subject.get_property("1"), True)
 
     def test_get_property_returns_pending_update_value(self):
-        self.subject._pending_updates = {
-            "1": {"value": False, "updated_at": time() - 9}
-        }
+        self.subject._pending_updates = {"1": (False, time() - 9)}
         self.assertEqual(self.subject.get_property("1"), False)
 
     def test_pending_update_value_overrides_cached_value(self):
         self.subject._cached_state = {"1": True}
-        self.subject._pending_updates = {
-            "1": {"value": False, "updated_at": time() - 9}
-        }
+        self.subject._pending_updates = {"1": (False, time() - 9)}
 
         self.assertEqual(self.subject.get_property("1"), False)
 
     def test_expired_pending_update_value_does_not_override_cached_value(self):
         self.subject._cached_state = {"1": True}
-        self.subject._pending_updates = {
-            "1": {"value": False, "updated_at": time() - 10}
-        }
+        self.subject._pending_updates = {"1": (False, time() - 10)}
 
         self.assertEqual(self.subject.get_property("1"), True)
 
@@ -289,6 +779,19 @@ class TestDevice(IsolatedAsyncioTestCase):
             self.subject._set_properties({})
             mock.assert_not_called()
 
+    async def test_send_properties_sends_immediately(self):
+        self.run_executor_jobs_inline()
+        self.subject._api.generate_payload.return_value = "payload"
+        with patch("custom_components.tuya_local.device.Timer") as mock:
+            self.assertTrue(await self.subject.async_send_properties({"1": True}))
+            mock.assert_not_called()
+
+        self.subject._api.generate_payload.assert_called_once_with(
+            tinytuya.CONTROL, {"1": True}
+        )
+        self.subject._api._send_receive.assert_called_once_with("payload")
+        self.assertEqual(self.subject.get_property("1"), True)
+
     def test_anticipate_property_value_updates_cached_state(self):
         self.subject._cached_state = {"1": True}
         self.subject.anticipate_property_value("1", False)
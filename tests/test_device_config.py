@@ -1,12 +1,17 @@
 """Test the config parser"""
+from concurrent.futures import ThreadPoolExecutor
 from unittest import IsolatedAsyncioTestCase, TestCase
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 from custom_components.tuya_local.helpers.config import get_device_id
+from custom_components.tuya_local.helpers.dependencies import DpsDependencyGraph
 from custom_components.tuya_local.helpers.device_config import (
+    async_get_config,
     available_configs,
     get_config,
     TuyaDeviceConfig,
+    TuyaDpsFormat,
+    TuyaEntityConfig,
 )
 
 from .const import (
@@ -15,6 +20,14 @@ from .const import (
 )
 
 
+def entity_config(config):
+    """Return an entity config for a device config of just that entity."""
+    device = MagicMock()
+    entity = TuyaEntityConfig(device, config)
+    device.dependency_graph = DpsDependencyGraph([entity])
+    return entity
+
+
 class TestDeviceConfig(IsolatedAsyncioTestCase):
     """Test the device config parser"""
 
@@ -67,6 +80,8 @@ class TestDeviceConfig(IsolatedAsyncioTestCase):
             self.check_entity(parsed.primary_entity, cfg)
             for entity in parsed.secondary_entities():
                 self.check_entity(entity, cfg)
+            # Building the graph checks for cycles between the dps
+            self.assertIsNotNone(parsed.dependency_graph)
 
     # Most of the device_config functionality is exercised during testing of
     # the various supported devices.  These tests concentrate only on the gaps.
@@ -102,6 +117,258 @@ class TestDeviceConfig(IsolatedAsyncioTestCase):
         voltage = cfg.primary_entity.find_dps("voltage_v")
         self.assertIsNone(voltage.values(mock_device))
 
+    def test_dps_nearest_value(self):
+        """Test that values snap to the nearest of a fixed list."""
+        mock_device = MagicMock()
+        mock_device.get_property.return_value = "1"
+        cfg = get_config("goldair_dehumidifier")
+        for e in cfg.secondary_entities():
+            if e.entity == "fan":
+                speed = e.find_dps("speed")
+        self.assertEqual(speed.value_table(mock_device), (50, 100))
+        self.assertEqual(speed.nearest_value(mock_device, 10), 50)
+        self.assertEqual(speed.nearest_value(mock_device, 74), 50)
+        self.assertEqual(speed.nearest_value(mock_device, 76), 100)
+        self.assertEqual(speed.nearest_value(mock_device, 120), 100)
+        switch = cfg.primary_entity.find_dps("switch")
+        self.assertIsNone(switch.value_table(mock_device))
+        self.assertEqual(switch.nearest_value(mock_device, 10), 10)
+
+    def test_dps_value_table_follows_constraint(self):
+        """Test that the value table is rebuilt when its constraint changes."""
+        entity = entity_config(
+            {
+                "entity": "fan",
+                "dps": [
+                    {
+                        "id": 1,
+                        "name": "speed",
+                        "type": "integer",
+                        "mapping": [
+                            {
+                                "constraint": "preset_mode",
+                                "conditions": [
+                                    {
+                                        "dps_val": "sleep",
+                                        "mapping": [{"dps_val": 1, "value": 20}],
+                                    },
+                                    {
+                                        "dps_val": "normal",
+                                        "mapping": [
+                                            {"dps_val": 1, "value": 30},
+                                            {"dps_val": 2, "value": 60},
+                                            {"dps_val": 3, "value": 100},
+                                        ],
+                                    },
+                                ],
+                            },
+                        ],
+                    },
+                    {"id": 2, "name": "preset_mode", "type": "string"},
+                ],
+            },
+        )
+        speed = entity.find_dps("speed")
+        dps = {"2": "normal"}
+        mock_device = MagicMock()
+        mock_device.get_property.side_effect = dps.get
+
+        table = speed.value_table(mock_device)
+        self.assertEqual(table, (30, 60, 100))
+        self.assertIs(speed.value_table(mock_device), table)
+        self.assertEqual(speed.nearest_value(mock_device, 50), 60)
+        dps["2"] = "sleep"
+        self.assertEqual(speed.value_table(mock_device), (20,))
+        self.assertEqual(speed.nearest_value(mock_device, 50), 20)
+
+    def test_dps_value_table_follows_indirect_dependencies(self):
+        """Test that the value table follows the dps a mirrored dp depends on."""
+        entity = entity_config(
+            {
+                "entity": "fan",
+                "dps": [
+                    {
+                        "id": 1,
+                        "name": "speed",
+                        "type": "integer",
+                        "mapping": [{"value_mirror": "max_speed"}],
+                    },
+                    {
+                        "id": 2,
+                        "name": "max_speed",
+                        "type": "integer",
+                        "mapping": [
+                            {
+                                "constraint": "preset_mode",
+                                "conditions": [
+                                    {"dps_val": "sleep", "value": 20},
+                                    {"dps_val": "normal", "value": 100},
+                                ],
+                            },
+                        ],
+                    },
+                    {"id": 3, "name": "preset_mode", "type": "string"},
+                ],
+            },
+        )
+        speed = entity.find_dps("speed")
+        dps = {"2": 1, "3": "normal"}
+        mock_device = MagicMock()
+        mock_device.get_property.side_effect = dps.get
+
+        self.assertEqual(speed.value_table(mock_device), (100,))
+        dps["3"] = "sleep"
+        self.assertEqual(speed.value_table(mock_device), (20,))
+        self.assertEqual(speed.nearest_value(mock_device, 50), 20)
+
+    def test_dps_value_table_leaves_out_non_numeric_values(self):
+        """Test that only numbers are snapped to, but all values are counted."""
+        entity = entity_config(
+            {
+                "entity": "fan",
+                "dps": [
+                    {
+                        "id": 1,
+                        "name": "speed",
+                        "type": "string",
+                        "mapping": [
+                            {"dps_val": "low", "value": 30},
+                            {"dps_val": "high", "value": 100},
+                            {"dps_val": "auto", "value": "auto"},
+                        ],
+                    },
+                ],
+            },
+        )
+        speed = entity.find_dps("speed")
+        mock_device = MagicMock()
+        self.assertEqual(
+            sorted(speed.cached_values(mock_device), key=str), [100, 30, "auto"]
+        )
+        self.assertEqual(speed.value_table(mock_device), (30, 100))
+        self.assertEqual(speed.nearest_value(mock_device, 40), 30)
+
+    def test_dps_value_table_is_kept_per_device(self):
+        """Test that devices sharing a config do not share value tables."""
+        entity = entity_config(
+            {
+                "entity": "fan",
+                "dps": [
+                    {
+                        "id": 1,
+                        "name": "speed",
+                        "type": "integer",
+                        "mapping": [{"value_mirror": "max_speed"}],
+                    },
+                    {"id": 2, "name": "max_speed", "type": "integer"},
+                ],
+            },
+        )
+        speed = entity.find_dps("speed")
+        first = MagicMock()
+        first.get_property.side_effect = {"2": 3}.get
+        second = MagicMock()
+        second.get_property.side_effect = {"2": 5}.get
+        self.assertEqual(speed.value_table(first), (3,))
+        self.assertEqual(speed.value_table(second), (5,))
+        self.assertEqual(speed.value_table(first), (3,))
+
+    def test_dps_format_is_compiled_once(self):
+        """Test that the format is compiled once and shared."""
+        cfg = get_config("rgbcw_lightbulb")
+        rgbhsv = cfg.primary_entity.find_dps("rgbhsv")
+        fmt = rgbhsv.format
+        self.assertIs(rgbhsv.format, fmt)
+        other = TuyaDeviceConfig("rgbcw_lightbulb.yaml").primary_entity.find_dps(
+            "rgbhsv"
+        )
+        self.assertIs(other.format, fmt)
+        self.assertEqual(fmt.format, ">HHH")
+        self.assertEqual(fmt.names, ("h", "s", "v"))
+        self.assertEqual(fmt.ranges[1], {"min": 0, "max": 1000})
+        self.assertEqual(fmt.unpack(bytes.fromhex("0168000a03e8")), (360, 10, 1000))
+        self.assertIsNone(cfg.primary_entity.find_dps("switch").format)
+
+    def test_dps_format_three_byte_fields(self):
+        """Test that three byte fields are packed and unpacked as integers."""
+        fmt = TuyaDpsFormat(
+            (("a", 3, 0, 0xFFFFFF), ("b", 3, -0x800000, 0x7FFFFF), ("c", 1, 0, 255))
+        )
+        self.assertEqual(fmt.format, ">3s3sB")
+        self.assertEqual(fmt.unpack(bytes.fromhex("010203fffffe07")), (0x10203, -2, 7))
+        self.assertEqual(fmt.pack(0x10203, -2, 7).hex(), "010203fffffe07")
+
+    def test_dps_encode_and_decode_base64(self):
+        """Test that base64 values round trip."""
+        cfg = TuyaDeviceConfig("rgbcw_lightbulb.yaml")
+        dp = cfg.primary_entity.find_dps("rgbhsv")
+        dp._config = {**dp._config, "type": "base64"}
+        encoded = dp.encode_value(b"\x00\x01\xff")
+        self.assertEqual(encoded, "AAH/")
+        mock_device = MagicMock()
+        mock_device.get_property.return_value = encoded
+        self.assertEqual(dp.decoded_value(mock_device), b"\x00\x01\xff")
+
+    def test_poll_classes(self):
+        """Test that the fastest poll class is used for each dp."""
+        cfg = get_config("smartplugv2")
+        classes = cfg.poll_classes()
+        self.assertEqual(classes["1"], "normal")
+        self.assertEqual(classes["18"], "fast")
+        self.assertEqual(classes["19"], "fast")
+        self.assertEqual(classes["20"], "fast")
+
+    def test_config_is_shared_by_type(self):
+        """Test that devices of the same type share one config."""
+        cfg = get_config("smartplugv2")
+        self.assertIs(get_config("smartplugv2"), cfg)
+        self.assertIs(cfg.primary_entity, get_config("smartplugv2").primary_entity)
+        self.assertIsNot(get_config("smartplugv1"), cfg)
+
+    def test_stringified_dps_are_kept_per_device(self):
+        """Test that a device reporting a dp as a string affects only itself."""
+        dp = get_config("deta_fan").primary_entity.find_dps("speed")
+        stringy = MagicMock()
+        stringy.get_property.return_value = "1"
+        numeric = MagicMock()
+        numeric.get_property.return_value = 1
+        self.assertAlmostEqual(dp.get_value(stringy), 33.3, 1)
+        self.assertAlmostEqual(dp.get_value(numeric), 33.3, 1)
+        self.assertEqual(dp.get_values_to_set(stringy, 66.7), {"3": "2"})
+        self.assertEqual(dp.get_values_to_set(numeric, 66.7), {"3": 2})
+
+    def test_values_to_set_depend_only_on_device_state(self):
+        """Test that encoding does not depend on what was read before."""
+        dp = get_config("deta_fan").primary_entity.find_dps("speed")
+        stringy = MagicMock()
+        stringy.get_property.return_value = "1"
+        numeric = MagicMock()
+        numeric.get_property.return_value = 1
+        self.assertEqual(dp.get_values_to_set(stringy, 66.7), {"3": "2"})
+        dp.get_value(numeric)
+        self.assertEqual(dp.get_values_to_set(stringy, 66.7), {"3": "2"})
+        dp.get_value(stringy)
+        self.assertEqual(dp.get_values_to_set(numeric, 66.7), {"3": 2})
+
+    def test_shared_config_evaluates_concurrently(self):
+        """Test that devices sharing a config can be evaluated in parallel."""
+        dp = get_config("deta_fan").primary_entity.find_dps("speed")
+        devices = []
+        for n in range(8):
+            device = MagicMock()
+            device.get_property.return_value = str(n % 3 + 1) if n % 2 else n % 3 + 1
+            devices.append(device)
+        expected = [dp.get_values_to_set(d, 66.7) for d in devices]
+
+        def evaluate(device):
+            for _ in range(200):
+                dp.get_value(device)
+                result = dp.get_values_to_set(device, 66.7)
+            return result
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            self.assertEqual(list(pool.map(evaluate, devices)), expected)
+
     def test_config_returned(self):
         """Test that config file is returned by config"""
         cfg = get_config("kogan_switch")
@@ -113,3 +380,18 @@ class TestDeviceConfig(IsolatedAsyncioTestCase):
                          get_device_id({"device_id": "my-device-id"}))
         self.assertEqual("sub-id", get_device_id({"device_cid": "sub-id"}))
         self.assertEqual("s", get_device_id({"device_id": "d", "device_cid": "s"}))
+
+    async def test_async_get_config_uses_executor_until_cached(self):
+        """Test that configs are loaded in the executor, then served from cache."""
+        hass = MagicMock()
+        hass.async_add_executor_job = AsyncMock(
+            side_effect=lambda func, *args: func(*args)
+        )
+        cfg = await async_get_config(hass, "kogan_switch")
+        self.assertEqual(cfg.config, "smartplugv1.yaml")
+        hass.async_add_executor_job.assert_awaited_once()
+
+        hass.async_add_executor_job.reset_mock()
+        cfg = await async_get_config(hass, "smartplugv1")
+        self.assertEqual(cfg.config_type, "smartplugv1")
+        hass.async_add_executor_job.assert_not_awaited()
@@ -13,6 +13,8 @@ from custom_components.tuya_local.diagnostics import (
     async_get_config_entry_diagnostics,
     async_get_device_diagnostics,
 )
+from custom_components.tuya_local.helpers.profiling import get_profiler
+from custom_components.tuya_local.helpers.tracing import DeviceTrace
 
 
 async def test_config_entry_diagnostics(hass):
@@ -44,3 +46,63 @@ async def test_device_diagnostics(hass):
     diag = await async_get_device_diagnostics(hass, entry, m_device)
 
     assert diag
+
+
+async def test_config_entry_diagnostics_includes_startup_profile(hass):
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_DEVICE_ID: "test_device",
+            CONF_LOCAL_KEY: "test_key",
+            CONF_TYPE: "simple_switch",
+        },
+    )
+    m_device = AsyncMock()
+    hass.data[DOMAIN] = {"test_device": {"device": m_device}}
+    profiler = get_profiler(hass)
+    profiler.enabled = True
+    with profiler.timeline(entry).phase("setup_device"):
+        pass
+
+    diag = await async_get_config_entry_diagnostics(hass, entry)
+
+    assert diag["startup_profile"]["phases"][0]["phase"] == "setup_device"
+    assert diag["startup_summary"]["entries"] == 1
+
+
+async def test_device_diagnostics_includes_trace(hass):
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_DEVICE_ID: "test_device",
+            CONF_LOCAL_KEY: "test_key",
+            CONF_TYPE: "simple_switch",
+        },
+    )
+    m_device = AsyncMock()
+    m_device.poll_interval = Mock()
+    m_device.trace = DeviceTrace()
+    m_device.trace.record("refresh", dps={"1": True})
+    hass.data[DOMAIN] = {"test_device": {"device": m_device}}
+    diag = await async_get_device_diagnostics(hass, entry, m_device)
+
+    assert diag["trace"][0]["event"] == "refresh"
+    assert diag["trace"][0]["dps"] == {"1": True}
+
+
+async def test_device_diagnostics_includes_intent_metrics(hass):
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_DEVICE_ID: "test_device",
+            CONF_LOCAL_KEY: "test_key",
+            CONF_TYPE: "simple_switch",
+        },
+    )
+    m_device = AsyncMock()
+    m_device.poll_interval = Mock()
+    m_device.intent_metrics = Mock(return_value={"depth": 1, "oldest_age": 5})
+    hass.data[DOMAIN] = {"test_device": {"device": m_device}}
+    diag = await async_get_device_diagnostics(hass, entry, m_device)
+
+    assert diag["intents"] == {"depth": 1, "oldest_age": 5}
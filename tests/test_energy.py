@@ -0,0 +1,61 @@
+"""Tests for integrating power readings into energy"""
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from custom_components.tuya_local.helpers.device_config import TuyaDeviceConfig
+from custom_components.tuya_local.helpers.energy import EnergyMeter, find_power_dps
+
+
+class TestEnergyMeter(TestCase):
+    def setUp(self):
+        self.device = MagicMock()
+        self.subject = EnergyMeter.for_config(
+            TuyaDeviceConfig("smartplugv2.yaml"), self.device
+        )
+
+    def test_finds_power_dps(self):
+        dps, kw_per_unit = find_power_dps(TuyaDeviceConfig("smartplugv2.yaml"))
+        self.assertEqual(dps.id, "19")
+        self.assertEqual(kw_per_unit, 0.001)
+        self.assertEqual(
+            find_power_dps(TuyaDeviceConfig("mirabella_genio_usb.yaml")),
+            (None, None),
+        )
+        self.assertIsNone(
+            EnergyMeter.for_config(
+                TuyaDeviceConfig("mirabella_genio_usb.yaml"), self.device
+            )
+        )
+
+    def test_integrates_decoded_readings(self):
+        # Raw readings are in tenths of a W
+        self.subject.add(10000, 0)
+        self.assertEqual(self.subject.total, 0)
+        self.subject.add(20000, 360)
+        self.assertAlmostEqual(self.subject.total, 0.1)
+        self.subject.add(0, 720)
+        self.assertAlmostEqual(self.subject.total, 0.3)
+
+    def test_does_not_integrate_across_gaps(self):
+        self.subject.add(10000, 0)
+        self.subject.add(10000, 3600)
+        self.assertEqual(self.subject.total, 0)
+        self.subject.add(10000, 3960)
+        self.assertAlmostEqual(self.subject.total, 0.1)
+        self.subject.interrupt()
+        self.subject.add(10000, 4320)
+        self.assertAlmostEqual(self.subject.total, 0.1)
+
+    def test_ignores_invalid_readings(self):
+        self.subject.add(None, 0)
+        self.subject.add("bad", 10)
+        self.subject.add(10000, 20)
+        self.subject.add(10000, 380)
+        self.assertAlmostEqual(self.subject.total, 0.1)
+
+    def test_restores_total_once(self):
+        self.subject.add(10000, 0)
+        self.subject.add(10000, 360)
+        self.subject.restore(5)
+        self.subject.restore(5)
+        self.assertAlmostEqual(self.subject.total, 5.1)
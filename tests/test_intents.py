@@ -0,0 +1,58 @@
+"""Tests for the queue of values to send to a device"""
+from unittest import TestCase
+
+from custom_components.tuya_local.helpers.intents import IntentQueue
+
+
+class TestIntentQueue(TestCase):
+    def setUp(self):
+        self.subject = IntentQueue(ttl=60)
+
+    def test_superseded_values_are_collapsed(self):
+        self.subject.put({"1": True, "2": 10}, 0)
+        self.subject.put({"2": 20}, 5)
+        self.assertEqual(self.subject.values(), {"1": True, "2": 20})
+        self.assertEqual(len(self.subject), 2)
+        self.assertEqual(self.subject.metrics(10)["collapsed"], 1)
+
+    def test_sent_values_are_removed_unless_superseded(self):
+        self.subject.put({"1": True, "2": 10}, 0)
+        sending = self.subject.values()
+        self.subject.put({"2": 20}, 1)
+        self.subject.sent(sending)
+        self.assertEqual(self.subject.values(), {"2": 20})
+
+    def test_values_expire_after_ttl(self):
+        self.subject.put({"1": True}, 0)
+        self.subject.put({"2": 10}, 30)
+        self.assertEqual(self.subject.expire(59), {})
+        self.assertEqual(self.subject.expire(60), {"1": True})
+        self.assertEqual(self.subject.values(), {"2": 10})
+        self.assertEqual(self.subject.metrics(60)["expired"], 1)
+
+    def test_stalled_after_failure_until_drained(self):
+        self.subject.put({"1": True}, 0)
+        self.assertFalse(self.subject.stalled)
+        self.subject.failed()
+        self.assertTrue(self.subject.stalled)
+        self.subject.sent({"1": True})
+        self.assertFalse(self.subject.stalled)
+
+    def test_metrics(self):
+        self.assertEqual(
+            self.subject.metrics(0),
+            {
+                "depth": 0,
+                "oldest_age": None,
+                "collapsed": 0,
+                "expired": 0,
+                "failed_sends": 0,
+            },
+        )
+        self.subject.put({"1": True}, 10)
+        self.subject.put({"2": 1}, 15)
+        self.subject.failed()
+        metrics = self.subject.metrics(25)
+        self.assertEqual(metrics["depth"], 2)
+        self.assertEqual(metrics["oldest_age"], 15)
+        self.assertEqual(metrics["failed_sends"], 1)
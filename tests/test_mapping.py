@@ -0,0 +1,314 @@
+"""Tests for the compiled dp mapping plans"""
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from custom_components.tuya_local.helpers.device_config import (
+    available_configs,
+    get_config,
+)
+
+
+def _match(dp, matchdata, value):
+    """Return true val1 matches val2"""
+    if dp.rawtype == "bitfield" and matchdata:
+        try:
+            return (int(value) & int(matchdata)) != 0
+        except (TypeError, ValueError):
+            return False
+    else:
+        return str(value) == str(matchdata)
+
+
+def _find_map_for_dps(dp, value):
+    default = None
+    for m in dp._config.get("mapping", {}):
+        if "dps_val" not in m:
+            default = m
+        elif _match(dp, m["dps_val"], value):
+            return m
+    return default
+
+
+def interpret_from_dps(dp, value, device):
+    """
+    Map a value read from the device by interpreting the mapping config of
+    dp on each call, as was done before mappings were compiled.  The plans
+    are checked against this, and benchmarked against it.
+    """
+    if value is not None and dp.type is not str and isinstance(value, str):
+        try:
+            value = dp.type(value)
+        except ValueError:
+            pass
+
+    result = value
+
+    mapping = _find_map_for_dps(dp, value)
+    if mapping:
+        scale = mapping.get("scale", 1)
+        invert = mapping.get("invert", False)
+
+        if not isinstance(scale, (int, float)):
+            scale = 1
+        redirect = mapping.get("value_redirect")
+        mirror = mapping.get("value_mirror")
+        result = mapping.get("value", result)
+        cond = _active_condition(dp, mapping, device)
+        if cond:
+            if cond.get("invalid", False):
+                return None
+            result = cond.get("value", result)
+            scale = cond.get("scale", scale)
+            redirect = cond.get("value_redirect", redirect)
+            mirror = cond.get("value_mirror", mirror)
+            for m in cond.get("mapping", {}):
+                if str(m.get("dps_val")) == str(result):
+                    result = m.get("value", result)
+
+        if redirect:
+            r_dps = dp._entity.find_dps(redirect)
+            return r_dps.get_value(device)
+        if mirror:
+            r_dps = dp._entity.find_dps(mirror)
+            return r_dps.get_value(device)
+
+        if invert and isinstance(result, (int, float)):
+            r = dp._config.get("range")
+            if r and "min" in r and "max" in r:
+                result = -1 * result + r["min"] + r["max"]
+
+        if scale != 1 and isinstance(result, (int, float)):
+            result = result / scale
+
+    return result
+
+
+def _find_map_for_value(dp, value, device):
+    default = None
+    for m in dp._config.get("mapping", {}):
+        if "dps_val" not in m:
+            default = m
+        if "value" in m and str(m["value"]) == str(value):
+            return m
+        if "value" not in m and "value_mirror" in m:
+            r_dps = dp._entity.find_dps(m["value_mirror"])
+            if str(r_dps.get_value(device)) == str(value):
+                return m
+
+        for c in m.get("conditions", {}):
+            if "value" in c and str(c["value"]) == str(value):
+                return m
+            if "value" not in c and "value_mirror" in c:
+                r_dps = dp._entity.find_dps(c["value_mirror"])
+                if str(r_dps.get_value(device)) == str(value):
+                    return m
+    return default
+
+
+def _active_condition(dp, mapping, device, value=None):
+    constraint = mapping.get("constraint")
+    conditions = mapping.get("conditions")
+    c_match = None
+    if constraint and conditions:
+        c_dps = dp._entity.find_dps(constraint)
+        c_val = None if c_dps is None else device.get_property(c_dps.id)
+        for cond in conditions:
+            if c_val is not None and c_val == cond.get("dps_val"):
+                c_match = cond
+            # Case where matching None, need extra checks to ensure we
+            # are not just defaulting and it is really a match
+            elif (
+                c_val is None
+                and c_dps is not None
+                and "dps_val" in cond
+                and cond.get("dps_val") is None
+            ):
+                c_match = cond
+            # when changing, another condition may become active
+            # return that if it exists over a current condition
+            if value is not None and value == cond.get("value"):
+                return cond
+
+    return c_match
+
+
+def interpret_values_to_set(dp, device, value):
+    """
+    Return the dps values to set by interpreting the mapping config of dp
+    on each call, as was done before mappings were compiled.
+    """
+    result = value
+    dps_map = {}
+    mapping = _find_map_for_value(dp, value, device)
+    if mapping:
+        scale = mapping.get("scale", 1)
+        redirect = mapping.get("value_redirect")
+        invert = mapping.get("invert", False)
+
+        if not isinstance(scale, (int, float)):
+            scale = 1
+        step = mapping.get("step")
+        if not isinstance(step, (int, float)):
+            step = None
+        if "dps_val" in mapping:
+            result = mapping["dps_val"]
+        # Conditions may have side effect of setting another value.
+        cond = _active_condition(dp, mapping, device, value)
+        if cond:
+            cval = cond.get("value")
+            if cval is None:
+                r_dps = cond.get("value_mirror")
+                if r_dps:
+                    cval = dp._entity.find_dps(r_dps).get_value(device)
+
+            if cval == value:
+                c_dps = dp._entity.find_dps(mapping["constraint"])
+                c_val = c_dps._map_from_dps(
+                    cond.get("dps_val", device.get_property(c_dps.id)),
+                    device,
+                )
+                dps_map.update(c_dps.get_values_to_set(device, c_val))
+
+            # Allow simple conditional mapping overrides
+            for m in cond.get("mapping", {}):
+                if m.get("value") == value:
+                    result = m.get("dps_val", result)
+
+            scale = cond.get("scale", scale)
+            step = cond.get("step", step)
+            redirect = cond.get("value_redirect", redirect)
+
+        if redirect:
+            r_dps = dp._entity.find_dps(redirect)
+            return r_dps.get_values_to_set(device, value)
+
+        if scale != 1 and isinstance(result, (int, float)):
+            result = result * scale
+            remap = _find_map_for_value(dp, result, device)
+            if remap and "dps_val" in remap and "dps_val" not in mapping:
+                result = remap["dps_val"]
+
+        if invert:
+            r = dp._config.get("range")
+            if r and "min" in r and "max" in r:
+                result = -1 * result + r["min"] + r["max"]
+
+        if step and isinstance(result, (int, float)):
+            result = step * round(float(result) / step)
+            remap = _find_map_for_value(dp, result, device)
+            if remap and "dps_val" in remap and "dps_val" not in mapping:
+                result = remap["dps_val"]
+
+    r = dp.range(device, scaled=False)
+    if r and isinstance(result, (int, float)):
+        minimum = r["min"]
+        maximum = r["max"]
+        if result < minimum or result > maximum:
+            # Output scaled values in the error message
+            r = dp.range(device, scaled=True)
+            minimum = r["min"]
+            maximum = r["max"]
+            raise ValueError(
+                f"{dp.name} ({value}) must be between {minimum} and {maximum}"
+            )
+
+    dps_map[dp.id] = dp._correct_type(result, device)
+    return dps_map
+
+
+def _outcome(fn, *args):
+    try:
+        return ("value", fn(*args))
+    except Exception as e:
+        return ("error", type(e))
+
+
+def _raw_samples(dp):
+    config = dp._config
+    samples = [None]
+    r = config.get("range")
+    if r:
+        samples += [r.get("min"), r.get("max")]
+    for m in config.get("mapping", []):
+        if "dps_val" in m:
+            samples.append(m["dps_val"])
+        for c in m.get("conditions", []):
+            if "dps_val" in c:
+                samples.append(c["dps_val"])
+    return samples
+
+
+def _set_samples(dp):
+    config = dp._config
+    samples = []
+    r = config.get("range")
+    if r:
+        samples += [r.get("min"), r.get("max"), r.get("max", 0) + 1]
+    for m in config.get("mapping", []):
+        if "value" in m:
+            samples.append(m["value"])
+        for c in m.get("conditions", []):
+            if "value" in c:
+                samples.append(c["value"])
+            for m2 in c.get("mapping", []):
+                if "value" in m2:
+                    samples.append(m2["value"])
+    return samples
+
+
+def _constraint_states(entity, dp):
+    """Yield the states of the dps the mapping of dp is constrained by."""
+    yield {}
+    for m in dp._config.get("mapping", []):
+        c_dps = entity.find_dps(m.get("constraint"))
+        if c_dps is None:
+            continue
+        for c in m.get("conditions", []):
+            yield {c_dps.id: c.get("dps_val")}
+
+
+class TestMappingPlan(TestCase):
+    def check_entity(self, entity):
+        dps = list(entity.dps())
+        base = {}
+        for d in dps:
+            samples = _raw_samples(d)
+            base[d.id] = samples[1] if len(samples) > 1 else None
+        for dp in dps:
+            for constraint in _constraint_states(entity, dp):
+                state = {**base, **constraint}
+                device = MagicMock()
+                device.get_property.side_effect = state.get
+                device.name = "Test"
+                for raw in _raw_samples(dp):
+                    self.assertEqual(
+                        _outcome(dp._map_from_dps, raw, device),
+                        _outcome(interpret_from_dps, dp, raw, device),
+                        f"{dp.name} reading {raw} with {constraint}",
+                    )
+                for value in _set_samples(dp):
+                    self.assertEqual(
+                        _outcome(dp.get_values_to_set, device, value),
+                        _outcome(interpret_values_to_set, dp, device, value),
+                        f"{dp.name} setting {value} with {constraint}",
+                    )
+
+    def test_plans_match_interpreted_mappings(self):
+        """Test that compiled plans behave as the interpreted config does."""
+        for fname in available_configs():
+            cfg = get_config(fname[:-5])
+            with self.subTest(config=fname):
+                self.check_entity(cfg.primary_entity)
+                for entity in cfg.secondary_entities():
+                    self.check_entity(entity)
+
+    def test_plan_is_compiled_once(self):
+        cfg = get_config("goldair_gpph_heater").primary_entity
+        temperature = cfg.find_dps("temperature")
+        plan = temperature.plan
+        self.assertIs(cfg.find_dps("temperature"), temperature)
+        self.assertIs(temperature.plan, plan)
+        self.assertIs(
+            plan.mappings[0].conditions[0].redirect_dps,
+            cfg.find_dps("eco_temperature"),
+        )
@@ -0,0 +1,60 @@
+"""Tests for the adaptive poll interval"""
+from time import time
+from unittest import TestCase
+
+from custom_components.tuya_local.helpers.polling import (
+    AdaptivePollInterval,
+    full_refresh_age,
+)
+
+
+class TestAdaptivePollInterval(TestCase):
+    def test_starts_at_default_within_bounds(self):
+        self.assertEqual(AdaptivePollInterval(5, 120).interval, 30)
+        self.assertEqual(AdaptivePollInterval(60, 120).interval, 60)
+        self.assertEqual(AdaptivePollInterval(1, 10).interval, 10)
+
+    def test_narrows_on_change_down_to_minimum(self):
+        poll = AdaptivePollInterval(5, 120)
+        poll.observe(True)
+        self.assertEqual(poll.interval, 15)
+        for i in range(5):
+            poll.observe(True)
+        self.assertEqual(poll.interval, 5)
+
+    def test_widens_without_change_up_to_maximum(self):
+        poll = AdaptivePollInterval(5, 120)
+        poll.observe(False)
+        self.assertEqual(poll.interval, 37.5)
+        for i in range(20):
+            poll.observe(False)
+        self.assertEqual(poll.interval, 120)
+
+    def test_change_rate(self):
+        poll = AdaptivePollInterval()
+        self.assertIsNone(poll.change_rate)
+        poll.observe(True)
+        poll.observe(False)
+        poll.observe(False)
+        poll.observe(False)
+        self.assertEqual(poll.change_rate, 0.25)
+        self.assertEqual(poll.as_dict()["change_rate"], 0.25)
+
+    def test_boost_uses_minimum_temporarily(self):
+        poll = AdaptivePollInterval(5, 120)
+        poll.boost(10)
+        self.assertEqual(poll.interval, 5)
+        poll._boost_until = time() - 1
+        self.assertEqual(poll.interval, 30)
+
+
+class TestFullRefreshAge(TestCase):
+    def test_no_fast_dps_always_needs_full_refresh(self):
+        self.assertEqual(full_refresh_age({"1": "normal", "2": "slow"}), 0)
+
+    def test_uses_fastest_non_fast_class(self):
+        self.assertEqual(full_refresh_age({"1": "fast", "2": "slow"}), 600)
+        self.assertEqual(
+            full_refresh_age({"1": "fast", "2": "slow", "3": "normal"}), 60
+        )
+        self.assertEqual(full_refresh_age({"1": "fast"}), 600)
@@ -0,0 +1,78 @@
+"""Tests for the startup profiler"""
+from unittest import TestCase
+from unittest.mock import Mock
+
+from custom_components.tuya_local.helpers.profiling import (
+    FIRST_REFRESH,
+    NULL_TIMELINE,
+    StartupProfiler,
+)
+
+
+def mock_entry(entry_id, title):
+    entry = Mock()
+    entry.entry_id = entry_id
+    entry.title = title
+    return entry
+
+
+class TestStartupProfiler(TestCase):
+    def test_disabled_profiler_records_nothing(self):
+        profiler = StartupProfiler()
+        timeline = profiler.timeline(mock_entry("1", "Plug"))
+        self.assertIs(timeline, NULL_TIMELINE)
+        with timeline.phase("setup_device"):
+            pass
+        self.assertIsNone(profiler.get("1"))
+        self.assertEqual(profiler.summary()["entries"], 0)
+
+    def test_timeline_records_phases(self):
+        profiler = StartupProfiler(True)
+        timeline = profiler.timeline(mock_entry("1", "Plug"))
+        self.assertIs(profiler.timeline(mock_entry("1", "Plug")), timeline)
+        timeline.record("setup_device", timeline._started, timeline._started + 1)
+        timeline.record("get_config", timeline._started + 1, timeline._started + 3)
+        timeline.record("get_config", timeline._started + 3, timeline._started + 4)
+
+        self.assertEqual(timeline.total, 4)
+        self.assertEqual(timeline.durations(), {"setup_device": 1, "get_config": 3})
+        result = timeline.as_dict()
+        self.assertEqual(result["name"], "Plug")
+        self.assertEqual(
+            result["phases"][1],
+            {"phase": "get_config", "offset": 1, "duration": 2},
+        )
+
+    def test_slowest_entries_and_phases(self):
+        profiler = StartupProfiler(True)
+        fast = profiler.timeline(mock_entry("1", "Fast"))
+        slow = profiler.timeline(mock_entry("2", "Slow"))
+        fast.record("setup_device", 0, 1)
+        fast.record(FIRST_REFRESH, 1, 2)
+        slow.record("setup_device", 0, 2)
+        slow.record(FIRST_REFRESH, 2, 12)
+
+        self.assertEqual(profiler.slowest_entries(), [("Slow", 12), ("Fast", 2)])
+        self.assertEqual(
+            profiler.slowest_phases(1),
+            [
+                {
+                    "phase": FIRST_REFRESH,
+                    "total": 11,
+                    "worst": 10,
+                    "worst_entry": "Slow",
+                }
+            ],
+        )
+
+    def test_summary_logged_once_all_entries_complete(self):
+        profiler = StartupProfiler(True)
+        profiler.log_summary = Mock()
+        first = profiler.timeline(mock_entry("1", "First"))
+        second = profiler.timeline(mock_entry("2", "Second"))
+
+        first.record(FIRST_REFRESH, 0, 1)
+        profiler.log_summary.assert_not_called()
+        second.record(FIRST_REFRESH, 0, 1)
+        profiler.log_summary.assert_called_once()
+        self.assertTrue(first.complete and second.complete)
@@ -0,0 +1,105 @@
+"""Tests for recording and replaying device traffic"""
+import os
+from tempfile import TemporaryDirectory
+from time import monotonic
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from custom_components.tuya_local.device import TuyaLocalDevice
+from custom_components.tuya_local.helpers.recording import (
+    CONTROL,
+    STATUS,
+    UPDATEDPS,
+    ReplayTransport,
+    TrafficRecorder,
+    read_recording,
+)
+
+
+class TestRecording(TestCase):
+    def setUp(self):
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "recordings", "device.jsonl")
+
+    def test_records_are_appended(self):
+        recorder = TrafficRecorder(self.path)
+        recorder.record(STATUS, {"dps": {"1": True}})
+        recorder.record(CONTROL, {"1": False})
+        recorder.close()
+        TrafficRecorder(self.path).record(STATUS, {"dps": {"1": False}})
+
+        records = list(read_recording(self.path))
+        self.assertEqual(
+            [(kind, data) for _, kind, data in records],
+            [
+                (STATUS, {"dps": {"1": True}}),
+                (CONTROL, {"1": False}),
+                (STATUS, {"dps": {"1": False}}),
+            ],
+        )
+        with open(self.path) as f:
+            self.assertNotIn(" ", f.readline())
+
+    def test_replay_returns_responses_in_order(self):
+        recorder = TrafficRecorder(self.path)
+        recorder.record(STATUS, {"dps": {"1": True}})
+        recorder.record(UPDATEDPS, {"dps": {"2": 5}})
+        recorder.record(STATUS, {"dps": {"1": False}})
+        replay = ReplayTransport(self.path, speed=0)
+        self.assertEqual(replay.remaining, 3)
+        self.assertEqual(replay.status(), {"dps": {"1": True}})
+        self.assertEqual(replay.updatedps([2]), {"dps": {"2": 5}})
+        self.assertEqual(replay.status(), {"dps": {"1": False}})
+        with self.assertRaises(EOFError):
+            replay.status()
+
+    def test_replay_is_paced_by_speed(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w") as f:
+            f.write('[0,"status",{"dps":{}}]\n[0.5,"status",{"dps":{}}]\n')
+        replay = ReplayTransport(self.path, speed=10)
+        start = monotonic()
+        replay.status()
+        replay.status()
+        self.assertGreaterEqual(monotonic() - start, 0.05)
+        self.assertLess(monotonic() - start, 0.5)
+
+    @patch("tinytuya.Device")
+    def test_device_traffic_can_be_replayed(self, mock_api):
+        hass = MagicMock()
+        device = TuyaLocalDevice(
+            "Test",
+            "dev_id",
+            "address",
+            "key",
+            None,
+            hass,
+            recorder=TrafficRecorder(self.path),
+        )
+        device._api.status.return_value = {"dps": {"1": True, "2": 20}}
+        device._api._send_receive.return_value = {"dps": {"1": False}}
+        device.refresh()
+        device._send_properties({"1": False})
+
+        kinds = [kind for _, kind, _ in read_recording(self.path)]
+        self.assertEqual(kinds, [STATUS, CONTROL, "reply"])
+
+        replayed = TuyaLocalDevice("Test", "dev_id", "address", "key", None, hass)
+        replayed._api = ReplayTransport(self.path, speed=0)
+        replayed.refresh()
+        self.assertTrue(replayed._send_properties({"1": False}))
+        self.assertEqual(replayed._api.sent, [{"1": False}])
+        self.assertEqual(replayed._cached_state["2"], 20)
+
+    @patch("tinytuya.Device")
+    def test_closing_device_closes_recording(self, mock_api):
+        recorder = TrafficRecorder(self.path)
+        device = TuyaLocalDevice(
+            "Test", "dev_id", "address", "key", None, MagicMock(), recorder=recorder
+        )
+        recorder.record(STATUS, {"dps": {"1": True}})
+        file = recorder._file
+        device.async_close()
+        self.assertTrue(file.closed)
+        self.assertIsNone(recorder._file)
@@ -0,0 +1,113 @@
+"""Tests for resolving entity dps against a state snapshot"""
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from homeassistant.helpers.entity import Entity
+
+from custom_components.tuya_local.generic.climate import TuyaLocalClimate
+from custom_components.tuya_local.helpers.device_config import get_config
+from custom_components.tuya_local.helpers.resolver import EntityResolver
+from custom_components.tuya_local.helpers.state import StateStore
+
+from .const import GPPH_HEATER_PAYLOAD
+
+
+class TestEntityResolver(TestCase):
+    def setUp(self):
+        self.dps = GPPH_HEATER_PAYLOAD.copy()
+        self.device = MagicMock()
+        self.device.get_property.side_effect = lambda id: self.dps.get(id)
+        self.config = get_config("goldair_gpph_heater").primary_entity
+
+    def test_resolves_each_dps_once(self):
+        resolver = EntityResolver(self.config, self.device)
+        ids = [d.id for d in self.config.dps()]
+        self.assertEqual(self.device.get_property.call_count, len(set(ids)))
+        temperature = self.config.find_dps("temperature")
+        self.assertEqual(resolver.get(temperature), 25)
+        self.assertEqual(resolver.get(self.config.find_dps("preset_mode")), "comfort")
+        self.assertEqual(self.device.get_property.call_count, len(set(ids)))
+
+    def test_snapshot_is_not_affected_by_later_changes(self):
+        resolver = EntityResolver(self.config, self.device)
+        temperature = self.config.find_dps("temperature")
+        self.dps["4"] = "ECO"
+        self.dps["2"] = 30
+        self.assertEqual(resolver.get(temperature), 25)
+        self.assertEqual(resolver.range(temperature), {"min": 5, "max": 35})
+
+        resolver = EntityResolver(self.config, self.device)
+        self.assertEqual(resolver.get(temperature), 20)
+        self.assertEqual(resolver.range(temperature), {"min": 5, "max": 21})
+
+    def test_derived_values_are_reused(self):
+        resolver = EntityResolver(self.config, self.device)
+        preset = self.config.find_dps("preset_mode")
+        values = resolver.values(preset)
+        self.assertCountEqual(values, ["comfort", "eco", "away"])
+        self.assertIs(resolver.values(preset), values)
+
+    def test_climate_write_shares_one_resolver(self):
+        climate = TuyaLocalClimate(self.device, self.config)
+        reads = []
+
+        def write(entity):
+            entity.hvac_mode
+            entity.target_temperature
+            entity.min_temp
+            entity.max_temp
+            entity.preset_mode
+            entity.preset_modes
+            entity.extra_state_attributes
+            reads.append(self.device.get_property.call_count)
+
+        with patch.object(Entity, "async_write_ha_state", write):
+            climate.async_write_ha_state()
+
+        ids = {d.id for d in self.config.dps()}
+        self.assertEqual(reads, [len(ids)])
+        self.assertIsNotNone(climate._resolver)
+
+    def test_refresh_evaluates_affected_dps_again(self):
+        resolver = EntityResolver(self.config, self.device)
+        temperature = self.config.find_dps("temperature")
+        preset = self.config.find_dps("preset_mode")
+        power = self.config.find_dps("power_level")
+        self.assertEqual(resolver.range(temperature), {"min": 5, "max": 35})
+        power_values = resolver.values(power)
+
+        self.assertEqual(resolver.refresh(self.device), set())
+        self.dps["4"] = "ECO"
+        self.assertEqual(resolver.refresh(self.device), {"4"})
+        self.assertEqual(resolver.get(preset), "eco")
+        # temperature is redirected to eco_temperature in eco mode
+        self.assertEqual(resolver.get(temperature), 20)
+        self.assertEqual(resolver.range(temperature), {"min": 5, "max": 21})
+        self.assertIs(resolver.values(power), power_values)
+
+    def test_snapshot_is_reused_until_the_state_changes(self):
+        store = StateStore()
+        store.replace(dps=self.dps)
+        type(self.device).state_version = property(lambda _: store.current)
+        climate = TuyaLocalClimate(self.device, self.config)
+        self.assertEqual(climate.target_temperature, 25)
+
+        with patch.object(EntityResolver, "refresh") as refresh:
+            climate.target_temperature
+            climate.preset_mode
+            refresh.assert_not_called()
+            store.set_value("2", 30)
+            climate.target_temperature
+            refresh.assert_called_once_with(self.device)
+
+    def test_pending_state_is_always_resolved_again(self):
+        store = StateStore()
+        store.replace(dps=self.dps)
+        store.add_pending({"2": 30}, 0)
+        type(self.device).state_version = property(lambda _: store.current)
+        climate = TuyaLocalClimate(self.device, self.config)
+        climate.target_temperature
+
+        with patch.object(EntityResolver, "refresh") as refresh:
+            climate.target_temperature
+            refresh.assert_called_once_with(self.device)
@@ -1,13 +1,26 @@
 """Tests for the sensor entity."""
-from pytest_homeassistant_custom_component.common import MockConfigEntry
+from homeassistant.core import State
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    mock_restore_cache_with_extra_data,
+)
 from unittest.mock import AsyncMock, Mock
 
 from custom_components.tuya_local.const import (
+    CONF_AGGREGATE_SENSORS,
     CONF_DEVICE_ID,
+    CONF_ENERGY_SENSORS,
     CONF_TYPE,
+    DATA_SETTINGS,
     DOMAIN,
 )
-from custom_components.tuya_local.generic.sensor import TuyaLocalSensor
+from custom_components.tuya_local.generic.sensor import (
+    TuyaLocalAggregatedSensor,
+    TuyaLocalEnergySensor,
+    TuyaLocalSensor,
+)
+from custom_components.tuya_local.helpers.device_config import TuyaDeviceConfig
+from custom_components.tuya_local.helpers.energy import ENERGY_SENSOR_ID, EnergyMeter
 from custom_components.tuya_local.sensor import async_setup_entry
 
 
@@ -35,6 +48,92 @@ async def test_init_entry(hass):
     m_add_entities.assert_called_once()
 
 
+async def test_init_entry_aggregates_measurements_when_configured(hass):
+    """Test the initialisation of aggregated sensors."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_TYPE: "smartplugv2",
+            CONF_DEVICE_ID: "dummy",
+        },
+    )
+    m_add_entities = Mock()
+    m_device = Mock()
+    m_device.get_property.return_value = 1200
+    m_device.aggregate.return_value = {
+        "min": 1000,
+        "max": 3000,
+        "mean": 1500,
+        "samples": 12,
+        "duration": 60,
+        "integral": 90000,
+    }
+
+    hass.data[DATA_SETTINGS] = {CONF_AGGREGATE_SENSORS: ["dummy"]}
+    hass.data[DOMAIN] = {
+        "dummy": {"device": m_device},
+    }
+
+    await async_setup_entry(hass, entry, m_add_entities)
+    power = hass.data[DOMAIN]["dummy"]["sensor_power"]
+    assert type(power) == TuyaLocalAggregatedSensor
+    assert power.native_value == 150
+    attr = power.extra_state_attributes
+    assert attr["min"] == 100
+    assert attr["max"] == 300
+    assert attr["samples"] == 12
+    assert attr["energy_kwh"] == 0.0025
+
+    m_device.aggregate.return_value = None
+    assert power.native_value == 120
+    assert "min" not in power.extra_state_attributes
+
+
+async def test_init_entry_adds_energy_sensor_when_configured(hass):
+    """Test the initialisation of the local energy sensor."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_TYPE: "smartplugv2",
+            CONF_DEVICE_ID: "dummy",
+        },
+    )
+    m_add_entities = Mock()
+    m_device = Mock()
+    m_device.unique_id = "dummy"
+    m_device.energy_meter = EnergyMeter.for_config(
+        TuyaDeviceConfig("smartplugv2.yaml"), m_device
+    )
+
+    hass.data[DATA_SETTINGS] = {CONF_ENERGY_SENSORS: ["dummy"]}
+    hass.data[DOMAIN] = {
+        "dummy": {"device": m_device},
+    }
+
+    await async_setup_entry(hass, entry, m_add_entities)
+    energy = hass.data[DOMAIN]["dummy"][ENERGY_SENSOR_ID]
+    assert type(energy) == TuyaLocalEnergySensor
+    assert energy in m_add_entities.call_args[0][0]
+    assert energy.unique_id == "dummy-local_energy"
+
+    mock_restore_cache_with_extra_data(
+        hass,
+        (
+            (
+                State("sensor.dummy_local_energy", "12.5"),
+                {"native_value": 12.5, "native_unit_of_measurement": "kWh"},
+            ),
+        ),
+    )
+    energy.hass = hass
+    energy.entity_id = "sensor.dummy_local_energy"
+    m_device.energy_meter.add(10000, 0)
+    m_device.energy_meter.add(10000, 360)
+    await energy.async_added_to_hass()
+    assert energy.native_value == 12.6
+    m_device.register_entity.assert_called_once_with(energy, [ENERGY_SENSOR_ID])
+
+
 async def test_init_entry_fails_if_device_has_no_sensor(hass):
     """Test initialisation when device has no matching entity"""
     entry = MockConfigEntry(
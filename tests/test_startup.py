@@ -0,0 +1,99 @@
+"""Tests for the startup refresh scheduler"""
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+from custom_components.tuya_local.helpers.startup import (
+    StartupRefreshScheduler,
+    get_startup_scheduler,
+)
+
+
+def mock_device(name, order, responds=True):
+    device = Mock()
+    device.name = name
+    device.has_returned_state = False
+
+    async def startup_refresh(timeout):
+        order.append(name)
+        await asyncio.sleep(0)
+        return responds
+
+    device.async_startup_refresh = AsyncMock(side_effect=startup_refresh)
+    return device
+
+
+async def test_responsive_devices_are_refreshed_first(hass):
+    order = []
+    scheduler = StartupRefreshScheduler(hass, concurrency=1, timeout=2)
+    scheduler._history = {"slow": 2.5, "fast": 0.1, "offline": None}
+    scheduler.async_schedule("first", mock_device("first", order))
+    scheduler.async_schedule("offline", mock_device("offline", order, False))
+    scheduler.async_schedule("new", mock_device("new", order))
+    scheduler.async_schedule("slow", mock_device("slow", order))
+    scheduler.async_schedule("fast", mock_device("fast", order))
+    await hass.async_block_till_done()
+
+    assert order == ["fast", "slow", "first", "new", "offline"]
+    assert scheduler.pending == 0
+
+
+async def test_concurrency_is_bounded(hass):
+    running = 0
+    peak = 0
+
+    async def startup_refresh(timeout):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return True
+
+    scheduler = StartupRefreshScheduler(hass, concurrency=3, timeout=2)
+    for i in range(10):
+        device = Mock()
+        device.has_returned_state = False
+        device.async_startup_refresh = AsyncMock(side_effect=startup_refresh)
+        scheduler.async_schedule(f"dev{i}", device)
+    await hass.async_block_till_done()
+
+    assert peak == 3
+
+
+async def test_unreachable_device_is_recorded(hass):
+    order = []
+    scheduler = StartupRefreshScheduler(hass, timeout=1)
+    device = mock_device("offline", order, False)
+    scheduler.async_schedule("offline", device)
+    await hass.async_block_till_done()
+
+    device.async_startup_refresh.assert_awaited_once_with(1)
+    assert scheduler._history == {"offline": None}
+    assert scheduler.priority("offline") > scheduler.priority("unknown")
+
+
+async def test_failed_refresh_does_not_stop_queue(hass):
+    order = []
+    scheduler = StartupRefreshScheduler(hass, concurrency=1, timeout=1)
+    broken = mock_device("broken", order)
+    broken.async_startup_refresh = AsyncMock(side_effect=Exception("Error"))
+    scheduler.async_schedule("broken", broken)
+    scheduler.async_schedule("next", mock_device("next", order))
+    await hass.async_block_till_done()
+
+    assert order == ["next"]
+    assert scheduler._history == {"broken": None, "next": scheduler._history["next"]}
+    assert scheduler._history["next"] is not None
+    assert scheduler._workers == 0
+
+
+async def test_device_already_refreshed_is_skipped(hass):
+    scheduler = get_startup_scheduler(hass)
+    device = Mock()
+    device.has_returned_state = True
+    device.async_startup_refresh = AsyncMock()
+    scheduler.async_schedule("dev", device)
+    await hass.async_block_till_done()
+
+    device.async_startup_refresh.assert_not_awaited()
+    assert get_startup_scheduler(hass) is scheduler
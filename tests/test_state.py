@@ -0,0 +1,84 @@
+"""Tests for the versioned device state"""
+from threading import Thread
+from unittest import TestCase
+
+from custom_components.tuya_local.helpers.state import EMPTY_STATE, StateStore
+
+
+class TestStateStore(TestCase):
+    def setUp(self):
+        self.store = StateStore()
+
+    def test_starts_empty(self):
+        self.assertIs(self.store.current, EMPTY_STATE)
+        self.assertEqual(self.store.current.dps, {"updated_at": 0})
+        self.assertEqual(self.store.current.pending, {})
+
+    def test_versions_are_not_modified_by_writes(self):
+        self.store.merge({"1": True}, 10)
+        version = self.store.current
+        self.store.merge({"1": False}, 20)
+        self.store.add_pending({"2": 5}, 20)
+        self.assertEqual(version.dps, {"1": True, "updated_at": 10})
+        self.assertEqual(version.pending, {})
+        self.assertEqual(self.store.current.dps, {"1": False, "updated_at": 20})
+        with self.assertRaises(TypeError):
+            version.dps["1"] = False
+
+    def test_merge_returns_previous_version(self):
+        first = self.store.current
+        self.assertIs(self.store.merge({"1": True}, 10), first)
+
+    def test_replace_copies(self):
+        dps = {"1": True}
+        self.store.replace(dps=dps)
+        dps["1"] = False
+        self.assertEqual(self.store.current.get("1", 0, 10), True)
+
+    def test_pending_values_overlay_dps_until_timeout(self):
+        self.store.merge({"1": True, "2": 1}, 0)
+        self.store.add_pending({"1": False}, 100)
+        state = self.store.current
+        self.assertEqual(state.get("1", 105, 10), False)
+        self.assertEqual(state.get("1", 110, 10), True)
+        self.assertEqual(state.merged(105, 10), {"1": False, "2": 1, "updated_at": 0})
+        self.assertEqual(state.pending_values(110, 10), {})
+
+    def test_mark_sent_extends_pending_and_forces_refresh(self):
+        self.store.merge({"1": True}, 50)
+        self.store.add_pending({"1": False}, 0)
+        self.store.mark_sent(100)
+        self.assertEqual(self.store.current.dps["updated_at"], 0)
+        self.assertEqual(self.store.current.pending["1"][1], 100)
+
+    def test_expire_pending(self):
+        self.store.add_pending({"1": True}, 0)
+        self.store.add_pending({"2": False}, 10)
+        unchanged = self.store.current
+        self.assertEqual(self.store.expire_pending(5, 10), {})
+        self.assertIs(self.store.current, unchanged)
+        self.assertEqual(self.store.expire_pending(15, 10), {"1": True})
+        self.assertEqual(list(self.store.current.pending), ["2"])
+
+    def test_concurrent_writers_do_not_lose_updates(self):
+        def merge(n):
+            for i in range(200):
+                self.store.merge({f"m{n}_{i}": i}, i)
+
+        def pend(n):
+            for i in range(200):
+                self.store.add_pending({f"p{n}_{i}": i}, 0)
+
+        threads = [Thread(target=f, args=(n,)) for n in range(4) for f in (merge, pend)]
+        for t in threads:
+            t.start()
+        while any(t.is_alive() for t in threads):
+            state = self.store.current
+            self.assertEqual(
+                len(state.merged(0, 10)), len(state.dps) + len(state.pending)
+            )
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(self.store.current.dps), 801)
+        self.assertEqual(len(self.store.current.pending), 800)
@@ -0,0 +1,36 @@
+"""Tests for the device trace"""
+from unittest import TestCase
+
+from custom_components.tuya_local.helpers.tracing import (
+    NULL_TRACE,
+    REFRESH,
+    RETRY,
+    DeviceTrace,
+)
+
+
+class TestDeviceTrace(TestCase):
+    def test_keeps_most_recent_events(self):
+        trace = DeviceTrace(size=3)
+        for i in range(5):
+            trace.record(REFRESH, dps={"1": i})
+        self.assertEqual(len(trace), 3)
+        self.assertEqual(
+            [e["dps"] for e in trace.as_list()], [{"1": 2}, {"1": 3}, {"1": 4}]
+        )
+
+    def test_events_are_serialisable(self):
+        trace = DeviceTrace()
+        error = ValueError("bad")
+        trace.record(RETRY, attempt=1, error=error, dps={1: (True, error)})
+        event = trace.as_list()[0]
+        self.assertEqual(event["event"], RETRY)
+        self.assertIsInstance(event["time"], float)
+        self.assertEqual(event["error"], "bad")
+        self.assertEqual(event["dps"], {"1": [True, "bad"]})
+
+    def test_null_trace_records_nothing(self):
+        self.assertFalse(NULL_TRACE.enabled)
+        NULL_TRACE.record(REFRESH, dps={"1": True})
+        self.assertEqual(len(NULL_TRACE), 0)
+        self.assertEqual(NULL_TRACE.as_list(), [])
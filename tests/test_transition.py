@@ -0,0 +1,72 @@
+"""Tests for the light transition engine"""
+import asyncio
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import AsyncMock, MagicMock
+
+from custom_components.tuya_local.helpers.transition import (
+    TransitionEngine,
+    interpolate,
+)
+
+
+def render(values):
+    return {"22": values["brightness"]}
+
+
+class TestInterpolate(TestCase):
+    def test_numbers(self):
+        self.assertEqual(interpolate(0, 100, 0), 0)
+        self.assertEqual(interpolate(0, 100, 0.255), 26)
+        self.assertEqual(interpolate(200, 100, 0.5), 150)
+
+    def test_tuples(self):
+        self.assertEqual(
+            interpolate((0, 255, 0, 255), (255, 0, 0, 128), 0.5),
+            (128, 128, 0, 192),
+        )
+
+
+class TestTransitionEngine(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.hass = MagicMock()
+        self.hass.async_create_task = asyncio.ensure_future
+        self.send = AsyncMock()
+
+    async def test_streams_frames_ending_at_target(self):
+        engine = TransitionEngine(self.hass, self.send, 50)
+        await engine.async_run({"brightness": 0}, {"brightness": 255}, 0.2, render)
+
+        frames = [c.args[0]["22"] for c in self.send.call_args_list]
+        self.assertGreater(len(frames), 3)
+        self.assertLessEqual(len(frames), 12)
+        self.assertEqual(frames, sorted(frames))
+        self.assertEqual(frames[-1], 255)
+        self.assertEqual(engine.frames_sent, len(frames))
+
+    async def test_final_frame_replaces_rendered_end(self):
+        engine = TransitionEngine(self.hass, self.send, 50)
+        await engine.async_run(
+            {"brightness": 255}, {"brightness": 0}, 0.05, render, {"20": False}
+        )
+        self.send.assert_awaited_with({"20": False})
+
+    async def test_drops_frames_while_device_is_slow(self):
+        async def slow_send(frame):
+            await asyncio.sleep(0.05)
+
+        engine = TransitionEngine(self.hass, AsyncMock(side_effect=slow_send), 100)
+        await engine.async_run({"brightness": 0}, {"brightness": 255}, 0.2, render)
+
+        self.assertLessEqual(engine.frames_sent, 6)
+        self.assertGreater(engine.frames_dropped, 5)
+
+    async def test_new_transition_supersedes_running_one(self):
+        engine = TransitionEngine(self.hass, self.send, 50)
+        first = engine.start({"brightness": 0}, {"brightness": 255}, 1, render)
+        await asyncio.sleep(0.05)
+        second = engine.start({"brightness": 0}, {"brightness": 10}, 0.05, render)
+        await second
+
+        self.assertTrue(first.cancelled())
+        self.send.assert_awaited_with({"22": 10})
+        self.assertFalse(engine.running)